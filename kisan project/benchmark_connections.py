@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+"""
+Compare database connection profiles under concurrent load.
+
+Seeds a throwaway test database, then for each KISAN_DB_CONNECTIONS
+profile (see settings_production.py) starts a fresh process that serves
+the API routes through Django's WSGI handler from several threads at
+once, the way a threaded gunicorn worker does. Each response is closed
+like a WSGI server closes it, so connections are reused or dropped at the
+end of each request exactly as in production. It reports throughput,
+p50/p95 latency and how many connections each profile opened.
+
+The response cache is replaced with a dummy one so every request reaches
+the database.
+
+Usage:
+    DJANGO_SETTINGS_MODULE=kisan_project.settings_production python benchmark_connections.py
+    DJANGO_SETTINGS_MODULE=kisan_project.settings_production python benchmark_connections.py \\
+        --threads 16 --requests 5000 --profiles none,persistent,pgbouncer --pgbouncer localhost:6432
+
+The pgbouncer profile connects through the PgBouncer at --pgbouncer, which
+must be in transaction pooling mode and route the ``test_<DB_NAME>``
+database to the same server. Connection reuse only matters for
+PostgreSQL; on SQLite the profiles behave the same.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+from urllib.parse import urlsplit
+
+import django
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kisan_project.settings')
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings, setup_test_environment
+
+from kisan_app.benchmarking import page_requests, percentile
+from kisan_app.models import Farmer
+from kisan_app.seeding import seed_dataset
+
+PROFILES = ['none', 'persistent', 'pgbouncer']
+# Set in the per-profile processes to the parent's test database
+DATABASE_ENV = 'KISAN_BENCHMARK_DATABASE'
+
+
+def benchmark_urls(routes):
+    farmer_id = Farmer.objects.order_by('id').values_list('id', flat=True).first()
+    return [url for name, url in page_requests(farmer_id)
+            if routes == 'pages' or (name.startswith('api_') and name != 'api_index')]
+
+
+def wsgi_get(handler, url):
+    """GET ``url`` through the WSGI handler; returns the status code"""
+    parts = urlsplit(url)
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '443',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'wsgi.url_scheme': 'https',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': sys.stderr,
+    }
+    status = []
+    response = handler(environ, lambda code, headers, exc_info=None: status.append(code))
+    try:
+        for _ in response:
+            pass
+    finally:
+        # Fires request_finished, which closes or keeps the connection per CONN_MAX_AGE
+        response.close()
+    return int(status[0].split()[0])
+
+
+def run_profile(args):
+    """Body of the per-profile process: load the handler and hammer it from threads"""
+    from django.core.wsgi import get_wsgi_application
+
+    database = settings.DATABASES['default']
+    database['NAME'] = os.environ[DATABASE_ENV]
+    if args.profile == 'pgbouncer' and args.pgbouncer:
+        database['HOST'], _, database['PORT'] = args.pgbouncer.partition(':')
+    settings.ALLOWED_HOSTS = ['*']
+    # Replicas would still serve the real database rather than the test one
+    settings.KISAN_READ_REPLICAS = []
+    settings.SECURE_SSL_REDIRECT = False
+    override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}).enable()
+
+    handler = get_wsgi_application()
+    urls = benchmark_urls(args.routes)
+    connection.close()
+
+    opened = []
+    connection_created.connect(lambda **kwargs: opened.append(kwargs['connection'].alias), weak=False)
+    jobs = itertools.count()
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def worker(start_measuring):
+        for url in urls[:args.warmup]:
+            wsgi_get(handler, url)
+        start_measuring.wait()
+        mine, failed = [], 0
+        while (job := next(jobs)) < args.requests:
+            url = urls[job % len(urls)]
+            started = time.perf_counter()
+            if wsgi_get(handler, url) >= 500:
+                failed += 1
+            mine.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(mine)
+            errors.append(failed)
+
+    start_measuring = threading.Barrier(args.threads + 1)
+    threads = [threading.Thread(target=worker, args=(start_measuring,)) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    start_measuring.wait()
+    baseline = len(opened)
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'profile': args.profile,
+        'conn_max_age': database['CONN_MAX_AGE'],
+        'health_checks': database['CONN_HEALTH_CHECKS'],
+        'threads': args.threads,
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'connections_opened': len(opened) - baseline,
+    }
+
+
+def spawn(profile, args, database_name):
+    """Run one profile in a fresh process so settings are read with its environment"""
+    command = [sys.executable, os.path.abspath(__file__), '--profile', profile, '--threads', str(args.threads),
+               '--requests', str(args.requests), '--warmup', str(args.warmup), '--routes', args.routes]
+    if args.pgbouncer:
+        command += ['--pgbouncer', args.pgbouncer]
+    env = {**os.environ, 'KISAN_DB_CONNECTIONS': profile, DATABASE_ENV: database_name}
+    finished = subprocess.run(command, env=env, capture_output=True, text=True)
+    if finished.returncode:
+        raise RuntimeError(f"{profile} run failed:\n{finished.stderr}")
+    return json.loads(finished.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', default='none,persistent', help=f"comma-separated, from {', '.join(PROFILES)}")
+    parser.add_argument('--threads', type=int, default=8, help="concurrent request threads")
+    parser.add_argument('--requests', type=int, default=2000, help="measured requests per profile")
+    parser.add_argument('--warmup', type=int, default=3, help="unmeasured requests per thread")
+    parser.add_argument('--routes', choices=['api', 'pages'], default='api', help="API routes only, or every page")
+    parser.add_argument('--farmers', type=int, default=2000, help="seeded farmers (with 10 crops each)")
+    parser.add_argument('--pgbouncer', metavar='HOST:PORT', help="PgBouncer address for the pgbouncer profile")
+    parser.add_argument('--output', default='benchmark_connections.json')
+    parser.add_argument('--profile', choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args)))
+        return
+
+    profiles = args.profiles.split(',')
+    unknown = set(profiles) - set(PROFILES)
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(sorted(unknown))}")
+    if connection.vendor != 'postgresql':
+        print(f"⚠️  Running on {connection.vendor}; connection profiles only differ on PostgreSQL")
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        print(f"🌱 Seeding {args.farmers:,} farmers and {args.farmers * 10:,} crops...")
+        seed_dataset(farmers=args.farmers, crops=args.farmers * 10, notifications=args.farmers,
+                     price_days=30, weather_days=7)
+        database_name = settings.DATABASES['default']['NAME']
+        connection.close()
+
+        print(f"{'Profile':<12} | {'Threads':>7} | {'Req/s':>8} | {'p50 ms':>8} | {'p95 ms':>8} | "
+              f"{'Conns':>6} | {'Errors':>6}")
+        print("-" * 73)
+        results = []
+        for profile in profiles:
+            result = spawn(profile, args, database_name)
+            results.append(result)
+            print(f"{profile:<12} | {result['threads']:>7} | {result['requests_per_second']:>8.1f} | "
+                  f"{result['p50_ms']:>8.2f} | {result['p95_ms']:>8.2f} | {result['connections_opened']:>6} | "
+                  f"{result['errors']:>6}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    baseline = results[0]['requests_per_second']
+    for result in results[1:]:
+        print(f"⚡ {result['profile']}: {result['requests_per_second'] / baseline:.2f}x the throughput of "
+              f"{results[0]['profile']}")
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump({
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'vendor': connection.vendor,
+            'farmers': args.farmers,
+            'routes': args.routes,
+            'results': results,
+        }, handle, indent=2)
+    print(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
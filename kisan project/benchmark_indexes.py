@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+"""
+Benchmark the query indexes added in kisan_app migration 0003.
+
+Seeds a throwaway test database, runs each view's hot query with the
+indexes of migration 0003 dropped and then with them recreated, and
+prints the EXPLAIN plan and median latency for both. Only those indexes
+change; every later migration stays applied, so the models keep working.
+
+Usage:
+    python benchmark_indexes.py --crops 200000
+    DJANGO_SETTINGS_MODULE=kisan_project.settings_production python benchmark_indexes.py
+
+With settings_production the benchmark runs against PostgreSQL in a
+separate ``test_<DB_NAME>`` database, so the real data is never touched.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import django
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kisan_project.settings')
+django.setup()
+
+from django.apps import apps
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.operations import AddIndex
+from django.test.utils import setup_test_environment
+from django.utils import timezone
+
+from kisan_app.models import Farmer, Crop, MarketPrice, WeatherData, Notification
+
+BATCH_SIZE = 5000
+MARKETS = ['Delhi Mandi', 'Mumbai APMC', 'Pune Market', 'Bangalore Market', 'Chennai Wholesale']
+CROP_NAMES = ['Wheat', 'Rice', 'Cotton', 'Sugarcane', 'Tomatoes', 'Onions', 'Potatoes', 'Chili', 'Turmeric']
+LOCATIONS = ['Delhi', 'Mumbai', 'Pune', 'Bangalore', 'Chennai', 'Ahmedabad', 'Jaipur', 'Lucknow']
+SEASONS = [choice for choice, _ in Crop.SEASON_CHOICES]
+STATUSES = [choice for choice, _ in Crop.STATUS_CHOICES]
+
+
+def seed(crops, rng):
+    """Bulk insert a dataset proportional to the requested crop count"""
+    today = date.today()
+    farmer_count = max(1, crops // 10)
+    Farmer.objects.bulk_create(
+        (Farmer(name=f"Farmer {i}", phone=f"9{i:09d}", address=rng.choice(LOCATIONS)) for i in range(farmer_count)),
+        batch_size=BATCH_SIZE,
+    )
+    farmer_ids = list(Farmer.objects.values_list('id', flat=True))
+
+    Crop.objects.bulk_create(
+        (Crop(
+            name=rng.choice(CROP_NAMES),
+            farmer_id=rng.choice(farmer_ids),
+            season=rng.choice(SEASONS),
+            status=rng.choice(STATUSES),
+            quantity=Decimal(rng.randint(50, 2000)),
+            price_per_kg=Decimal(rng.randint(1500, 20000)) / 100,
+            investment_cost=Decimal(rng.randint(1000, 50000)),
+            harvest_date=today + timedelta(days=rng.randint(-365, 365)),
+        ) for _ in range(crops)),
+        batch_size=BATCH_SIZE,
+    )
+
+    # Prices are unique per crop, market and day, and readings per location
+    # and time, so walk back through the dates instead of picking them at random
+    pairs = [(crop_name, market) for crop_name in CROP_NAMES for market in MARKETS]
+    MarketPrice.objects.bulk_create(
+        (MarketPrice(
+            crop_name=pairs[i % len(pairs)][0],
+            market_location=pairs[i % len(pairs)][1],
+            price_per_kg=Decimal(rng.randint(1500, 20000)) / 100,
+            date_recorded=today - timedelta(days=i // len(pairs)),
+        ) for i in range(crops // 2)),
+        batch_size=BATCH_SIZE,
+    )
+    now = timezone.now()
+    WeatherData.objects.bulk_create(
+        (WeatherData(
+            location=LOCATIONS[i % len(LOCATIONS)],
+            temperature=rng.uniform(15, 40),
+            humidity=rng.uniform(30, 90),
+            weather_condition='Sunny',
+            date_recorded=now - timedelta(hours=i // len(LOCATIONS)),
+        ) for i in range(crops // 2)),
+        batch_size=BATCH_SIZE,
+    )
+    Notification.objects.bulk_create(
+        (Notification(
+            farmer_id=rng.choice(farmer_ids),
+            title="Harvest Reminder",
+            message="Benchmark notification",
+            notification_type='harvest_reminder',
+            is_read=rng.random() < 0.7,
+        ) for _ in range(crops)),
+        batch_size=BATCH_SIZE,
+    )
+
+    # auto_now_add ignores explicit values, so spread the dates afterwards
+    for model, field in [(Notification, 'created_at'), (Crop, 'created_at')]:
+        table = connection.ops.quote_name(model._meta.db_table)
+        column = connection.ops.quote_name(field)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f"UPDATE {table} SET {column} = {column} - (id % 365) * INTERVAL '1 day'")
+            else:
+                cursor.execute(f"UPDATE {table} SET {column} = datetime({column}, '-' || (id % 365) || ' days')")
+    return farmer_ids
+
+
+def view_queries(farmer_id):
+    """The filter/sort queries each view runs, keyed by a readable label"""
+    today = date.today()
+    return {
+        'home: upcoming harvests': lambda: Crop.objects.filter(
+            harvest_date__gte=today, harvest_date__lte=today + timedelta(days=30),
+            status__in=Crop.PENDING_STATUSES,
+        ).order_by('harvest_date')[:5],
+        'home: recent crops': lambda: Crop.objects.order_by('-created_at', '-id')[:5],
+        'crops_list: season filter': lambda: Crop.objects.filter(season='Rabi').order_by('harvest_date', 'id')[:20],
+        'crops_list: first page': lambda: Crop.objects.order_by('harvest_date', 'id')[:20],
+        'analytics: overdue crops': lambda: Crop.objects.filter(
+            harvest_date__lt=today, status__in=Crop.PENDING_STATUSES,
+        )[:50],
+        'price_calculator: crop history': lambda: MarketPrice.objects.filter(crop_name='Wheat').order_by('-date_recorded')[:5],
+        'price_calculator: recent prices': lambda: MarketPrice.objects.order_by('-date_recorded', '-id')[:10],
+        'weather_info: location history': lambda: WeatherData.objects.filter(location='Pune').order_by('-date_recorded')[:10],
+        'notifications: unread for farmer': lambda: Notification.objects.filter(
+            farmer_id=farmer_id, is_read=False,
+        ).order_by('-created_at')[:20],
+    }
+
+
+def query_indexes():
+    """(model, index) for every index migration 0003 added"""
+    migration = MigrationLoader(connection).get_migration('kisan_app', '0003_add_query_indexes')
+    return [
+        (apps.get_model('kisan_app', operation.model_name), operation.index)
+        for operation in migration.operations if isinstance(operation, AddIndex)
+    ]
+
+
+def set_indexes(indexes, present):
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            if present:
+                editor.add_index(model, index)
+            else:
+                editor.remove_index(model, index)
+
+
+def analyze():
+    """Refresh planner statistics so both runs see the same data distribution"""
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def measure(queries, repeat):
+    results = {}
+    for label, build in queries.items():
+        plan = build().explain()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(build())
+            timings.append((time.perf_counter() - start) * 1000)
+        results[label] = (statistics.median(timings), plan)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--crops', type=int, default=100000, help="number of crops to seed")
+    parser.add_argument('--repeat', type=int, default=20, help="runs per query")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--plans', action='store_true', help="print EXPLAIN output")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        print(f"🌱 Seeding {args.crops} crops on {connection.vendor}...")
+        farmer_ids = seed(args.crops, random.Random(args.seed))
+        queries = view_queries(farmer_ids[0])
+
+        indexes = query_indexes()
+        set_indexes(indexes, present=False)
+        analyze()
+        before = measure(queries, args.repeat)
+        set_indexes(indexes, present=True)
+        analyze()
+        after = measure(queries, args.repeat)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print("=" * 78)
+    print(f"{'Query':<36} | {'Before (ms)':>11} | {'After (ms)':>10} | {'Speedup':>8}")
+    print("=" * 78)
+    for label in queries:
+        before_ms, before_plan = before[label]
+        after_ms, after_plan = after[label]
+        speedup = before_ms / after_ms if after_ms else float('inf')
+        print(f"{label:<36} | {before_ms:>11.2f} | {after_ms:>10.2f} | {speedup:>7.1f}x")
+        if args.plans:
+            print(f"   before: {before_plan}")
+            print(f"   after:  {after_plan}")
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
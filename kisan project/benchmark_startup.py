@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+"""
+Measure gunicorn boot time and per-worker memory for each server profile.
+
+Starts gunicorn on a free local port once per profile with the same
+number of workers:
+
+    baseline    gunicorn kisan_project.wsgi:application -w N (the old start command)
+    no-preload  gunicorn.conf.py with GUNICORN_PRELOAD=false (warmed in each worker)
+    tuned       gunicorn.conf.py (preloaded, warmed and frozen in the master)
+
+For each it records the time from launch until the home page answers,
+the latency of the first request to every route (paid by cold workers)
+and of later ones, and each process's RSS, PSS and private memory from
+/proc/<pid>/smaps_rollup, once right after boot and again after every
+route has been requested a few times. PSS divides shared pages between
+the processes sharing them, so the PSS total shows the memory the
+workers really cost together. Memory after load includes each worker's
+local-memory cache, which grows with the pages it has cached.
+
+Usage:
+    python benchmark_startup.py --workers 4
+    python benchmark_startup.py --profiles baseline,tuned --rounds 5 --output startup.json
+
+Linux only. The pages read the configured database, so point it at a
+seeded development database rather than production.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import django
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kisan_project.settings')
+django.setup()
+
+from kisan_app.benchmarking import load_budgets, page_requests
+from kisan_app.models import Farmer
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILES = ['baseline', 'no-preload', 'tuned']
+BOOT_TIMEOUT = 60
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def benchmark_urls():
+    """Every GET route that works with default arguments"""
+    budgets = load_budgets()
+    farmer_id = Farmer.objects.order_by('id').values_list('id', flat=True).first() or 1
+    return [url for name, url in page_requests(farmer_id)
+            if 'skip' not in budgets['routes'].get(name, {}) and '?' not in url]
+
+
+def command(profile, port, workers):
+    if profile == 'baseline':
+        # An empty config file keeps gunicorn from reading gunicorn.conf.py
+        return ['gunicorn', '-c', os.devnull, 'kisan_project.wsgi:application', '-w', str(workers),
+                '-b', f'127.0.0.1:{port}']
+    return ['gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}']
+
+
+def environment(profile, workers):
+    env = {**os.environ, 'WEB_CONCURRENCY': str(workers)}
+    if profile == 'no-preload':
+        env['GUNICORN_PRELOAD'] = 'false'
+    return env
+
+
+def get(port, url):
+    """GET ``url``; returns the status and latency in milliseconds"""
+    started = time.perf_counter()
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.request('GET', url, headers={'Host': 'localhost', 'X-Forwarded-Proto': 'https'})
+        response = connection.getresponse()
+        response.read()
+    finally:
+        connection.close()
+    return response.status, (time.perf_counter() - started) * 1000
+
+
+def wait_until_serving(port, process):
+    """Seconds from now until the home page answers"""
+    started = time.perf_counter()
+    while time.perf_counter() - started < BOOT_TIMEOUT:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {process.returncode}")
+        try:
+            get(port, '/')
+            return time.perf_counter() - started
+        except OSError:
+            time.sleep(0.02)
+    raise RuntimeError(f"gunicorn did not answer within {BOOT_TIMEOUT}s")
+
+
+def children(pid):
+    found = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as handle:
+                    # The command name may contain spaces; the parent pid follows the closing parenthesis
+                    parent = int(handle.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if parent == pid:
+                found.append(int(entry))
+    return found
+
+
+def memory(pid):
+    """RSS, PSS and private memory of one process in MiB"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as handle:
+        for line in handle:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss_mb': round(fields.get('Rss', 0), 1),
+        'pss_mb': round(fields.get('Pss', 0), 1),
+        'private_mb': round(fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0), 1),
+    }
+
+
+def snapshot(pid):
+    """Mean per-worker memory and the PSS total of the master and its workers"""
+    master = memory(pid)
+    workers = [memory(child) for child in children(pid)]
+    summary = {key: round(statistics.mean(row[key] for row in workers), 1) for key in master}
+    summary['total_pss_mb'] = round(master['pss_mb'] + sum(row['pss_mb'] for row in workers), 1)
+    summary['workers'] = len(workers)
+    return summary
+
+
+def run_profile(profile, urls, workers, rounds):
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(command(profile, port, workers), cwd=PROJECT_DIR, env=environment(profile, workers),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_serving(port, process)
+        boot = time.perf_counter() - started
+        while len(children(process.pid)) < workers and time.perf_counter() - started < BOOT_TIMEOUT:
+            time.sleep(0.05)
+        # Let the last workers finish importing (or warming) before measuring them
+        time.sleep(1)
+        idle = snapshot(process.pid)
+        first = {url: get(port, url) for url in urls}
+        for _ in range(rounds * workers):
+            for url in urls:
+                get(port, url)
+        later = [get(port, url)[1] for url in urls]
+        loaded = snapshot(process.pid)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+
+    return {
+        'profile': profile,
+        'boot_s': round(boot, 2),
+        'first_request_ms': round(statistics.mean(latency for _, latency in first.values()), 1),
+        'later_request_ms': round(statistics.median(later), 1),
+        'errors': [url for url, (status, _) in first.items() if status >= 500],
+        'idle': idle,
+        'loaded': loaded,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', default=','.join(PROFILES), help=f"comma-separated, from {', '.join(PROFILES)}")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=3, help="passes over every route per worker before measuring")
+    parser.add_argument('--output', default='benchmark_startup.json')
+    args = parser.parse_args()
+
+    profiles = args.profiles.split(',')
+    unknown = set(profiles) - set(PROFILES)
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(sorted(unknown))}")
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        parser.error("needs Linux 4.14+ for /proc/<pid>/smaps_rollup")
+
+    urls = benchmark_urls()
+    print(f"🚀 {args.workers} workers, {len(urls)} routes")
+    print(f"{'Profile':<11} | {'Boot s':>6} | {'1st ms':>7} | {'p50 ms':>7} | {'Memory':<6} | {'RSS/w':>6} | "
+          f"{'PSS/w':>6} | {'Priv/w':>6} | {'PSS total':>9}")
+    print("-" * 90)
+    results = []
+    for profile in profiles:
+        result = run_profile(profile, urls, args.workers, args.rounds)
+        results.append(result)
+        for stage in ('idle', 'loaded'):
+            row = result[stage]
+            timings = (f"{result['boot_s']:>6.2f} | {result['first_request_ms']:>7.1f} | {result['later_request_ms']:>7.1f}"
+                       if stage == 'idle' else f"{'':>6} | {'':>7} | {'':>7}")
+            print(f"{profile if stage == 'idle' else '':<11} | {timings} | {stage:<6} | {row['rss_mb']:>6.1f} | "
+                  f"{row['pss_mb']:>6.1f} | {row['private_mb']:>6.1f} | {row['total_pss_mb']:>9.1f}")
+        if result['errors']:
+            print(f"   ❌ server errors on {', '.join(result['errors'])}")
+    print("Memory in MiB per worker (/w); PSS total includes the master.")
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump({
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'workers': args.workers,
+            'urls': urls,
+            'results': results,
+        }, handle, indent=2)
+    print(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
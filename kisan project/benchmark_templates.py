@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+"""
+Measure the bytes every HTML page sends and how long its templates take to render.
+
+Seeds a throwaway test database, requests each page that renders a
+template and records:
+
+    bytes        the HTML, raw and gzipped
+    inline CSS   bytes inside <style> blocks, re-sent with every page
+    stylesheets  linked CSS files, fetched once and then cached
+    render       median time to render the page's template again with the
+                 same context, once through the configured engine (the
+                 cached loader compiles each template once per process) and
+                 once through a copy of it without the cached loader, which
+                 reads and parses the page and base.html on every render
+
+Together the byte columns show what a first visit downloads (page plus
+stylesheets) and what every later page costs (the page alone).
+
+Usage:
+    python benchmark_templates.py
+    python benchmark_templates.py --crops 10000 --repeat 100 --output templates.json
+    DJANGO_SETTINGS_MODULE=kisan_project.settings_production python benchmark_templates.py
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+import django
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kisan_project.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from django.db import connection
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.test import Client
+from django.test.utils import setup_test_environment
+
+from kisan_app.benchmarking import load_budgets, page_requests
+from kisan_app.models import Farmer
+from kisan_app.seeding import seed_dataset
+
+STYLE_BLOCK = re.compile(r'<style\b.*?</style>', re.S | re.I)
+STYLESHEET = re.compile(r'<link\b[^>]*rel="stylesheet"[^>]*href="([^"]+)"', re.I)
+
+
+def uncached_engine():
+    """The project's template engine without the cached loader"""
+    config = settings.TEMPLATES[0]
+    return DjangoTemplates({
+        'NAME': 'uncached',
+        'DIRS': config['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **config['OPTIONS'],
+            'loaders': [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ],
+        },
+    })
+
+
+def gzipped(content):
+    return len(gzip.compress(content, compresslevel=6))
+
+
+def render_ms(engine, name, context, request, repeat):
+    """Median milliseconds to load and render template ``name``"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engine.get_template(name).render(context, request)
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def stylesheet(url):
+    """Size of a linked stylesheet, looked up among the static files"""
+    path = finders.find(url[len(settings.STATIC_URL):]) if url.startswith(settings.STATIC_URL) else None
+    if path is None:
+        return {'url': url, 'bytes': None, 'gzip_bytes': None}
+    with open(path, 'rb') as handle:
+        content = handle.read()
+    return {'url': url, 'bytes': len(content), 'gzip_bytes': gzipped(content)}
+
+
+def measure_page(client, url, uncached, repeat):
+    cache.clear()
+    response = client.get(url)
+    if response.status_code != 200 or not response.templates or 'html' not in response.get('Content-Type', ''):
+        return None
+    html = response.content
+    context = response.context[0] if isinstance(response.context, list) else response.context
+    context = context.flatten()
+    name = response.templates[0].name
+    request = response.wsgi_request
+    return {
+        'url': url,
+        'template': name,
+        'templates': sorted({template.name for template in response.templates}),
+        'bytes': len(html),
+        'gzip_bytes': gzipped(html),
+        'inline_css_bytes': sum(len(block) for block in STYLE_BLOCK.findall(html.decode('utf-8'))),
+        'stylesheets': STYLESHEET.findall(html.decode('utf-8')),
+        'cached_render_ms': render_ms(engines['django'], name, context, request, repeat),
+        'uncached_render_ms': render_ms(uncached, name, context, request, repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--crops', type=int, default=1000, help="size of the seeded dataset")
+    parser.add_argument('--repeat', type=int, default=50, help="renders per template")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='benchmark_templates.json')
+    args = parser.parse_args()
+
+    budgets = load_budgets()
+    results = []
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ['*']
+    # Replicas would still serve the real database rather than the test one
+    settings.KISAN_READ_REPLICAS = []
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        print(f"🌱 Seeding {args.crops:,} crops on {connection.vendor}...")
+        seed_dataset(farmers=max(1, args.crops // 10), crops=args.crops, notifications=args.crops // 5,
+                     price_days=90, weather_days=30, seed=args.seed)
+        farmer_id = Farmer.objects.order_by('id').values_list('id', flat=True).first()
+        client = Client(raise_request_exception=False)
+        client.force_login(User.objects.create_superuser('benchmark', 'benchmark@example.com', 'benchmark'))
+        uncached = uncached_engine()
+
+        print(f"{'URL':<24} | {'Bytes':>7} | {'Gzip':>6} | {'Inline CSS':>10} | {'Cached ms':>9} | {'Uncached ms':>11}")
+        print("-" * 83)
+        for name, url in page_requests(farmer_id):
+            if '?' in url or 'skip' in budgets['routes'].get(name, {}):
+                continue
+            result = measure_page(client, url, uncached, args.repeat)
+            if result is None:
+                continue
+            results.append(result)
+            print(f"{url:<24} | {result['bytes']:>7,} | {result['gzip_bytes']:>6,} | {result['inline_css_bytes']:>10,} | "
+                  f"{result['cached_render_ms']:>9.2f} | {result['uncached_render_ms']:>11.2f}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    stylesheets = [stylesheet(url) for url in sorted({url for result in results for url in result['stylesheets']})]
+    for sheet in stylesheets:
+        print(f"🎨 {sheet['url']}: {sheet['bytes'] or 0:,} bytes, {sheet['gzip_bytes'] or 0:,} gzipped, "
+              "downloaded once per deploy")
+    templates = sorted({template for result in results for template in result['templates']})
+    print(f"📊 {len(results)} pages, {len(templates)} templates; mean page "
+          f"{statistics.mean(result['bytes'] for result in results):,.0f} bytes "
+          f"({statistics.mean(result['gzip_bytes'] for result in results):,.0f} gzipped)")
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump({
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'vendor': connection.vendor,
+            'crops': args.crops,
+            'repeat': args.repeat,
+            'templates': templates,
+            'stylesheets': stylesheets,
+            'results': results,
+        }, handle, indent=2)
+    print(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+Benchmark every kisan_app URL at several dataset sizes.
+
+Seeds a throwaway test database with seed_kisan's generator, grows it to
+each requested crop count and requests every route (plus its search,
+filter and JSON variants) through the test client. For each request it
+records the query count, SQL time, template render time and p50/p95
+latency, writes everything to a JSON file and exits non-zero when a route
+breaks its budget in perf_budgets.json.
+
+Usage:
+    python benchmark_views.py --sizes 1000,100000
+    python benchmark_views.py --sizes 1000000 --repeat 5 --output bench-1m.json
+    DJANGO_SETTINGS_MODULE=kisan_project.settings_production python benchmark_views.py --workers 4
+
+With settings_production the benchmark runs against PostgreSQL in a
+separate ``test_<DB_NAME>`` database, so the real data is never touched.
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import django
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kisan_project.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+
+from kisan_app.benchmarking import budget_violations, load_budgets, page_requests, profile_request
+from kisan_app.models import Farmer
+from kisan_app.seeding import seed_dataset
+
+
+def grow(target, current, seed, workers):
+    """Add crops (and farmers and notifications in proportion) up to ``target``"""
+    added = target - current
+    seed_dataset(
+        farmers=max(1, added // 10),
+        crops=added,
+        notifications=added // 5,
+        # Price and weather history do not scale with crops; seed them once
+        price_days=90 if not current else 0,
+        weather_days=30 if not current else 0,
+        seed=seed,
+        workers=workers,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,100000', help="comma-separated crop counts, e.g. 1000,100000,1000000")
+    parser.add_argument('--repeat', type=int, default=20, help="requests per URL")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=1, help="seeding processes (PostgreSQL only)")
+    parser.add_argument('--warm-cache', action='store_true', help="measure cached responses instead of cold views")
+    parser.add_argument('--budgets', default=None, help="budget file (default: perf_budgets.json)")
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    budgets = load_budgets(args.budgets) if args.budgets else load_budgets()
+    results, violations = [], []
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ['*']
+    # Replicas would still serve the real database rather than the test one
+    settings.KISAN_READ_REPLICAS = []
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        client = Client(raise_request_exception=False)
+        client.force_login(User.objects.create_superuser('benchmark', 'benchmark@example.com', 'benchmark'))
+        current = 0
+        for step, size in enumerate(sizes):
+            print(f"🌱 Growing dataset to {size:,} crops on {connection.vendor}...")
+            grow(size, current, args.seed + step, args.workers)
+            current = size
+            farmer_id = Farmer.objects.order_by('id').values_list('id', flat=True).first()
+
+            print(f"{'URL':<40} | {'Queries':>7} | {'SQL ms':>8} | {'Tmpl ms':>8} | {'p50 ms':>8} | {'p95 ms':>8}")
+            print("-" * 92)
+            for name, url in page_requests(farmer_id):
+                result = profile_request(client, url, args.repeat, args.warm_cache)
+                problems = budget_violations(name, url, result, budgets, size)
+                violations.extend(f"[{size:,}] {problem}" for problem in problems)
+                results.append({'size': size, 'route': name, 'url': url, **result})
+                flag = " ❌" if problems else ""
+                print(f"{url:<40} | {result['queries']:>7} | {result['sql_ms']:>8.2f} | {result['render_ms']:>8.2f} | "
+                      f"{result['p50_ms']:>8.2f} | {result['p95_ms']:>8.2f}{flag}")
+            print()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump({
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'vendor': connection.vendor,
+            'repeat': args.repeat,
+            'cache': 'warm' if args.warm_cache else 'cold',
+            'results': results,
+            'violations': violations,
+        }, handle, indent=2)
+    print(f"📄 Results written to {args.output}")
+
+    if violations:
+        print(f"❌ {len(violations)} budget violations:")
+        for violation in violations:
+            print(f"   {violation}")
+        sys.exit(1)
+    print("✅ All routes within budget")
+
+
+if __name__ == "__main__":
+    main()
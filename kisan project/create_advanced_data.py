@@ -13,6 +13,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kisan_project.settings')
 django.setup()
 
 from kisan_app.models import Farmer, Crop, CropCategory, MarketPrice, WeatherData, Notification
+from kisan_app.reminders import generate_harvest_reminders
 
 # Create crop categories
 categories_data = [
@@ -148,26 +149,11 @@ for location in locations:
 print("\nCreating notifications...")
 notification_types = ['harvest_reminder', 'price_alert', 'weather_alert', 'general']
 
+# Harvest reminders, the same way the daily generate_harvest_reminders command sends them
+reminders = generate_harvest_reminders()
+print(f"✓ Created {sum(reminders.values())} harvest reminders")
+
 for farmer in farmers:
-    # Harvest reminders
-    upcoming_crops = farmer.crops.filter(
-        harvest_date__gte=date.today(),
-        harvest_date__lte=date.today() + timedelta(days=7)
-    )
-    
-    for crop in upcoming_crops:
-        notification, created = Notification.objects.get_or_create(
-            farmer=farmer,
-            title=f"Harvest Reminder: {crop.name}",
-            defaults={
-                'message': f"Your {crop.name} crop is scheduled for harvest on {crop.harvest_date.strftime('%B %d, %Y')}. Please prepare for harvesting activities.",
-                'notification_type': 'harvest_reminder',
-                'is_read': random.choice([True, False])
-            }
-        )
-        if created:
-            print(f"✓ Created notification: {notification.title}")
-    
     # General notifications
     general_messages = [
         "New government subsidies available for organic farming",
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Farmer, Crop, CropCategory, MarketPrice, WeatherData, Notification
+from .models import Farmer, Crop, CropCategory, MarketPrice, WeatherData, Notification, AnalyticsSnapshot, PriceRollup, LatestMarketPrice, PriceAlertRule, WeatherRollup, LatestWeather, ArchivedRecord, ArchiveCutoff
 
 # Register your models here.
 
@@ -33,6 +33,9 @@ class FarmerAdmin(admin.ModelAdmin):
         })
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_rollups()
+
 
 @admin.register(Crop)
 class CropAdmin(admin.ModelAdmin):
@@ -84,4 +87,66 @@ class NotificationAdmin(admin.ModelAdmin):
     list_filter = ['notification_type', 'is_read', 'created_at']
     search_fields = ['title', 'farmer__name']
     readonly_fields = ['created_at']
-    date_hierarchy = 'created_at'
\ No newline at end of file
+    raw_id_fields = ['farmer', 'crop']
+    date_hierarchy = 'created_at'
+
+
+@admin.register(AnalyticsSnapshot)
+class AnalyticsSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['dimension', 'key', 'crop_count', 'total_quantity', 'total_value', 'total_investment', 'updated_at']
+    list_filter = ['dimension']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(PriceRollup)
+class PriceRollupAdmin(admin.ModelAdmin):
+    list_display = ['crop_name', 'market_location', 'resolution', 'period_start', 'open_price', 'high_price',
+                    'low_price', 'close_price', 'mean_price', 'samples']
+    list_filter = ['resolution', 'market_location']
+    search_fields = ['crop_key', 'market_key']
+    date_hierarchy = 'period_start'
+
+
+@admin.register(LatestMarketPrice)
+class LatestMarketPriceAdmin(admin.ModelAdmin):
+    list_display = ['crop_name', 'market_location', 'price_per_kg', 'date_recorded', 'source', 'updated_at']
+    list_filter = ['market_location']
+    search_fields = ['crop_key', 'market_key']
+    raw_id_fields = ['price']
+
+
+@admin.register(PriceAlertRule)
+class PriceAlertRuleAdmin(admin.ModelAdmin):
+    list_display = ['farmer', 'crop_name', 'market_location', 'direction', 'threshold', 'is_active', 'last_triggered_at']
+    list_filter = ['direction', 'is_active']
+    search_fields = ['farmer__name', 'crop_name', 'market_location']
+    raw_id_fields = ['farmer', 'last_price']
+
+
+@admin.register(WeatherRollup)
+class WeatherRollupAdmin(admin.ModelAdmin):
+    list_display = ['location', 'resolution', 'period_start', 'min_temperature', 'max_temperature',
+                    'avg_humidity', 'total_rainfall', 'samples']
+    list_filter = ['resolution']
+    search_fields = ['location']
+    date_hierarchy = 'period_start'
+
+
+@admin.register(LatestWeather)
+class LatestWeatherAdmin(admin.ModelAdmin):
+    list_display = ['location', 'weather_condition', 'temperature', 'humidity', 'rainfall', 'date_recorded', 'updated_at']
+    search_fields = ['location']
+    raw_id_fields = ['reading']
+
+
+@admin.register(ArchivedRecord)
+class ArchivedRecordAdmin(admin.ModelAdmin):
+    list_display = ['model', 'original_id', 'recorded_at', 'archived_at']
+    list_filter = ['model']
+    search_fields = ['=original_id']
+    date_hierarchy = 'recorded_at'
+
+
+@admin.register(ArchiveCutoff)
+class ArchiveCutoffAdmin(admin.ModelAdmin):
+    list_display = ['model', 'archived_before', 'updated_at']
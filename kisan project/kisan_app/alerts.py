@@ -0,0 +1,122 @@
+"""Batch evaluation of farmers' price alert rules.
+
+``evaluate_price_alerts`` matches every active PriceAlertRule against
+LatestMarketPrice with one query per direction. For each rule, a
+correlated subquery picks the best current price that crosses its
+threshold, at the rule's mandi or at any mandi: the highest price for
+"above" rules and the lowest for "below" rules. A rule whose match is
+the price it last fired on is skipped, so re-running the evaluator never
+repeats an alert. New matches become Notification rows in one bulk
+insert, and the rules are updated with one UPDATE per matched price.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery, Value
+from django.db.models.lookups import Exact
+from django.utils import timezone
+
+from .cache import bump_version
+from .models import LatestMarketPrice, Notification, PriceAlertRule
+from .notifications import refresh_unread_counts
+
+BATCH_SIZE = 2000
+ID_CHUNK_SIZE = 500
+
+
+@dataclass
+class AlertStats:
+    rules_matched: int = 0
+    notifications: int = 0
+
+
+def best_crossing_price(direction, since=None):
+    """Subquery: price_id of the best current price crossing the outer rule's threshold"""
+    prices = LatestMarketPrice.objects.filter(
+        Q(Exact(OuterRef('market_key'), Value(''))) | Q(market_key=OuterRef('market_key')),
+        crop_key=OuterRef('crop_key'),
+    )
+    if direction == 'above':
+        prices = prices.filter(price_per_kg__gte=OuterRef('threshold')).order_by('-price_per_kg', 'market_key')
+    else:
+        prices = prices.filter(price_per_kg__lte=OuterRef('threshold')).order_by('price_per_kg', 'market_key')
+    if since is not None:
+        prices = prices.filter(updated_at__gte=since)
+    return Subquery(prices.values('price_id')[:1])
+
+
+def pending_matches(since=None):
+    """Rule values, with the matched price_id as ``match``, for rules that have not fired on it yet"""
+    for direction, _ in PriceAlertRule.DIRECTION_CHOICES:
+        rules = PriceAlertRule.objects.filter(is_active=True, direction=direction)
+        if since is not None:
+            rules = rules.filter(crop_key__in=LatestMarketPrice.objects.filter(updated_at__gte=since).values('crop_key'))
+        # Unmatched rules are dropped here rather than in SQL, where filtering
+        # on the annotation would evaluate the subquery a second time
+        rules = rules.annotate(match=best_crossing_price(direction, since)).order_by().values(
+            'id', 'farmer_id', 'direction', 'threshold', 'last_price_id', 'match',
+        )
+        for rule in rules.iterator(chunk_size=BATCH_SIZE):
+            if rule['match'] is not None and rule['match'] != rule['last_price_id']:
+                yield rule
+
+
+def prices_by_id(price_ids):
+    price_ids = sorted(price_ids)
+    prices = {}
+    for start in range(0, len(price_ids), ID_CHUNK_SIZE):
+        rows = LatestMarketPrice.objects.filter(price_id__in=price_ids[start:start + ID_CHUNK_SIZE]).values(
+            'price_id', 'crop_name', 'market_location', 'price_per_kg', 'date_recorded',
+        )
+        prices.update((row['price_id'], row) for row in rows)
+    return prices
+
+
+def alert_notification(rule, price):
+    word = 'above' if rule['direction'] == 'above' else 'below'
+    return Notification(
+        farmer_id=rule['farmer_id'],
+        title=f"Price Alert: {price['crop_name']}",
+        message=(
+            f"{price['crop_name']} is ₹{price['price_per_kg']}/kg at {price['market_location']} "
+            f"({price['date_recorded']}), {word} your ₹{rule['threshold']} target."
+        ),
+        notification_type='price_alert',
+    )
+
+
+def evaluate_price_alerts(since=None):
+    """Notify every rule whose threshold is crossed by a price it has not fired on.
+
+    ``since`` limits matching to latest prices refreshed at or after that time.
+    """
+    matches = list(pending_matches(since))
+    stats = AlertStats(rules_matched=len(matches))
+    if not matches:
+        return stats
+
+    prices = prices_by_id({rule['match'] for rule in matches})
+    rules_by_price = defaultdict(list)
+    notifications = []
+    for rule in matches:
+        price = prices.get(rule['match'])
+        # The latest price moved on between the two queries; the next run catches it
+        if price is None:
+            continue
+        rules_by_price[rule['match']].append(rule['id'])
+        notifications.append(alert_notification(rule, price))
+
+    now = timezone.now()
+    with transaction.atomic():
+        Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+        refresh_unread_counts({notification.farmer_id for notification in notifications})
+        for price_id, rule_ids in rules_by_price.items():
+            for start in range(0, len(rule_ids), ID_CHUNK_SIZE):
+                PriceAlertRule.objects.filter(id__in=rule_ids[start:start + ID_CHUNK_SIZE]).update(
+                    last_price_id=price_id, last_triggered_at=now,
+                )
+    stats.notifications = len(notifications)
+    if notifications:
+        bump_version(Notification)
+    return stats
@@ -0,0 +1,136 @@
+"""Incrementally maintained crop analytics for the dashboard.
+
+Each crop contributes its count, quantity, value and investment to one
+AnalyticsSnapshot row per dimension (overall total, day and month created,
+season and category). Saving or deleting a crop applies the difference
+between its old and new contributions, so keeping the snapshot current costs
+a few small updates per changed crop instead of a rescan of the table.
+
+Bulk operations (``bulk_create``, ``QuerySet.update``, raw SQL) bypass the
+signals; run ``python manage.py rebuild_analytics`` after them.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import AnalyticsSnapshot, Crop, CropQuerySet
+
+# Crop fields the snapshot depends on
+TRACKED_FIELDS = ['quantity', 'price_per_kg', 'investment_cost', 'season', 'category_id', 'created_at']
+MEASURES = ['crop_count', 'total_quantity', 'total_value', 'total_investment']
+
+
+def crop_state(crop):
+    return {field: getattr(crop, field) for field in TRACKED_FIELDS}
+
+
+def dimension_keys(state):
+    created = timezone.localtime(state['created_at']).date()
+    return [
+        ('total', ''),
+        ('day', created.isoformat()),
+        ('month', created.replace(day=1).isoformat()),
+        ('season', state['season']),
+        ('category', str(state['category_id'] or '')),
+    ]
+
+
+def to_decimal(value):
+    """Round like the two-decimal model fields, even if a float was assigned"""
+    return Decimal(str(value)).quantize(Decimal('0.01'))
+
+
+def contributions(state, sign):
+    quantity = to_decimal(state['quantity'])
+    measures = {
+        'crop_count': sign,
+        'total_quantity': sign * quantity,
+        'total_value': sign * quantity * to_decimal(state['price_per_kg']),
+        'total_investment': sign * to_decimal(state['investment_cost']),
+    }
+    return {key: measures for key in dimension_keys(state)}
+
+
+def apply_crop_change(old_state=None, new_state=None):
+    """Move a crop's contribution from ``old_state`` to ``new_state``.
+
+    Pass ``old_state=None`` for a new crop and ``new_state=None`` for a
+    deleted one.
+    """
+    deltas = defaultdict(lambda: dict.fromkeys(MEASURES, 0))
+    for state, sign in ((old_state, -1), (new_state, 1)):
+        if state is None:
+            continue
+        for key, measures in contributions(state, sign).items():
+            for measure, amount in measures.items():
+                deltas[key][measure] += amount
+
+    with transaction.atomic():
+        for (dimension, key), delta in deltas.items():
+            if not any(delta.values()):
+                continue
+            AnalyticsSnapshot.objects.get_or_create(dimension=dimension, key=key)
+            AnalyticsSnapshot.objects.filter(dimension=dimension, key=key).update(
+                **{measure: F(measure) + amount for measure, amount in delta.items()}
+            )
+        AnalyticsSnapshot.objects.filter(crop_count__lte=0).exclude(dimension='total').delete()
+
+
+def rebuild_snapshots():
+    """Recompute every snapshot row from the Crop table with grouped aggregates"""
+    measures = {
+        'crop_count': Count('id'),
+        'total_quantity': Sum('quantity'),
+        'total_value': Sum(CropQuerySet.value_expression()),
+        'total_investment': Sum('investment_cost'),
+    }
+    groupings = [
+        ('day', TruncDate('created_at')),
+        ('month', TruncMonth('created_at')),
+        ('season', F('season')),
+        ('category', F('category_id')),
+    ]
+
+    rows = [AnalyticsSnapshot(dimension='total', key='', **snapshot_measures(Crop.objects.aggregate(**measures)))]
+    for dimension, expression in groupings:
+        for group in Crop.objects.annotate(group=expression).values('group').annotate(**measures).order_by():
+            key = group.pop('group')
+            if isinstance(key, datetime):
+                key = key.date()
+            if isinstance(key, date):
+                key = key.isoformat()
+            rows.append(AnalyticsSnapshot(dimension=dimension, key=str(key or ''), **snapshot_measures(group)))
+
+    with transaction.atomic():
+        AnalyticsSnapshot.objects.all().delete()
+        AnalyticsSnapshot.objects.bulk_create(rows)
+    return len(rows)
+
+
+def snapshot_measures(values):
+    return {measure: values[measure] or 0 for measure in MEASURES}
+
+
+def dashboard_summary():
+    """Totals, monthly series and season distribution read from the snapshot"""
+    snapshots = list(AnalyticsSnapshot.objects.filter(dimension__in=['total', 'month', 'season']))
+    total = next((row for row in snapshots if row.dimension == 'total'), None) or AnalyticsSnapshot()
+    return {
+        'total_crops': total.crop_count,
+        'total_investment': total.total_investment,
+        'total_revenue': total.total_value,
+        'total_profit': total.total_profit,
+        'monthly_data': [
+            {'month': date.fromisoformat(row.key), 'count': row.crop_count, 'revenue': row.total_quantity}
+            for row in snapshots if row.dimension == 'month'
+        ],
+        'crop_distribution': [
+            {'season': row.key, 'count': row.crop_count, 'total_value': row.total_quantity}
+            for row in snapshots if row.dimension == 'season'
+        ],
+    }
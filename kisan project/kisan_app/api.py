@@ -0,0 +1,319 @@
+"""Read-only JSON API, version 1.
+
+Every resource is a keyset-paginated list built from ``.values()`` rows, so
+no model instances are created. Clients can ask for a subset of fields
+with ``?fields=id,name``, filter with the parameters listed for each
+resource and follow ``next_cursor`` with ``?cursor=``.
+
+``prices/history/`` serves daily or weekly OHLC series per mandi from the
+PriceRollup table (see ``price_history.py``), and ``weather/history/``
+hourly or daily weather aggregates of a location from WeatherRollup (see
+``weather.py``).
+
+Response bodies are cached by model version (see ``cache.py``) together
+with a strong ETag of the body. A poll that sends the ETag back in
+``If-None-Match`` gets a 304 from one cache lookup, without touching the
+database.
+"""
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags, quote_etag
+from django.views.decorators.http import require_safe
+
+from .cache import cached_fragment
+from .models import Farmer, Crop, MarketPrice, WeatherData, Notification
+from .pagination import InvalidCursor, KeysetPaginator, get_page_size
+from .price_history import RESOLUTIONS, default_range, price_history
+from . import weather
+
+API_VERSION = 'v1'
+
+
+class APIError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Resource:
+    model: type
+    # Field name -> None for a column, or an expression to select under that name
+    fields: dict
+    default_fields: list
+    # Sort option -> keyset ordering; the first one is the default
+    orderings: dict
+    # Query parameter -> lookup
+    filters: dict = field(default_factory=dict)
+    # Field name -> queryset method that annotates it
+    annotations: dict = field(default_factory=dict)
+    # Models whose writes change the response
+    depends_on: tuple = ()
+
+
+RESOURCES = {
+    'farmers': Resource(
+        model=Farmer,
+        fields=dict.fromkeys([
+            'id', 'name', 'phone', 'email', 'address', 'experience_years', 'land_area',
+            'created_at', 'updated_at', 'crop_count', 'total_value', 'upcoming_count',
+        ]),
+        default_fields=['id', 'name', 'phone', 'experience_years', 'land_area', 'created_at'],
+        orderings={'-created_at': ('-created_at', '-id'), 'name': ('name', 'id')},
+        filters={'id': 'id', 'min_experience': 'experience_years__gte', 'max_experience': 'experience_years__lt'},
+        annotations=dict.fromkeys(['crop_count', 'total_value', 'upcoming_count'], 'with_rollups'),
+        depends_on=(Farmer, Crop),
+    ),
+    'crops': Resource(
+        model=Crop,
+        fields={
+            **dict.fromkeys([
+                'id', 'name', 'farmer_id', 'category_id', 'season', 'status', 'price_per_kg', 'quantity',
+                'investment_cost', 'planted_date', 'harvest_date', 'actual_harvest_date', 'created_at',
+                'value_amount', 'profit_amount', 'margin_percent',
+            ]),
+            'farmer_name': F('farmer__name'),
+        },
+        default_fields=['id', 'name', 'farmer_id', 'season', 'status', 'price_per_kg', 'quantity', 'harvest_date'],
+        orderings={'harvest_date': ('harvest_date', 'id'), '-created_at': ('-created_at', '-id')},
+        filters={'id': 'id', 'farmer': 'farmer_id', 'season': 'season', 'status': 'status', 'name': 'name__iexact',
+                 'harvest_after': 'harvest_date__gte', 'harvest_before': 'harvest_date__lte'},
+        annotations=dict.fromkeys(['value_amount', 'profit_amount', 'margin_percent'], 'with_financials'),
+        depends_on=(Crop, Farmer),
+    ),
+    'prices': Resource(
+        model=MarketPrice,
+        fields=dict.fromkeys(['id', 'crop_name', 'market_location', 'price_per_kg', 'date_recorded', 'source']),
+        default_fields=['id', 'crop_name', 'market_location', 'price_per_kg', 'date_recorded'],
+        orderings={'-date_recorded': ('-date_recorded', '-id')},
+        filters={'id': 'id', 'crop': 'crop_name__iexact', 'market': 'market_location__iexact',
+                 'since': 'date_recorded__gte', 'until': 'date_recorded__lte'},
+        depends_on=(MarketPrice,),
+    ),
+    'weather': Resource(
+        model=WeatherData,
+        fields=dict.fromkeys([
+            'id', 'location', 'temperature', 'humidity', 'rainfall', 'weather_condition', 'date_recorded',
+        ]),
+        default_fields=['id', 'location', 'temperature', 'humidity', 'rainfall', 'weather_condition', 'date_recorded'],
+        orderings={'-date_recorded': ('-date_recorded', '-id')},
+        filters={'id': 'id', 'location': 'location__iexact', 'since': 'date_recorded__gte'},
+        depends_on=(WeatherData,),
+    ),
+    'notifications': Resource(
+        model=Notification,
+        fields=dict.fromkeys(['id', 'farmer_id', 'title', 'message', 'notification_type', 'is_read', 'created_at']),
+        default_fields=['id', 'farmer_id', 'title', 'notification_type', 'is_read', 'created_at'],
+        orderings={'-created_at': ('-created_at', '-id')},
+        filters={'id': 'id', 'farmer': 'farmer_id', 'type': 'notification_type', 'is_read': 'is_read'},
+        depends_on=(Notification,),
+    ),
+}
+
+
+def selected_fields(resource, requested):
+    if not requested:
+        return list(resource.default_fields)
+    fields = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in resource.fields]
+    if unknown:
+        raise APIError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(fields))
+
+
+def parse_filter(lookup, value):
+    if lookup == 'is_read':
+        if value.lower() not in ('true', 'false', '1', '0'):
+            raise APIError(f"is_read must be true or false, not {value!r}")
+        return value.lower() in ('true', '1')
+    return value
+
+
+def list_payload(resource, params, per_page):
+    """One page of ``resource`` as a JSON-ready dict"""
+    fields = selected_fields(resource, params.get('fields'))
+    sort = params.get('sort') or next(iter(resource.orderings))
+    if sort not in resource.orderings:
+        raise APIError(f"sort must be one of: {', '.join(resource.orderings)}")
+    ordering = resource.orderings[sort]
+
+    queryset = resource.model.objects.all()
+    try:
+        queryset = queryset.filter(**{
+            lookup: parse_filter(lookup, params[name])
+            for name, lookup in resource.filters.items() if name in params
+        })
+    except (ValueError, ValidationError) as exc:
+        raise APIError(f"Invalid filter value: {exc}")
+
+    # Ordering fields are selected too, since the cursor is read from the last row
+    selected = list(dict.fromkeys(fields + [name.lstrip('-') for name in ordering]))
+    for method in dict.fromkeys(resource.annotations[name] for name in selected if name in resource.annotations):
+        queryset = getattr(queryset, method)()
+    columns = [name for name in selected if resource.fields[name] is None]
+    expressions = {name: resource.fields[name] for name in selected if resource.fields[name] is not None}
+
+    paginator = KeysetPaginator(queryset.values(*columns, **expressions), ordering, per_page)
+    try:
+        page = paginator.page(params.get('cursor'))
+    except InvalidCursor:
+        raise APIError("Invalid cursor")
+    except (ValueError, ValidationError) as exc:
+        raise APIError(f"Invalid filter value: {exc}")
+    return {
+        'results': [{name: row[name] for name in fields} for row in page],
+        'next_cursor': page.next_cursor,
+        'has_next': page.has_next,
+    }
+
+
+def build_body(payload):
+    body = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    return quote_etag(hashlib.sha256(body).hexdigest()[:32]), body
+
+
+def cached_json_response(request, name, models, build):
+    """Serve ``build()`` as JSON, cached by model version, with ETag revalidation"""
+    try:
+        etag, body = cached_fragment(
+            f'api:{name}', models, lambda: build_body(build()), vary=request.GET.urlencode(),
+        )
+    except APIError as exc:
+        return JsonResponse({'error': str(exc)}, status=exc.status)
+
+    client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in client_etags or '*' in client_etags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    # Clients may keep the body but must revalidate it on every poll
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+@require_safe
+def resource_list(request, resource):
+    """Paginated, filterable list of one API resource"""
+    definition = RESOURCES[resource]
+    return cached_json_response(
+        request, resource, definition.depends_on,
+        lambda: list_payload(definition, request.GET, get_page_size(request)),
+    )
+
+
+def parse_date(params, name):
+    value = params.get(name)
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        raise APIError(f"{name} must be a YYYY-MM-DD date")
+
+
+def history_payload(params):
+    crop = params.get('crop', '').strip()
+    if not crop:
+        raise APIError("crop is required")
+    resolution = params.get('resolution', 'day')
+    if resolution not in RESOLUTIONS:
+        raise APIError(f"resolution must be one of: {', '.join(RESOLUTIONS)}")
+    start, end = default_range(resolution, parse_date(params, 'end'))
+    start = parse_date(params, 'start') or start
+    markets = params.getlist('market')
+    return {
+        'crop': crop,
+        'resolution': resolution,
+        'start': start,
+        'end': end,
+        'series': price_history(crop, markets, resolution, start, end),
+    }
+
+
+@require_safe
+def price_history_view(request):
+    """OHLC and mean price series of a crop per mandi from the rollup tables.
+
+    ``?crop=`` is required; ``market`` may be repeated, ``resolution`` is
+    day or week and ``start``/``end`` default to the last 90 days or 52 weeks.
+    """
+    return cached_json_response(request, 'price_history', (MarketPrice,), lambda: history_payload(request.GET))
+
+
+def parse_moment(params, name):
+    """A datetime, or a date meaning its midnight, in the current time zone"""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value) or datetime.combine(date.fromisoformat(value), time())
+    except ValueError:
+        raise APIError(f"{name} must be a YYYY-MM-DD date or an ISO 8601 datetime")
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def weather_history_payload(params):
+    location = params.get('location', '').strip()
+    if not location:
+        raise APIError("location is required")
+    resolution = params.get('resolution', 'day')
+    if resolution not in weather.RESOLUTIONS:
+        raise APIError(f"resolution must be one of: {', '.join(weather.RESOLUTIONS)}")
+    start, end = weather.default_range(resolution, parse_moment(params, 'end'))
+    start = parse_moment(params, 'start') or start
+    return {
+        'location': location,
+        'resolution': resolution,
+        'start': start,
+        'end': end,
+        'points': weather.weather_history(location, resolution, start, end),
+    }
+
+
+@require_safe
+def weather_history_view(request):
+    """Hourly or daily temperature, humidity and rainfall of one location from the rollup table.
+
+    ``?location=`` is required; ``resolution`` is hour or day and
+    ``start``/``end`` default to the last 48 hours or 30 days.
+    """
+    return cached_json_response(
+        request, 'weather_history', (WeatherData,), lambda: weather_history_payload(request.GET),
+    )
+
+
+@require_safe
+def index(request):
+    """Available resources with their fields, filters and sort options"""
+    return JsonResponse({
+        'version': API_VERSION,
+        'resources': {
+            name: {
+                'url': reverse(f'kisan_app:api_{name}'),
+                'fields': list(resource.fields),
+                'default_fields': resource.default_fields,
+                'filters': list(resource.filters),
+                'sort': list(resource.orderings),
+            }
+            for name, resource in RESOURCES.items()
+        },
+        'price_history': {
+            'url': reverse('kisan_app:api_price_history'),
+            'filters': ['crop', 'market', 'resolution', 'start', 'end'],
+            'resolutions': RESOLUTIONS,
+        },
+        'weather_history': {
+            'url': reverse('kisan_app:api_weather_history'),
+            'filters': ['location', 'resolution', 'start', 'end'],
+            'resolutions': weather.RESOLUTIONS,
+        },
+    })
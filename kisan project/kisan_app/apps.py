@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class KisanAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'kisan_app'
\ No newline at end of file
+    name = 'kisan_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,157 @@
+"""Per-view query counts, SQL time, template time and latency.
+
+``page_requests`` lists a GET for every route in ``urls.py`` plus the
+common filter, search and JSON variants; ``profile_request`` runs one of
+them repeatedly through the test client. Budgets live in
+``perf_budgets.json`` at the project root: a query count per route, which
+must not grow with the data, and a p95 latency per dataset size. The
+``benchmark_views.py`` script and the test suite both check against it.
+"""
+import json
+import math
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.template.backends.django import Template
+from django.urls import reverse
+
+from . import urls
+
+BUDGETS_PATH = settings.BASE_DIR / 'perf_budgets.json'
+
+# Query strings measured for each route in addition to the bare URL
+VARIANTS = {
+    'farmers_list': ['search=patil', 'experience=expert', 'format=json'],
+    'crops_list': ['season=Rabi', 'status=Growing', 'sort=value', 'search=wheat', 'format=json'],
+    'price_calculator': ['format=json'],
+    'weather_info': ['format=json'],
+    'notifications': ['format=json'],
+    'api_farmers': ['fields=id,name,crop_count,total_value'],
+    'api_crops': ['season=Rabi&fields=id,name,farmer_name,value_amount', 'sort=-created_at'],
+    'api_prices': ['crop=Wheat'],
+    'api_price_history': ['crop=Wheat&resolution=week', 'crop=Wheat&market=Pune Market'],
+}
+# Query strings for routes that cannot be requested bare
+REQUIRED_QUERY = {
+    'api_price_history': 'crop=Wheat',
+    'api_weather_history': 'location=Pune',
+    'price_alerts': 'farmer={farmer_id}',
+}
+
+
+def page_requests(farmer_id):
+    """(route name, url) for every route, with path arguments filled from ``farmer_id``"""
+    requests = []
+    for pattern in urls.urlpatterns:
+        name = pattern.name
+        kwargs = {key: farmer_id for key in pattern.pattern.converters}
+        url = reverse(f'{urls.app_name}:{name}', kwargs=kwargs)
+        required = REQUIRED_QUERY.get(name, '').format(farmer_id=farmer_id)
+        requests.append((name, f'{url}?{required}' if required else url))
+        requests.extend((name, f'{url}?{query}') for query in VARIANTS.get(name, []))
+    return requests
+
+
+class QueryTimer:
+    """Database execute wrapper counting queries and their wall time"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+@contextmanager
+def template_timer(timings):
+    """Record the wall time of every top-level template render"""
+    original = Template.render
+
+    def render(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(self, *args, **kwargs)
+        finally:
+            timings.append(time.perf_counter() - start)
+
+    Template.render = render
+    try:
+        yield timings
+    finally:
+        Template.render = original
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def profile_request(client, url, repeat=10, warm_cache=False):
+    """Request ``url`` ``repeat`` times and summarise the timings in milliseconds.
+
+    The cache is cleared before each run unless ``warm_cache`` is set, so
+    the numbers describe the view itself rather than a cache hit. Queries
+    run lazily from templates count towards both SQL and template time.
+    """
+    latencies, sql, render, queries = [], [], [], []
+    status = size = None
+    for _ in range(repeat):
+        if not warm_cache:
+            cache.clear()
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer), template_timer([]) as templates:
+            start = time.perf_counter()
+            response = client.get(url)
+            latencies.append((time.perf_counter() - start) * 1000)
+        status, size = response.status_code, len(response.content)
+        queries.append(timer.count)
+        sql.append(timer.seconds * 1000)
+        render.append(sum(templates) * 1000)
+    return {
+        'status': status,
+        'bytes': size,
+        'queries': max(queries),
+        'sql_ms': round(statistics.median(sql), 2),
+        'render_ms': round(statistics.median(render), 2),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+    }
+
+
+def load_budgets(path=BUDGETS_PATH):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def latency_budget(budget, dataset_size):
+    """The p95 budget for the largest configured size not above ``dataset_size``"""
+    sizes = sorted(int(size) for size in budget.get('p95_ms', {}))
+    eligible = [size for size in sizes if size <= dataset_size] or sizes[:1]
+    return budget['p95_ms'][str(eligible[-1])] if eligible else None
+
+
+def budget_violations(name, url, result, budgets, dataset_size=None):
+    """Messages for every way ``result`` breaks the budget of route ``name``"""
+    budget = budgets['routes'].get(name, budgets['default'])
+    if 'skip' in budget:
+        return []
+    problems = []
+    if result['status'] != 200:
+        problems.append(f"{url}: status {result['status']}")
+    if result['queries'] > budget['max_queries']:
+        problems.append(f"{url}: {result['queries']} queries (budget {budget['max_queries']})")
+    limit = latency_budget(budget, dataset_size) if dataset_size is not None else None
+    if limit is not None and result['p95_ms'] > limit:
+        problems.append(f"{url}: p95 {result['p95_ms']:.1f}ms (budget {limit}ms at {dataset_size:,} crops)")
+    return problems
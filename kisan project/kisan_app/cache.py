@@ -0,0 +1,159 @@
+"""Response and fragment caching invalidated by per-model version tokens.
+
+Every cached model has a version in the cache that the signal handlers in
+``signals.py`` bump on save and delete. Cache keys embed the versions of
+the models a fragment or page was built from, so a write makes the old
+entries unreachable without having to know which keys to delete. A bump
+stores a new random token rather than incrementing a counter: ``incr`` is a
+get-then-set on the file and database caches, so two concurrent writes
+could both store N+1 and lose one of the bumps.
+
+Writes that skip signals (``QuerySet.update``, ``bulk_create``) must call
+``bump_version`` themselves.
+
+Pages built from a read replica (see ``routing.py``) are not stored
+until ``KISAN_REPLICA_LAG`` seconds after the last write, since the replica
+may not have that write yet and the entry would outlive the lag.
+
+The backend is chosen with ``KISAN_CACHE_BACKEND`` in settings. Local
+memory, the development default, keeps separate version counters in each
+process, so production uses the file or database cache that all workers
+share. With ``KISAN_CACHE_STATS`` on, hit and miss counts per fragment are
+kept in the cache and served by the ``cache_stats`` view; each costs a few
+cache round trips per request, so production leaves them off.
+"""
+import asyncio
+import time
+import uuid
+from datetime import date
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .routing import reading_from_replica, replicas
+
+KEY_PREFIX = 'kisan'
+STATS_KEY = f'{KEY_PREFIX}:stats:names'
+LAST_WRITE_KEY = f'{KEY_PREFIX}:last-write'
+
+
+def version_key(model):
+    return f'{KEY_PREFIX}:version:{model._meta.label_lower}'
+
+
+def bump_version(model):
+    cache.set(version_key(model), uuid.uuid4().hex, timeout=None)
+    if replicas():
+        cache.set(LAST_WRITE_KEY, time.time(), timeout=None)
+
+
+def cacheable():
+    """False while the replica this request reads from may still miss the last write"""
+    if not reading_from_replica():
+        return True
+    return time.time() - cache.get(LAST_WRITE_KEY, 0) >= settings.KISAN_REPLICA_LAG
+
+
+def model_versions(models):
+    keys = [version_key(model) for model in models]
+    found = cache.get_many(keys)
+    return [str(found.get(key, 1)) for key in keys]
+
+
+def record(name, outcome):
+    if not settings.KISAN_CACHE_STATS:
+        return
+    key = f'{KEY_PREFIX}:stats:{name}:{outcome}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+    names = cache.get(STATS_KEY, set())
+    if name not in names:
+        cache.set(STATS_KEY, names | {name}, timeout=None)
+
+
+def cache_stats():
+    """Hit and miss counts for every fragment and view seen so far"""
+    names = sorted(cache.get(STATS_KEY, set()))
+    keys = [f'{KEY_PREFIX}:stats:{name}:{outcome}' for name in names for outcome in ('hit', 'miss')]
+    counts = cache.get_many(keys)
+    return {
+        name: {
+            'hits': counts.get(f'{KEY_PREFIX}:stats:{name}:hit', 0),
+            'misses': counts.get(f'{KEY_PREFIX}:stats:{name}:miss', 0),
+        }
+        for name in names
+    }
+
+
+def fragment_key(name, models, vary=''):
+    # The date is part of the key because "upcoming" and "overdue" widgets
+    # change at midnight without any write
+    versions = '.'.join(model_versions(models))
+    return f'{KEY_PREFIX}:fragment:{name}:{versions}:{date.today().isoformat()}:{vary}'
+
+
+def cached_fragment(name, models, build, vary='', timeout=None):
+    """Return the cached result of ``build()`` for the current model versions"""
+    key = fragment_key(name, models, vary)
+    value = cache.get(key)
+    if value is not None:
+        record(name, 'hit')
+        return value
+    record(name, 'miss')
+    value = build()
+    if cacheable():
+        cache.set(key, value, timeout or settings.KISAN_CACHE_TIMEOUT)
+    return value
+
+
+def cache_response(*models, timeout=None):
+    """Cache a view's successful GET responses until one of ``models`` changes.
+
+    Only for pages without per-user content or CSRF tokens. Visitors who
+    follow a farmer see that farmer's unread badge, so they bypass the cache.
+    Works on sync and async views.
+    """
+    def decorator(view):
+        name = f'view:{view.__name__}'
+
+        def lookup(request):
+            """The cache key and cached response; no key when the request bypasses the cache"""
+            from .notifications import current_farmer_id
+
+            if request.method not in ('GET', 'HEAD') or current_farmer_id(request) is not None:
+                return None, None
+            key = fragment_key(name, models, request.get_full_path())
+            response = cache.get(key)
+            record(name, 'miss' if response is None else 'hit')
+            return key, response
+
+        def store(key, response):
+            if key and response.status_code == 200 and not response.streaming and cacheable():
+                if hasattr(response, 'render') and callable(response.render):
+                    response.render()
+                cache.set(key, response, timeout or settings.KISAN_CACHE_TIMEOUT)
+
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                key, response = await sync_to_async(lookup)(request)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                    await sync_to_async(store)(key, response)
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key, response = lookup(request)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                store(key, response)
+            return response
+        return wrapper
+    return decorator
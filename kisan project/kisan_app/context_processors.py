@@ -0,0 +1,11 @@
+from django.utils.functional import SimpleLazyObject
+
+from .notifications import current_farmer_id, unread_count
+
+
+def unread_notifications(request):
+    """The current farmer's unread count for the nav badge, looked up only if rendered"""
+    def badge():
+        farmer_id = current_farmer_id(request)
+        return unread_count(farmer_id) if farmer_id is not None else None
+    return {'unread_badge': SimpleLazyObject(badge)}
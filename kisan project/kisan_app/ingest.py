@@ -0,0 +1,268 @@
+"""Streaming bulk ingestion of mandi price dumps and weather station readings.
+
+Records are read lazily from CSV or JSON Lines, validated and de-duplicated
+one chunk at a time and written with a single multi-row upsert per chunk,
+so memory use depends on the batch size rather than the file size. Only
+the first and last date written for each (crop, mandi) pair is kept across
+batches; the price rollups for those spans are refreshed once at the end,
+then farmers' price alert rules are evaluated against the new prices.
+Weather readings are upserted on (location, date_recorded) the same way,
+keeping the first and last reading time per location, followed by one
+refresh of the weather rollups and latest readings over those spans.
+"""
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .alerts import evaluate_price_alerts
+from .cache import bump_version
+from .models import MarketPrice, WeatherData, normalize_key
+from .price_history import refresh_for_prices
+from .weather import refresh_for_readings
+
+DEFAULT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 20
+
+PRICE_FIELDS = ['crop_name', 'market_location', 'price_per_kg', 'date_recorded', 'source']
+PRICE_KEY = ['crop_name', 'market_location', 'date_recorded']
+PRICE_UPDATE_FIELDS = ['price_per_kg', 'source']
+
+READING_KEY = ['location', 'date_recorded']
+READING_UPDATE_FIELDS = ['temperature', 'humidity', 'rainfall', 'weather_condition']
+
+
+class RecordError(ValueError):
+    """A single input row that failed validation"""
+
+
+class Spans(dict):
+    """group -> (first, last) value seen, e.g. the dates written for each (crop, mandi) pair"""
+
+    def add(self, group, value):
+        first, last = self.get(group, (value, value))
+        self[group] = (min(first, value), max(last, value))
+
+
+@dataclass
+class IngestStats:
+    rows_read: int = 0
+    rows_written: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    batches: int = 0
+    alerts: int = 0
+    errors: list = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows_read / self.elapsed if self.elapsed else 0.0
+
+    def add_error(self, line_number, error):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line_number}: {error}")
+
+
+def read_records(stream, fmt):
+    """Yield (line_number, dict) pairs from a CSV or JSONL text stream"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield line_number, RecordError(f"invalid JSON ({exc.msg})")
+                continue
+            yield line_number, record
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def clean_text(record, name, max_length):
+    value = str(record.get(name) or '').strip()
+    if not value:
+        raise RecordError(f"{name} is required")
+    if len(value) > max_length:
+        raise RecordError(f"{name} is longer than {max_length} characters")
+    return value
+
+
+def clean_price(record, default_source):
+    """Validate one raw record and return a MarketPrice instance"""
+    if isinstance(record, RecordError):
+        raise record
+    if not isinstance(record, dict):
+        raise RecordError("expected an object")
+    try:
+        price = Decimal(str(record.get('price_per_kg', '')).strip()).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise RecordError(f"invalid price_per_kg {record.get('price_per_kg')!r}")
+    # NaN survives quantize() but cannot be compared or stored
+    if not price.is_finite():
+        raise RecordError(f"invalid price_per_kg {record.get('price_per_kg')!r}")
+    if price <= 0 or price >= Decimal('1e8'):
+        raise RecordError(f"price_per_kg out of range: {price}")
+    raw_date = record.get('date_recorded')
+    try:
+        recorded = date.fromisoformat(str(raw_date).strip()) if raw_date else date.today()
+    except ValueError:
+        raise RecordError(f"invalid date_recorded {raw_date!r}")
+    return MarketPrice(
+        crop_name=clean_text(record, 'crop_name', 100),
+        market_location=clean_text(record, 'market_location', 100),
+        price_per_kg=price,
+        date_recorded=recorded,
+        source=str(record.get('source') or default_source).strip()[:100],
+    )
+
+
+def write_prices(prices):
+    """Upsert a batch of prices on (crop_name, market_location, date_recorded)"""
+    with transaction.atomic():
+        MarketPrice.objects.bulk_create(
+            prices,
+            update_conflicts=True,
+            unique_fields=PRICE_KEY,
+            update_fields=PRICE_UPDATE_FIELDS,
+        )
+
+
+def ingest_batches(records, clean, key, span, write, batch_size, dry_run, on_batch):
+    """Validate, de-duplicate on ``key`` and ``write`` (line_number, record) pairs in batches.
+
+    Returns the stats and the Spans of the rows written, grouped by ``span(row)``,
+    which returns a (group, value) pair.
+    """
+    stats = IngestStats()
+    written = Spans()
+    for chunk in chunked(records, batch_size):
+        batch = {}
+        for line_number, record in chunk:
+            stats.rows_read += 1
+            try:
+                row = clean(record)
+            except RecordError as exc:
+                stats.add_error(line_number, exc)
+                continue
+            row_key = key(row)
+            if row_key in batch:
+                stats.duplicates += 1
+            # Later rows in the dump win, as they would with sequential upserts
+            batch[row_key] = row
+        if batch and not dry_run:
+            write(list(batch.values()))
+            for row in batch.values():
+                written.add(*span(row))
+        stats.rows_written += len(batch)
+        stats.batches += 1
+        if on_batch:
+            on_batch(stats)
+    return stats, written
+
+
+def import_market_prices(records, batch_size=DEFAULT_BATCH_SIZE, default_source='Bulk Import',
+                         dry_run=False, on_batch=None):
+    """Validate, de-duplicate and upsert (line_number, record) pairs in batches"""
+    stats, written = ingest_batches(
+        records,
+        lambda record: clean_price(record, default_source),
+        lambda price: (price.crop_name, price.market_location, price.date_recorded),
+        lambda price: ((normalize_key(price.crop_name), normalize_key(price.market_location)), price.date_recorded),
+        write_prices, batch_size, dry_run, on_batch,
+    )
+    if written:
+        refreshed_at = timezone.now()
+        refresh_for_prices(written)
+        bump_version(MarketPrice)
+        stats.alerts = evaluate_price_alerts(since=refreshed_at).notifications
+    return stats
+
+
+def clean_number(record, name, low, high, default=None):
+    raw = record.get(name)
+    if raw in (None, '') and default is not None:
+        return default
+    try:
+        value = float(str(raw).strip())
+    except ValueError:
+        raise RecordError(f"invalid {name} {raw!r}")
+    if not low <= value <= high:
+        raise RecordError(f"{name} out of range: {value}")
+    return value
+
+
+def clean_reading(record):
+    """Validate one raw record and return a WeatherData instance"""
+    if isinstance(record, RecordError):
+        raise record
+    if not isinstance(record, dict):
+        raise RecordError("expected an object")
+    raw_time = record.get('date_recorded')
+    try:
+        recorded = parse_datetime(str(raw_time).strip()) if raw_time else None
+    except ValueError:
+        recorded = None
+    if recorded is None:
+        raise RecordError(f"invalid date_recorded {raw_time!r}")
+    if timezone.is_naive(recorded):
+        recorded = timezone.make_aware(recorded)
+    return WeatherData(
+        location=clean_text(record, 'location', 100),
+        temperature=clean_number(record, 'temperature', -60, 60),
+        humidity=clean_number(record, 'humidity', 0, 100),
+        rainfall=clean_number(record, 'rainfall', 0, 2000, default=0.0),
+        weather_condition=clean_text(record, 'weather_condition', 50),
+        date_recorded=recorded,
+    )
+
+
+def write_readings(readings):
+    """Upsert a batch of readings on (location, date_recorded)"""
+    with transaction.atomic():
+        WeatherData.objects.bulk_create(
+            readings,
+            update_conflicts=True,
+            unique_fields=READING_KEY,
+            update_fields=READING_UPDATE_FIELDS,
+        )
+
+
+def import_weather_readings(records, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, on_batch=None):
+    """Validate, de-duplicate and upsert weather (line_number, record) pairs in batches"""
+    stats, written = ingest_batches(
+        records, clean_reading, lambda reading: (reading.location, reading.date_recorded),
+        lambda reading: (reading.location, reading.date_recorded),
+        write_readings, batch_size, dry_run, on_batch,
+    )
+    if written:
+        refresh_for_readings(written)
+        bump_version(WeatherData)
+    return stats
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from kisan_app.retention import DEFAULT_BATCH_SIZE, RETAINED, archive_old_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Move notifications, weather readings and market prices older than their KISAN_RETENTION "
+        "period into the archive table, or gzipped JSON Lines files, in short batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='+', choices=list(RETAINED), help="tables to archive (default: all)")
+        parser.add_argument('--days', type=int, help="override the configured retention period")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=0.0, help="seconds to sleep between batches")
+        parser.add_argument('--jsonl', metavar='DIR', help="write gzipped JSON Lines files to DIR instead")
+        parser.add_argument('--dry-run', action='store_true', help="count the rows that would be archived")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+        if options['days'] is not None and options['days'] < 0:
+            raise CommandError("--days must not be negative")
+        verb = "Would archive" if options['dry_run'] else "Archived"
+        for name in options['only'] or RETAINED:
+            moved = archive_old_rows(
+                name, days=options['days'], batch_size=options['batch_size'], archive_dir=options['jsonl'],
+                pause=options['pause'], dry_run=options['dry_run'],
+            )
+            self.stdout.write(self.style.SUCCESS(f"{verb} {moved} {name} rows"))
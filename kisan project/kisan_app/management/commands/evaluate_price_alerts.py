@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from kisan_app.alerts import evaluate_price_alerts
+
+
+class Command(BaseCommand):
+    help = (
+        "Match active price alert rules against the latest price at every mandi and notify "
+        "farmers of thresholds crossed by prices they have not been alerted about"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since-hours', type=float,
+                            help="only consider latest prices refreshed in the last N hours")
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since_hours'] is not None:
+            if options['since_hours'] <= 0:
+                raise CommandError("--since-hours must be positive")
+            since = timezone.now() - timedelta(hours=options['since_hours'])
+        stats = evaluate_price_alerts(since)
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats.rules_matched} rules matched, {stats.notifications} price alerts sent"
+        ))
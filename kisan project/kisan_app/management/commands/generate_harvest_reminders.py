@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kisan_app.reminders import generate_harvest_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        "Send harvest reminders for crops entering the 7, 3 or 1 day window before harvest "
+        "or becoming overdue; safe to run repeatedly, e.g. daily from cron"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="evaluate as of this date (YYYY-MM-DD, default today)")
+
+    def handle(self, *args, **options):
+        try:
+            today = date.fromisoformat(options['date']) if options['date'] else None
+        except ValueError as exc:
+            raise CommandError(f"Invalid date: {exc}")
+        counts = generate_harvest_reminders(today)
+        detail = ', '.join(f"{count} {window}" for window, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Sent {sum(counts.values())} harvest reminders ({detail})"))
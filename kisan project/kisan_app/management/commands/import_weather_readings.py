@@ -0,0 +1,60 @@
+import io
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kisan_app.ingest import DEFAULT_BATCH_SIZE, import_weather_readings, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream weather station readings from a CSV or JSON Lines file (or '-' for stdin), upsert them "
+        "on (location, date_recorded) and refresh the hourly/daily rollups and latest readings"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="file to import, or '-' to read stdin")
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help="input format (default: from the file extension, csv for stdin)")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="validate without writing")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        if path == '-':
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        else:
+            try:
+                stream = open(path, encoding='utf-8-sig', newline='')
+            except OSError as exc:
+                raise CommandError(f"Cannot open {path}: {exc}")
+
+        def report(stats):
+            if options['verbosity'] >= 2:
+                self.stdout.write(
+                    f"  batch {stats.batches}: {stats.rows_read} rows read, "
+                    f"{stats.rows_per_second:,.0f} rows/sec"
+                )
+
+        with stream:
+            stats = import_weather_readings(
+                read_records(stream, fmt),
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+                on_batch=report,
+            )
+
+        for error in stats.errors:
+            self.stderr.write(error)
+        if stats.invalid > len(stats.errors):
+            self.stderr.write(f"... and {stats.invalid - len(stats.errors)} more invalid rows")
+        verb = "Validated" if options['dry_run'] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats.rows_written} readings from {stats.rows_read} rows "
+            f"({stats.duplicates} duplicates, {stats.invalid} invalid) "
+            f"in {stats.elapsed:.1f}s - {stats.rows_per_second:,.0f} rows/sec"
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from kisan_app.analytics import rebuild_snapshots
+
+
+class Command(BaseCommand):
+    help = "Rebuild the AnalyticsSnapshot table from all crops (run after bulk imports)"
+
+    def handle(self, *args, **options):
+        rows = rebuild_snapshots()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} analytics snapshot rows"))
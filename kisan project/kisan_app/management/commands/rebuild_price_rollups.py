@@ -0,0 +1,31 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kisan_app.cache import bump_version
+from kisan_app.models import MarketPrice
+from kisan_app.price_history import refresh_latest_prices, refresh_price_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute daily and weekly PriceRollup rows from MarketPrice (all dates unless --since/--until) "
+        "and the LatestMarketPrice table"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="first date to recompute (YYYY-MM-DD)")
+        parser.add_argument('--until', help="last date to recompute (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        try:
+            since = date.fromisoformat(options['since']) if options['since'] else None
+            until = date.fromisoformat(options['until']) if options['until'] else None
+        except ValueError as exc:
+            raise CommandError(f"Invalid date: {exc}")
+        days, weeks = refresh_price_rollups(since, until)
+        latest = refresh_latest_prices()
+        bump_version(MarketPrice)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {days} daily and {weeks} weekly price rollups and {latest} latest prices"
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from kisan_app.cache import bump_version
+from kisan_app.models import WeatherData
+from kisan_app.weather import refresh_latest_weather, refresh_weather_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute hourly and daily WeatherRollup rows and the LatestWeather table from WeatherData"
+
+    def handle(self, *args, **options):
+        hours, days = refresh_weather_rollups()
+        latest = refresh_latest_weather()
+        bump_version(WeatherData)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {hours} hourly and {days} daily weather rollups and {latest} latest readings"
+        ))
@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from kisan_app.seeding import clear_data, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate farmers, crops, notifications, mandi price histories and weather series with bulk inserts "
+        "for load testing. The same --seed always produces the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farmers', type=int, default=1000)
+        parser.add_argument('--crops', type=int, default=10000)
+        parser.add_argument('--notifications', type=int, default=0)
+        parser.add_argument('--price-days', type=int, default=90,
+                            help="days of daily prices for every crop and market (0 to skip)")
+        parser.add_argument('--weather-days', type=int, default=30,
+                            help="days of readings for every location (0 to skip)")
+        parser.add_argument('--weather-interval', type=int, default=3, help="hours between weather readings")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--workers', type=int, default=1,
+                            help="processes inserting chunks in parallel (PostgreSQL only)")
+        parser.add_argument('--clear', action='store_true', help="delete existing data first")
+
+    def handle(self, *args, **options):
+        counts = ('farmers', 'crops', 'notifications', 'price_days', 'weather_days')
+        if min(options[name] for name in counts) < 0:
+            raise CommandError("Counts must not be negative")
+        if options['batch_size'] < 1 or options['workers'] < 1 or not 1 <= options['weather_interval'] <= 24:
+            raise CommandError("--batch-size and --workers must be positive, --weather-interval 1-24")
+        if options['workers'] > 1 and connection.vendor == 'sqlite':
+            raise CommandError("SQLite allows only one writer at a time; use --workers 1")
+
+        started = time.perf_counter()
+        if options['clear']:
+            clear_data()
+
+        totals = {}
+
+        def report(table, count):
+            totals[table] = totals.get(table, 0) + count
+            if options['verbosity'] >= 2:
+                self.stdout.write(f"  {table}: {totals[table]:,} rows")
+
+        try:
+            seed_dataset(
+                farmers=options['farmers'],
+                crops=options['crops'],
+                notifications=options['notifications'],
+                price_days=options['price_days'],
+                weather_days=options['weather_days'],
+                weather_interval=options['weather_interval'],
+                seed=options['seed'],
+                workers=options['workers'],
+                batch_size=options['batch_size'],
+                progress=report,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        elapsed = time.perf_counter() - started
+        rows = sum(totals.values())
+        summary = ', '.join(f"{count:,} {table}" for table, count in totals.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {summary} in {elapsed:.1f}s - {rows / elapsed if elapsed else 0:,.0f} rows/sec"
+        ))
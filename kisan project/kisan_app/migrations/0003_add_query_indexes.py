@@ -0,0 +1,83 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kisan_app", "0002_cropcategory_marketprice_weatherdata_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="crop",
+            index=models.Index(
+                fields=["harvest_date", "id"], name="crop_harvest_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="crop",
+            index=models.Index(
+                fields=["season", "harvest_date"], name="crop_season_harvest_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="crop",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="crop_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="crop",
+            index=models.Index(
+                condition=models.Q(("status__in", ["Planted", "Growing"])),
+                fields=["harvest_date"],
+                name="crop_pending_harvest_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="marketprice",
+            index=models.Index(
+                fields=["crop_name", "-date_recorded"], name="price_crop_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="marketprice",
+            index=models.Index(
+                fields=["-date_recorded", "-id"], name="price_date_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["farmer", "-created_at"], name="notif_farmer_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("is_read", False)),
+                fields=["farmer", "-created_at"],
+                name="notif_farmer_unread_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="notif_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="weatherdata",
+            index=models.Index(
+                fields=["location", "-date_recorded"], name="weather_location_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="weatherdata",
+            index=models.Index(
+                fields=["-date_recorded", "-id"], name="weather_date_id_idx"
+            ),
+        ),
+    ]
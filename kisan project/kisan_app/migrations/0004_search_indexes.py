@@ -0,0 +1,92 @@
+# Search indexes for the farmers and crops search boxes. The operations are
+# backend specific, so they run through RunPython instead of Meta.indexes.
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+FARMER_FIELDS = ["name", "phone", "email", "address"]
+CROP_FIELDS = ["name", "season"]
+
+
+def postgres_indexes():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    return [
+        (
+            "Farmer",
+            GinIndex(
+                SearchVector(*FARMER_FIELDS, config="simple"),
+                name="farmer_search_vector_idx",
+            ),
+        ),
+        (
+            "Farmer",
+            GinIndex(
+                fields=["name"], opclasses=["gin_trgm_ops"], name="farmer_name_trgm_idx"
+            ),
+        ),
+        (
+            "Crop",
+            GinIndex(
+                SearchVector(*CROP_FIELDS, config="simple"),
+                name="crop_search_vector_idx",
+            ),
+        ),
+        (
+            "Crop",
+            GinIndex(
+                fields=["name"], opclasses=["gin_trgm_ops"], name="crop_name_trgm_idx"
+            ),
+        ),
+    ]
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for model_name, index in postgres_indexes():
+            schema_editor.add_index(apps.get_model("kisan_app", model_name), index)
+    elif vendor == "sqlite":
+        try:
+            schema_editor.execute(
+                "CREATE VIRTUAL TABLE kisan_app_farmer_fts "
+                "USING fts5(name, phone, email, address)"
+            )
+        except OperationalError:
+            # SQLite built without FTS5; search falls back to icontains
+            return
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE kisan_app_crop_fts USING fts5(name, farmer_name, season)"
+        )
+        schema_editor.execute(
+            "INSERT INTO kisan_app_farmer_fts (rowid, name, phone, email, address) "
+            "SELECT id, name, phone, COALESCE(email, ''), address FROM kisan_app_farmer"
+        )
+        schema_editor.execute(
+            "INSERT INTO kisan_app_crop_fts (rowid, name, farmer_name, season) "
+            "SELECT c.id, c.name, f.name, c.season FROM kisan_app_crop c "
+            "JOIN kisan_app_farmer f ON f.id = c.farmer_id"
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for model_name, index in postgres_indexes():
+            schema_editor.remove_index(apps.get_model("kisan_app", model_name), index)
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS kisan_app_farmer_fts")
+        schema_editor.execute("DROP TABLE IF EXISTS kisan_app_crop_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kisan_app", "0003_add_query_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
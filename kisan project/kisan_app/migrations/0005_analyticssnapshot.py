@@ -0,0 +1,106 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:28
+
+import datetime
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+
+
+def build_snapshots(apps, schema_editor):
+    """Fill the snapshot from the existing crops, as analytics.rebuild_snapshots did at this point"""
+    Crop = apps.get_model("kisan_app", "Crop")
+    AnalyticsSnapshot = apps.get_model("kisan_app", "AnalyticsSnapshot")
+    value = ExpressionWrapper(
+        F("quantity") * F("price_per_kg"), output_field=DecimalField(max_digits=20, decimal_places=4)
+    )
+    measures = {
+        "crop_count": Count("id"),
+        "total_quantity": Sum("quantity"),
+        "total_value": Sum(value),
+        "total_investment": Sum("investment_cost"),
+    }
+    groupings = [
+        ("day", TruncDate("created_at")),
+        ("month", TruncMonth("created_at")),
+        ("season", F("season")),
+        ("category", F("category_id")),
+    ]
+
+    def snapshot(dimension, key, values):
+        return AnalyticsSnapshot(
+            dimension=dimension, key=key, **{measure: values[measure] or 0 for measure in measures}
+        )
+
+    rows = [snapshot("total", "", Crop.objects.aggregate(**measures))]
+    for dimension, expression in groupings:
+        for group in Crop.objects.annotate(group=expression).values("group").annotate(**measures).order_by():
+            key = group.pop("group")
+            if isinstance(key, datetime.datetime):
+                key = key.date()
+            if isinstance(key, datetime.date):
+                key = key.isoformat()
+            rows.append(snapshot(dimension, str(key or ""), group))
+    AnalyticsSnapshot.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kisan_app", "0004_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalyticsSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "dimension",
+                    models.CharField(
+                        choices=[
+                            ("total", "All Crops"),
+                            ("day", "Day Created"),
+                            ("month", "Month Created"),
+                            ("season", "Season"),
+                            ("category", "Category"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("key", models.CharField(blank=True, max_length=50)),
+                ("crop_count", models.IntegerField(default=0)),
+                (
+                    "total_quantity",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=20),
+                ),
+                (
+                    "total_value",
+                    models.DecimalField(decimal_places=4, default=0, max_digits=20),
+                ),
+                (
+                    "total_investment",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=20),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["dimension", "key"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="analyticssnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("dimension", "key"), name="unique_snapshot_dimension_key"
+            ),
+        ),
+        migrations.RunPython(build_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:31
+
+import datetime
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def remove_duplicate_prices(apps, schema_editor):
+    """Keep the most recently inserted price for each crop, market and day"""
+    MarketPrice = apps.get_model("kisan_app", "MarketPrice")
+    keep = (
+        MarketPrice.objects.values("crop_name", "market_location", "date_recorded")
+        .annotate(keep_id=Max("id"))
+        .values("keep_id")
+    )
+    MarketPrice.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kisan_app", "0005_analyticssnapshot"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="marketprice",
+            name="date_recorded",
+            field=models.DateField(default=datetime.date.today),
+        ),
+        migrations.RunPython(remove_duplicate_prices, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="marketprice",
+            constraint=models.UniqueConstraint(
+                fields=("crop_name", "market_location", "date_recorded"),
+                name="unique_price_per_market_day",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:33
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kisan_app", "0006_market_price_import"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="weatherdata",
+            name="date_recorded",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,150 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:52
+
+from datetime import timedelta
+from decimal import Decimal
+from itertools import groupby, islice
+
+from django.db import migrations, models
+import kisan_app.models
+
+
+def normalize(value):
+    return " ".join(str(value or "").split()).casefold()
+
+
+def rollup(PriceRollup, resolution, period_start, prices):
+    """One rollup row over ``prices`` of a single pair, in date and id order"""
+    amounts = [price.price_per_kg for price in prices]
+    return PriceRollup(
+        resolution=resolution,
+        crop_key=prices[-1].crop_key,
+        market_key=prices[-1].market_key,
+        crop_name=prices[-1].crop_name,
+        market_location=prices[-1].market_location,
+        period_start=period_start,
+        open_price=amounts[0],
+        high_price=max(amounts),
+        low_price=min(amounts),
+        close_price=amounts[-1],
+        mean_price=(sum(amounts) / len(amounts)).quantize(Decimal("0.01")),
+        samples=len(amounts),
+    )
+
+
+def price_rollups(PriceRollup, prices):
+    """Daily and weekly rollups of ``prices`` ordered by pair, date and id"""
+    for _, pair_prices in groupby(prices, key=lambda price: (price.crop_key, price.market_key)):
+        weeks = groupby(
+            pair_prices, key=lambda price: price.date_recorded - timedelta(days=price.date_recorded.weekday())
+        )
+        for week_start, week_prices in weeks:
+            week_prices = list(week_prices)
+            for day, day_prices in groupby(week_prices, key=lambda price: price.date_recorded):
+                yield rollup(PriceRollup, "day", day, list(day_prices))
+            yield rollup(PriceRollup, "week", week_start, week_prices)
+
+
+def backfill_keys(apps, schema_editor):
+    MarketPrice = apps.get_model("kisan_app", "MarketPrice")
+    PriceRollup = apps.get_model("kisan_app", "PriceRollup")
+    # Keyset pages by id, so only one batch of prices is in memory at a time
+    last_id = 0
+    while True:
+        prices = list(
+            MarketPrice.objects.filter(id__gt=last_id).order_by("id").only("id", "crop_name", "market_location")[:2000]
+        )
+        if not prices:
+            break
+        for price in prices:
+            price.crop_key = normalize(price.crop_name)
+            price.market_key = normalize(price.market_location)
+        MarketPrice.objects.bulk_update(prices, ["crop_key", "market_key"], batch_size=1000)
+        last_id = prices[-1].id
+
+    ordered = MarketPrice.objects.order_by("crop_key", "market_key", "date_recorded", "id").iterator(chunk_size=2000)
+    rollups = price_rollups(PriceRollup, ordered)
+    while True:
+        batch = list(islice(rollups, 1000))
+        if not batch:
+            break
+        PriceRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kisan_app", "0007_weather_reading_time"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PriceRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[("day", "Daily"), ("week", "Weekly")], max_length=10
+                    ),
+                ),
+                ("crop_key", models.CharField(max_length=100)),
+                ("market_key", models.CharField(max_length=100)),
+                ("crop_name", models.CharField(max_length=100)),
+                ("market_location", models.CharField(max_length=100)),
+                ("period_start", models.DateField()),
+                ("open_price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("high_price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("low_price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("close_price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("mean_price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("samples", models.IntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["resolution", "crop_key", "market_key", "period_start"],
+            },
+        ),
+        migrations.AddField(
+            model_name="marketprice",
+            name="crop_key",
+            field=kisan_app.models.NormalizedKeyField(
+                default="", editable=False, max_length=100, source="crop_name"
+            ),
+        ),
+        migrations.AddField(
+            model_name="marketprice",
+            name="market_key",
+            field=kisan_app.models.NormalizedKeyField(
+                default="", editable=False, max_length=100, source="market_location"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="marketprice",
+            index=models.Index(
+                fields=["crop_key", "market_key", "date_recorded"],
+                name="price_key_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pricerollup",
+            index=models.Index(
+                fields=["resolution", "crop_key", "period_start"],
+                name="rollup_crop_period_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="pricerollup",
+            constraint=models.UniqueConstraint(
+                fields=("resolution", "crop_key", "market_key", "period_start"),
+                name="unique_price_rollup_period",
+            ),
+        ),
+        migrations.RunPython(backfill_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_latest_prices(apps, schema_editor):
+    """Store the newest price, by date then id, of every (crop, mandi) pair"""
+    MarketPrice = apps.get_model("kisan_app", "MarketPrice")
+    LatestMarketPrice = apps.get_model("kisan_app", "LatestMarketPrice")
+    rows = []
+    previous = None
+    for price in MarketPrice.objects.order_by("crop_key", "market_key", "-date_recorded", "-id").iterator(
+        chunk_size=2000
+    ):
+        pair = (price.crop_key, price.market_key)
+        if pair == previous:
+            continue
+        previous = pair
+        rows.append(LatestMarketPrice(
+            price_id=price.id,
+            crop_key=price.crop_key,
+            market_key=price.market_key,
+            crop_name=price.crop_name,
+            market_location=price.market_location,
+            price_per_kg=price.price_per_kg,
+            date_recorded=price.date_recorded,
+            source=price.source,
+        ))
+    LatestMarketPrice.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kisan_app", "0008_price_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LatestMarketPrice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("crop_key", models.CharField(max_length=100)),
+                ("market_key", models.CharField(max_length=100)),
+                ("crop_name", models.CharField(max_length=100)),
+                ("market_location", models.CharField(max_length=100)),
+                ("price_per_kg", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("date_recorded", models.DateField()),
+                ("source", models.CharField(max_length=100)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "price",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="kisan_app.marketprice",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["crop_key", "market_key"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="latestmarketprice",
+            constraint=models.UniqueConstraint(
+                fields=("crop_key", "market_key"), name="unique_latest_price_pair"
+            ),
+        ),
+        migrations.RunPython(build_latest_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+import kisan_app.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kisan_app", "0009_latest_market_price"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PriceAlertRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("crop_name", models.CharField(max_length=100)),
+                (
+                    "market_location",
+                    models.CharField(
+                        blank=True,
+                        help_text="Leave blank for any mandi",
+                        max_length=100,
+                    ),
+                ),
+                (
+                    "crop_key",
+                    kisan_app.models.NormalizedKeyField(
+                        default="", editable=False, max_length=100, source="crop_name"
+                    ),
+                ),
+                (
+                    "market_key",
+                    kisan_app.models.NormalizedKeyField(
+                        default="",
+                        editable=False,
+                        max_length=100,
+                        source="market_location",
+                    ),
+                ),
+                (
+                    "direction",
+                    models.CharField(
+                        choices=[
+                            ("above", "Price rises to or above"),
+                            ("below", "Price falls to or below"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "threshold",
+                    models.DecimalField(
+                        decimal_places=2, help_text="Price per kg", max_digits=10
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("last_triggered_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "farmer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_alerts",
+                        to="kisan_app.farmer",
+                    ),
+                ),
+                (
+                    "last_price",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="kisan_app.marketprice",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("is_active", True)),
+                        fields=["direction", "crop_key", "market_key"],
+                        name="alert_active_crop_idx",
+                    )
+                ],
+            },
+        ),
+    ]
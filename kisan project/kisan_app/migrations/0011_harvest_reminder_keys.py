@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kisan_app", "0010_price_alert_rules"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="crop",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="reminders",
+                to="kisan_app.crop",
+            ),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="harvest_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="reminder_window",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("7", "7 days before harvest"),
+                    ("3", "3 days before harvest"),
+                    ("1", "1 day before harvest"),
+                    ("overdue", "Harvest overdue"),
+                ],
+                max_length=10,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="notification",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("notification_type", "harvest_reminder")),
+                fields=("crop", "reminder_window", "harvest_date"),
+                name="unique_harvest_reminder",
+            ),
+        ),
+    ]
@@ -0,0 +1,191 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:01
+
+from datetime import datetime, time
+from itertools import groupby, islice
+
+from django.db import migrations, models
+from django.db.models import Max
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def remove_duplicate_readings(apps, schema_editor):
+    """Keep the most recently inserted reading for each location and time"""
+    WeatherData = apps.get_model("kisan_app", "WeatherData")
+    keep = (
+        WeatherData.objects.values("location", "date_recorded")
+        .annotate(keep_id=Max("id"))
+        .values("keep_id")
+    )
+    WeatherData.objects.exclude(id__in=keep).delete()
+
+
+def hourly_rollup(WeatherRollup, location, period_start, readings):
+    samples = len(readings)
+    return WeatherRollup(
+        resolution="hour",
+        location=location,
+        period_start=period_start,
+        min_temperature=min(reading.temperature for reading in readings),
+        max_temperature=max(reading.temperature for reading in readings),
+        avg_temperature=sum(reading.temperature for reading in readings) / samples,
+        min_humidity=min(reading.humidity for reading in readings),
+        max_humidity=max(reading.humidity for reading in readings),
+        avg_humidity=sum(reading.humidity for reading in readings) / samples,
+        total_rainfall=sum(reading.rainfall for reading in readings),
+        samples=samples,
+    )
+
+
+def daily_rollup(WeatherRollup, location, period_start, hours):
+    samples = sum(hour.samples for hour in hours)
+    return WeatherRollup(
+        resolution="day",
+        location=location,
+        period_start=period_start,
+        min_temperature=min(hour.min_temperature for hour in hours),
+        max_temperature=max(hour.max_temperature for hour in hours),
+        avg_temperature=sum(hour.avg_temperature * hour.samples for hour in hours) / samples,
+        min_humidity=min(hour.min_humidity for hour in hours),
+        max_humidity=max(hour.max_humidity for hour in hours),
+        avg_humidity=sum(hour.avg_humidity * hour.samples for hour in hours) / samples,
+        total_rainfall=sum(hour.total_rainfall for hour in hours),
+        samples=samples,
+    )
+
+
+def weather_rollups(WeatherRollup, readings):
+    """Hourly and daily rollups of ``readings`` ordered by location and time"""
+    for location, location_readings in groupby(readings, key=lambda reading: reading.location):
+        local = ((timezone.localtime(reading.date_recorded), reading) for reading in location_readings)
+        for day, day_readings in groupby(local, key=lambda pair: pair[0].date()):
+            hours = []
+            for hour, hour_readings in groupby(day_readings, key=lambda pair: pair[0].hour):
+                start = timezone.make_aware(datetime.combine(day, time(hour)))
+                hours.append(hourly_rollup(WeatherRollup, location, start, [reading for _, reading in hour_readings]))
+            yield from hours
+            yield daily_rollup(WeatherRollup, location, timezone.make_aware(datetime.combine(day, time())), hours)
+
+
+def build_weather_tables(apps, schema_editor):
+    """Fill the rollups and latest readings, as weather.py computed them at this point"""
+    WeatherData = apps.get_model("kisan_app", "WeatherData")
+    WeatherRollup = apps.get_model("kisan_app", "WeatherRollup")
+    LatestWeather = apps.get_model("kisan_app", "LatestWeather")
+
+    readings = WeatherData.objects.order_by("location", "date_recorded", "id").iterator(chunk_size=2000)
+    rollups = weather_rollups(WeatherRollup, readings)
+    while True:
+        batch = list(islice(rollups, 1000))
+        if not batch:
+            break
+        WeatherRollup.objects.bulk_create(batch)
+
+    latest = []
+    previous = None
+    for reading in WeatherData.objects.order_by("location", "-date_recorded", "-id").iterator(chunk_size=2000):
+        if reading.location == previous:
+            continue
+        previous = reading.location
+        latest.append(LatestWeather(
+            reading_id=reading.id,
+            location=reading.location,
+            temperature=reading.temperature,
+            humidity=reading.humidity,
+            rainfall=reading.rainfall,
+            weather_condition=reading.weather_condition,
+            date_recorded=reading.date_recorded,
+        ))
+    LatestWeather.objects.bulk_create(latest, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kisan_app", "0011_harvest_reminder_keys"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LatestWeather",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("location", models.CharField(max_length=100, unique=True)),
+                ("temperature", models.FloatField()),
+                ("humidity", models.FloatField()),
+                ("rainfall", models.FloatField()),
+                ("weather_condition", models.CharField(max_length=50)),
+                ("date_recorded", models.DateTimeField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "latest weather",
+                "ordering": ["location"],
+            },
+        ),
+        migrations.CreateModel(
+            name="WeatherRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[("hour", "Hourly"), ("day", "Daily")], max_length=10
+                    ),
+                ),
+                ("location", models.CharField(max_length=100)),
+                ("period_start", models.DateTimeField()),
+                ("min_temperature", models.FloatField()),
+                ("max_temperature", models.FloatField()),
+                ("avg_temperature", models.FloatField()),
+                ("min_humidity", models.FloatField()),
+                ("max_humidity", models.FloatField()),
+                ("avg_humidity", models.FloatField()),
+                ("total_rainfall", models.FloatField()),
+                ("samples", models.IntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["resolution", "location", "period_start"],
+            },
+        ),
+        migrations.RunPython(remove_duplicate_readings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="weatherdata",
+            constraint=models.UniqueConstraint(
+                fields=("location", "date_recorded"), name="unique_weather_reading"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="weatherrollup",
+            constraint=models.UniqueConstraint(
+                fields=("resolution", "location", "period_start"),
+                name="unique_weather_rollup_period",
+            ),
+        ),
+        migrations.AddField(
+            model_name="latestweather",
+            name="reading",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="kisan_app.weatherdata",
+            ),
+        ),
+        migrations.RunPython(build_weather_tables, migrations.RunPython.noop),
+    ]
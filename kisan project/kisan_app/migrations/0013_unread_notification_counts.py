@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:04
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_unread(apps, schema_editor):
+    """Set every farmer's counter to their unread notifications"""
+    Farmer = apps.get_model("kisan_app", "Farmer")
+    Notification = apps.get_model("kisan_app", "Notification")
+    unread = (
+        Notification.objects.filter(farmer=OuterRef("pk"), is_read=False)
+        .order_by()
+        .values("farmer")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Farmer.objects.update(unread_notifications=Coalesce(Subquery(unread), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kisan_app", "0012_weather_rollups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="farmer",
+            name="unread_notifications",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["farmer", "notification_type", "-created_at", "-id"],
+                name="notif_farmer_type_idx",
+            ),
+        ),
+        migrations.RunPython(count_unread, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:07
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kisan_app", "0013_unread_notification_counts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedRecord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "model",
+                    models.CharField(
+                        help_text="app_label.model_name of the source table",
+                        max_length=50,
+                    ),
+                ),
+                ("original_id", models.BigIntegerField()),
+                ("recorded_at", models.DateTimeField()),
+                (
+                    "data",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder
+                    ),
+                ),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["model", "recorded_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["model", "recorded_at"],
+                        name="archive_model_recorded_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="archivedrecord",
+            constraint=models.UniqueConstraint(
+                fields=("model", "original_id"), name="unique_archived_row"
+            ),
+        ),
+    ]
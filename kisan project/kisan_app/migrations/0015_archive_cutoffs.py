@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kisan_app", "0014_archived_records"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchiveCutoff",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "model",
+                    models.CharField(
+                        help_text="app_label.model_name of the source table",
+                        max_length=50,
+                        unique=True,
+                    ),
+                ),
+                ("archived_before", models.DateTimeField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
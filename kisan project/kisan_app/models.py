@@ -1,11 +1,75 @@
 from django.db import models
 from django.db import models
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from datetime import date, timedelta
+from decimal import Decimal
 
 # Create your models here.
 
+# Wide enough to hold quantity * price_per_kg for any pair of 10-digit decimals
+MONEY_FIELD = DecimalField(max_digits=20, decimal_places=4)
+
+# Harvests due within this many days count as "upcoming"
+UPCOMING_HARVEST_DAYS = 30
+
+
+def upcoming_harvest_window():
+    """Return the (start, end) dates of the upcoming-harvest window"""
+    today = date.today()
+    return today, today + timedelta(days=UPCOMING_HARVEST_DAYS)
+
+
+def crop_value_expression(prefix=''):
+    """quantity * price_per_kg, optionally reached through a relation prefix"""
+    return ExpressionWrapper(F(f'{prefix}quantity') * F(f'{prefix}price_per_kg'), output_field=MONEY_FIELD)
+
+
+def normalize_key(value):
+    """Case- and whitespace-insensitive key for crop and mandi names"""
+    return ' '.join(str(value or '').split()).casefold()
+
+
+class NormalizedKeyField(models.CharField):
+    """Holds normalize_key() of another field, recomputed on every save and bulk_create"""
+
+    def __init__(self, *args, source=None, **kwargs):
+        self.source = source
+        kwargs.setdefault('max_length', 100)
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('default', '')
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = normalize_key(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class FarmerQuerySet(models.QuerySet):
+    """Per-farmer crop roll-ups computed by the database"""
+
+    def with_rollups(self):
+        """Annotate crop_count, total_value and upcoming_count in the same query"""
+        start, end = upcoming_harvest_window()
+        return self.annotate(
+            crop_count=Count('crops'),
+            total_value=Coalesce(
+                Sum(crop_value_expression('crops__')), Value(Decimal('0')), output_field=MONEY_FIELD
+            ),
+            upcoming_count=Count(
+                'crops', filter=Q(crops__harvest_date__gte=start, crops__harvest_date__lte=end)
+            ),
+        )
+
 
 class Farmer(models.Model):
     """Model representing a farmer in the Kisan system"""
@@ -20,22 +84,36 @@ class Farmer(models.Model):
     land_area = models.DecimalField(max_digits=10, decimal_places=2, default=0.0, help_text="Area in acres")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by notifications.py; never edit directly
+    unread_notifications = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = FarmerQuerySet.as_manager()
 
     def __str__(self):
         return self.name
     
     @property
     def total_crops(self):
+        if hasattr(self, 'crop_count'):
+            return self.crop_count
         return self.crops.count()
     
     @property
     def total_harvest_value(self):
-        return sum(crop.total_value for crop in self.crops.all())
+        if hasattr(self, 'total_value'):
+            return self.total_value
+        return self.crops.financial_totals()['total_revenue']
     
     @property
     def upcoming_harvests(self):
-        today = date.today()
-        return self.crops.filter(harvest_date__gte=today, harvest_date__lte=today + timedelta(days=30))
+        start, end = upcoming_harvest_window()
+        return self.crops.filter(harvest_date__gte=start, harvest_date__lte=end)
+
+    @property
+    def upcoming_harvest_count(self):
+        if hasattr(self, 'upcoming_count'):
+            return self.upcoming_count
+        return self.upcoming_harvests.count()
 
 
 class CropCategory(models.Model):
@@ -51,6 +129,50 @@ class CropCategory(models.Model):
         return self.name
 
 
+class CropQuerySet(models.QuerySet):
+    """Financial expressions for crops, evaluated by the database"""
+
+    @staticmethod
+    def value_expression():
+        return crop_value_expression()
+
+    @classmethod
+    def profit_expression(cls):
+        return ExpressionWrapper(cls.value_expression() - F('investment_cost'), output_field=MONEY_FIELD)
+
+    @classmethod
+    def margin_expression(cls):
+        return Case(
+            When(investment_cost__gt=0,
+                 then=ExpressionWrapper(cls.profit_expression() * 100 / F('investment_cost'), output_field=MONEY_FIELD)),
+            default=Value(Decimal('0')),
+            output_field=MONEY_FIELD,
+        )
+
+    def with_financials(self):
+        """Annotate value_amount, profit_amount and margin_percent on each crop.
+
+        The names differ from the Crop.total_value / profit / profit_margin
+        properties so the annotations can be set on model instances.
+        """
+        return self.annotate(
+            value_amount=self.value_expression(),
+            profit_amount=self.profit_expression(),
+            margin_percent=self.margin_expression(),
+        )
+
+    def financial_totals(self):
+        """Return revenue, investment, profit and quantity totals in one query"""
+        totals = self.aggregate(
+            total_revenue=Sum(self.value_expression()),
+            total_investment=Sum('investment_cost'),
+            total_quantity=Sum('quantity'),
+        )
+        totals = {key: value or Decimal('0') for key, value in totals.items()}
+        totals['total_profit'] = totals['total_revenue'] - totals['total_investment']
+        return totals
+
+
 class Crop(models.Model):
     """Model representing crops grown by farmers"""
     SEASON_CHOICES = [
@@ -68,6 +190,9 @@ class Crop(models.Model):
         ('Sold', 'Sold'),
     ]
     
+    # Crops still in the field; matches the partial index below
+    PENDING_STATUSES = ['Planted', 'Growing']
+    
     name = models.CharField(max_length=100)
     category = models.ForeignKey(CropCategory, on_delete=models.SET_NULL, null=True, blank=True)
     season = models.CharField(max_length=50, choices=SEASON_CHOICES)
@@ -82,6 +207,19 @@ class Crop(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CropQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['harvest_date', 'id'], name='crop_harvest_id_idx'),
+            models.Index(fields=['season', 'harvest_date'], name='crop_season_harvest_idx'),
+            models.Index(fields=['-created_at', '-id'], name='crop_created_id_idx'),
+            models.Index(
+                fields=['harvest_date'], name='crop_pending_harvest_idx',
+                condition=Q(status__in=['Planted', 'Growing']),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.farmer.name}"
     
@@ -116,11 +254,23 @@ class MarketPrice(models.Model):
     crop_name = models.CharField(max_length=100)
     price_per_kg = models.DecimalField(max_digits=10, decimal_places=2)
     market_location = models.CharField(max_length=100)
-    date_recorded = models.DateField(auto_now_add=True)
+    date_recorded = models.DateField(default=date.today)
     source = models.CharField(max_length=100, default='Manual Entry')
+    crop_key = NormalizedKeyField(source='crop_name')
+    market_key = NormalizedKeyField(source='market_location')
     
     class Meta:
         ordering = ['-date_recorded']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['crop_name', 'market_location', 'date_recorded'], name='unique_price_per_market_day',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['crop_name', '-date_recorded'], name='price_crop_date_idx'),
+            models.Index(fields=['-date_recorded', '-id'], name='price_date_id_idx'),
+            models.Index(fields=['crop_key', 'market_key', 'date_recorded'], name='price_key_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.crop_name} - ₹{self.price_per_kg} ({self.market_location})"
@@ -133,15 +283,79 @@ class WeatherData(models.Model):
     humidity = models.FloatField()
     rainfall = models.FloatField(default=0.0)
     weather_condition = models.CharField(max_length=50)
-    date_recorded = models.DateTimeField(auto_now_add=True)
+    date_recorded = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-date_recorded']
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'date_recorded'], name='unique_weather_reading'),
+        ]
+        indexes = [
+            models.Index(fields=['location', '-date_recorded'], name='weather_location_date_idx'),
+            models.Index(fields=['-date_recorded', '-id'], name='weather_date_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.location} - {self.weather_condition} ({self.date_recorded.date()})"
 
 
+class WeatherRollup(models.Model):
+    """Temperature, humidity and rainfall of one location for an hour or a day.
+
+    Kept current by weather.py.
+    """
+    RESOLUTION_CHOICES = [
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+    ]
+    
+    resolution = models.CharField(max_length=10, choices=RESOLUTION_CHOICES)
+    location = models.CharField(max_length=100)
+    period_start = models.DateTimeField()
+    min_temperature = models.FloatField()
+    max_temperature = models.FloatField()
+    avg_temperature = models.FloatField()
+    min_humidity = models.FloatField()
+    max_humidity = models.FloatField()
+    avg_humidity = models.FloatField()
+    total_rainfall = models.FloatField()
+    samples = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['resolution', 'location', 'period_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['resolution', 'location', 'period_start'], name='unique_weather_rollup_period',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.location} {self.get_resolution_display()} {self.period_start}"
+
+
+class LatestWeather(models.Model):
+    """The most recent WeatherData reading of each location.
+
+    Kept current by weather.py, so the weather page lists locations and
+    current conditions without scanning the readings table.
+    """
+    location = models.CharField(max_length=100, unique=True)
+    reading = models.ForeignKey(WeatherData, on_delete=models.CASCADE, related_name='+')
+    temperature = models.FloatField()
+    humidity = models.FloatField()
+    rainfall = models.FloatField()
+    weather_condition = models.CharField(max_length=50)
+    date_recorded = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['location']
+        verbose_name_plural = 'latest weather'
+    
+    def __str__(self):
+        return f"{self.location} - {self.weather_condition} ({self.date_recorded})"
+
+
 class Notification(models.Model):
     """Model for system notifications"""
     NOTIFICATION_TYPES = [
@@ -151,15 +365,218 @@ class Notification(models.Model):
         ('general', 'General'),
     ]
     
+    REMINDER_WINDOWS = [
+        ('7', '7 days before harvest'),
+        ('3', '3 days before harvest'),
+        ('1', '1 day before harvest'),
+        ('overdue', 'Harvest overdue'),
+    ]
+    
     farmer = models.ForeignKey(Farmer, on_delete=models.CASCADE, related_name='notifications')
     title = models.CharField(max_length=200)
     message = models.TextField()
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set on harvest reminders, which are sent once per crop, window and harvest date
+    crop = models.ForeignKey(Crop, on_delete=models.CASCADE, null=True, blank=True, related_name='reminders')
+    reminder_window = models.CharField(max_length=10, choices=REMINDER_WINDOWS, blank=True)
+    harvest_date = models.DateField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['crop', 'reminder_window', 'harvest_date'], name='unique_harvest_reminder',
+                condition=Q(notification_type='harvest_reminder'),
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['farmer', '-created_at'], name='notif_farmer_created_idx'),
+            models.Index(
+                fields=['farmer', '-created_at'], name='notif_farmer_unread_idx',
+                condition=Q(is_read=False),
+            ),
+            models.Index(fields=['-created_at', '-id'], name='notif_created_id_idx'),
+            models.Index(fields=['farmer', 'notification_type', '-created_at', '-id'], name='notif_farmer_type_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.title} - {self.farmer.name}"
+
+class AnalyticsSnapshot(models.Model):
+    """Pre-aggregated crop totals for one dashboard dimension value.
+
+    Maintained incrementally by the Crop signal handlers in signals.py and
+    rebuilt from scratch by the ``rebuild_analytics`` management command.
+    """
+    DIMENSION_CHOICES = [
+        ('total', 'All Crops'),
+        ('day', 'Day Created'),
+        ('month', 'Month Created'),
+        ('season', 'Season'),
+        ('category', 'Category'),
+    ]
+    
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=50, blank=True)
+    crop_count = models.IntegerField(default=0)
+    total_quantity = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    total_value = models.DecimalField(max_digits=20, decimal_places=4, default=0)
+    total_investment = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['dimension', 'key']
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='unique_snapshot_dimension_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_dimension_display()} {self.key} - {self.crop_count} crops"
+    
+    @property
+    def total_profit(self):
+        return self.total_value - self.total_investment
+
+
+class PriceRollup(models.Model):
+    """Open/high/low/close and mean price of one crop at one mandi for a day or week.
+
+    Rows are grouped by the normalised crop and market keys of MarketPrice
+    and kept current by price_history.py.
+    """
+    RESOLUTION_CHOICES = [
+        ('day', 'Daily'),
+        ('week', 'Weekly'),
+    ]
+    
+    resolution = models.CharField(max_length=10, choices=RESOLUTION_CHOICES)
+    crop_key = models.CharField(max_length=100)
+    market_key = models.CharField(max_length=100)
+    crop_name = models.CharField(max_length=100)
+    market_location = models.CharField(max_length=100)
+    period_start = models.DateField()
+    open_price = models.DecimalField(max_digits=10, decimal_places=2)
+    high_price = models.DecimalField(max_digits=10, decimal_places=2)
+    low_price = models.DecimalField(max_digits=10, decimal_places=2)
+    close_price = models.DecimalField(max_digits=10, decimal_places=2)
+    mean_price = models.DecimalField(max_digits=10, decimal_places=2)
+    samples = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['resolution', 'crop_key', 'market_key', 'period_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['resolution', 'crop_key', 'market_key', 'period_start'], name='unique_price_rollup_period',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['resolution', 'crop_key', 'period_start'], name='rollup_crop_period_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.crop_name} @ {self.market_location} {self.get_resolution_display()} {self.period_start}"
+
+
+class LatestMarketPrice(models.Model):
+    """The most recent MarketPrice of each (crop, mandi) pair.
+
+    Kept current by price_history.py whenever prices are saved, deleted or
+    bulk-imported, so current-price lookups never scan the history table.
+    """
+    crop_key = models.CharField(max_length=100)
+    market_key = models.CharField(max_length=100)
+    crop_name = models.CharField(max_length=100)
+    market_location = models.CharField(max_length=100)
+    price = models.ForeignKey(MarketPrice, on_delete=models.CASCADE, related_name='+')
+    price_per_kg = models.DecimalField(max_digits=10, decimal_places=2)
+    date_recorded = models.DateField()
+    source = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['crop_key', 'market_key']
+        constraints = [
+            models.UniqueConstraint(fields=['crop_key', 'market_key'], name='unique_latest_price_pair'),
+        ]
+    
+    def __str__(self):
+        return f"{self.crop_name} @ {self.market_location}: ₹{self.price_per_kg} ({self.date_recorded})"
+
+
+class PriceAlertRule(models.Model):
+    """A farmer's price threshold for a crop at one mandi, or at any mandi.
+
+    Evaluated in batch by alerts.py, which sends one price_alert
+    Notification per new matching price.
+    """
+    DIRECTION_CHOICES = [
+        ('above', 'Price rises to or above'),
+        ('below', 'Price falls to or below'),
+    ]
+    
+    farmer = models.ForeignKey(Farmer, on_delete=models.CASCADE, related_name='price_alerts')
+    crop_name = models.CharField(max_length=100)
+    market_location = models.CharField(max_length=100, blank=True, help_text="Leave blank for any mandi")
+    crop_key = NormalizedKeyField(source='crop_name')
+    market_key = NormalizedKeyField(source='market_location')
+    direction = models.CharField(max_length=10, choices=DIRECTION_CHOICES)
+    threshold = models.DecimalField(max_digits=10, decimal_places=2, help_text="Price per kg")
+    is_active = models.BooleanField(default=True)
+    last_price = models.ForeignKey(MarketPrice, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_triggered_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['direction', 'crop_key', 'market_key'], name='alert_active_crop_idx',
+                condition=Q(is_active=True),
+            ),
+        ]
+    
+    def __str__(self):
+        market = self.market_location or "any mandi"
+        return f"{self.farmer.name}: {self.crop_name} {self.direction} ₹{self.threshold} at {market}"
+
+
+class ArchivedRecord(models.Model):
+    """A row moved out of a hot table by the retention job in retention.py.
+
+    ``data`` holds the row's column values, so archived rows stay
+    queryable without widening the tables the pages read.
+    """
+    model = models.CharField(max_length=50, help_text="app_label.model_name of the source table")
+    original_id = models.BigIntegerField()
+    recorded_at = models.DateTimeField()
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['model', 'recorded_at']
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'original_id'], name='unique_archived_row'),
+        ]
+        indexes = [
+            models.Index(fields=['model', 'recorded_at'], name='archive_model_recorded_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.model} #{self.original_id} ({self.recorded_at:%Y-%m-%d})"
+
+
+class ArchiveCutoff(models.Model):
+    """How far the retention job has archived a table.
+
+    Rows recorded before ``archived_before`` may have left the hot table, so
+    price_history.py and weather.py keep the rollups of those periods
+    instead of recomputing them from the rows that remain.
+    """
+    model = models.CharField(max_length=50, unique=True, help_text="app_label.model_name of the source table")
+    archived_before = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"{self.title} - {self.farmer.name}"
\ No newline at end of file
+        return f"{self.model} archived before {self.archived_before:%Y-%m-%d %H:%M}"
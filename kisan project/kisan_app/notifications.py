@@ -0,0 +1,76 @@
+"""Per-farmer unread notification counters and batch mark-as-read.
+
+``Farmer.unread_notifications`` is kept equal to the farmer's unread
+Notification rows, so the nav badge is a primary-key lookup. The signal
+handlers adjust it for single creates, deletes and read toggles. Code
+that writes notifications in bulk calls ``refresh_unread_counts`` for the
+farmers it touched, which recounts them with one UPDATE backed by the
+partial unread index. ``mark_read`` marks any number of a farmer's
+notifications with one UPDATE and moves the counter by the rows changed.
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .cache import bump_version
+from .models import Farmer, Notification
+
+# Signed cookie holding the farmer a visitor picked on the notifications page
+FARMER_COOKIE = 'kisan_farmer'
+ID_CHUNK_SIZE = 500
+
+
+def refresh_unread_counts(farmer_ids=None):
+    """Recount the unread notifications of ``farmer_ids``, or of every farmer"""
+    unread = Notification.objects.filter(farmer=OuterRef('pk'), is_read=False).order_by().values(
+        'farmer',
+    ).annotate(count=Count('id')).values('count')
+    count = Coalesce(Subquery(unread), Value(0))
+    if farmer_ids is None:
+        return Farmer.objects.update(unread_notifications=count)
+    farmer_ids = sorted(set(farmer_ids))
+    updated = 0
+    for start in range(0, len(farmer_ids), ID_CHUNK_SIZE):
+        updated += Farmer.objects.filter(id__in=farmer_ids[start:start + ID_CHUNK_SIZE]).update(
+            unread_notifications=count,
+        )
+    return updated
+
+
+def adjust_unread(farmer_id, delta):
+    if delta:
+        Farmer.objects.filter(id=farmer_id).update(unread_notifications=F('unread_notifications') + delta)
+
+
+def mark_read(farmer_id, ids=None):
+    """Mark the farmer's notifications in ``ids``, or all of them, as read; returns how many changed"""
+    unread = Notification.objects.filter(farmer_id=farmer_id, is_read=False)
+    if ids is not None:
+        unread = unread.filter(id__in=ids)
+    with transaction.atomic():
+        marked = unread.update(is_read=True)
+        adjust_unread(farmer_id, -marked)
+    if marked:
+        bump_version(Notification)
+    return marked
+
+
+def current_farmer_id(request):
+    """The farmer picked on the notifications page, read from a signed cookie without a query"""
+    if hasattr(request, 'kisan_farmer_id'):
+        # Picked during this request; the cookie is only set on the response
+        return request.kisan_farmer_id
+    value = request.get_signed_cookie(FARMER_COOKIE, default=None, salt=FARMER_COOKIE)
+    return int(value) if value and value.isdigit() else None
+
+
+def remember_farmer(response, farmer_id):
+    if farmer_id is None:
+        response.delete_cookie(FARMER_COOKIE)
+    else:
+        response.set_signed_cookie(FARMER_COOKIE, str(farmer_id), salt=FARMER_COOKIE,
+                                   max_age=365 * 24 * 3600, httponly=True, samesite='Lax')
+
+
+def unread_count(farmer_id):
+    return Farmer.objects.filter(id=farmer_id).values_list('unread_notifications', flat=True).first()
@@ -0,0 +1,155 @@
+"""Keyset (cursor) pagination shared by the list views.
+
+Instead of OFFSET, each page remembers the sort key of its last row and the
+next page is fetched with a ``WHERE (key) > (last key)`` condition, so page
+1000 costs the same as page one and can use an index on the ordering columns.
+"""
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404, JsonResponse
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded for the current ordering"""
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keep full microsecond precision, which DjangoJSONEncoder truncates"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    payload = json.dumps(values, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(cursor) from exc
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor(cursor)
+    return values
+
+
+class KeysetPage:
+    """One page of results plus the cursor for the page after it"""
+
+    def __init__(self, object_list, next_cursor, query_params=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.query_params = query_params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def next_query(self):
+        """Query string for the next page, keeping the current filters"""
+        params = self.query_params.copy()
+        params['cursor'] = self.next_cursor
+        return params.urlencode()
+
+
+class KeysetPaginator:
+    """Paginate a queryset by a unique ordering such as ('harvest_date', 'id').
+
+    Prefix a field with '-' for descending order. The last field must be
+    unique (normally the primary key) so that ties are broken stably.
+    """
+
+    def __init__(self, queryset, ordering, per_page=DEFAULT_PAGE_SIZE):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.fields = [field.lstrip('-') for field in self.ordering]
+
+    def _after(self, values):
+        """Q object selecting rows that sort after the given key values"""
+        condition = Q()
+        for position in range(len(self.ordering) - 1, -1, -1):
+            field = self.fields[position]
+            lookup = 'lt' if self.ordering[position].startswith('-') else 'gt'
+            step = Q(**{f'{field}__{lookup}': values[position]})
+            if position < len(self.ordering) - 1:
+                step |= Q(**{field: values[position]}) & condition
+            condition = step
+        return condition
+
+    def page(self, cursor=None, query_params=None):
+        queryset = self.queryset.order_by(*self.ordering)
+        if cursor:
+            try:
+                queryset = queryset.filter(self._after(decode_cursor(cursor, len(self.fields))))
+            except (ValidationError, TypeError) as exc:
+                raise InvalidCursor(cursor) from exc
+        rows = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            last = rows[-1]
+            next_cursor = encode_cursor([
+                last[field] if isinstance(last, dict) else getattr(last, field)
+                for field in self.fields
+            ])
+        return KeysetPage(rows, next_cursor, query_params)
+
+
+def get_page_size(request, default=DEFAULT_PAGE_SIZE):
+    try:
+        size = int(request.GET.get('limit', default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def paginate(request, queryset, ordering, per_page=DEFAULT_PAGE_SIZE):
+    """Return the page of ``queryset`` selected by the request's ``cursor`` parameter"""
+    paginator = KeysetPaginator(queryset, ordering, get_page_size(request, per_page))
+    try:
+        return paginator.page(request.GET.get('cursor'), request.GET)
+    except InvalidCursor:
+        raise Http404("Invalid page cursor")
+
+
+def wants_json(request):
+    return request.GET.get('format') == 'json'
+
+
+def page_json_response(page, fields):
+    """Serialise a page as JSON with only the given fields of each row"""
+    results = []
+    for row in page:
+        if isinstance(row, dict):
+            results.append({field: row.get(field) for field in fields})
+        else:
+            results.append({field: getattr(row, field) for field in fields})
+    return JsonResponse({
+        'results': results,
+        'next_cursor': page.next_cursor,
+        'has_next': page.has_next,
+    })
@@ -0,0 +1,62 @@
+"""Run a page's independent queries at the same time from async views.
+
+Django 4.2's async ORM methods (``acount()`` and friends) all run on one
+shared thread, so awaiting several of them still runs the queries one
+after another. ``gather_queries`` runs each callable on its own thread of
+a process-wide pool instead. Every pool thread keeps its own database
+connection, released after each query like at the end of a request (kept
+for CONN_MAX_AGE, otherwise closed), so a dashboard waits about as long
+as its slowest query rather than the sum of them.
+
+When the request's connection is inside a transaction (ATOMIC_REQUESTS,
+or a test case) other connections cannot see its uncommitted rows, so the
+queries run one after another on the request's thread instead.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from .profiling import profiled_queries
+
+_executor = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.KISAN_QUERY_THREADS, thread_name_prefix='kisan-query')
+    return _executor
+
+
+def in_transaction():
+    return connection.in_atomic_block
+
+
+def released(query):
+    """Wrap ``query`` to release its thread's connection afterwards"""
+    def run():
+        try:
+            # sync_to_async copies the request's context, including its profile
+            with profiled_queries():
+                return query()
+        finally:
+            close_old_connections()
+    return run
+
+
+def run_serially(queries):
+    return {name: query() for name, query in queries.items()}
+
+
+async def gather_queries(**queries):
+    """Evaluate every ``name=callable`` concurrently; returns their results by name"""
+    if await sync_to_async(in_transaction)():
+        return await sync_to_async(run_serially)(queries)
+    results = await asyncio.gather(*(
+        sync_to_async(released(query), thread_sensitive=False, executor=executor())()
+        for query in queries.values()
+    ))
+    return dict(zip(queries, results))
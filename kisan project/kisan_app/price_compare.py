@@ -0,0 +1,188 @@
+"""Compare a farmer's offer with the latest price at every mandi.
+
+For any number of crops the engine runs two queries in total: the current
+price per (crop, mandi) from LatestMarketPrice, and the 7 and 30 day moving
+averages per (crop, mandi) from the daily PriceRollup rows. Differences, ranking and
+spread statistics are then computed over those rows in Decimal, so money
+never passes through floats.
+
+Crop names are matched on their normalised key. A name with no exact match
+falls back to the closest crop whose key contains it, so "Onion" still finds
+"Onions" as it did when the calculator searched with ``icontains``.
+"""
+import json
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Avg, Q
+
+from .models import LatestMarketPrice, PriceRollup, normalize_key
+
+MAX_OFFERS = 50
+MOVING_AVERAGE_DAYS = {'avg_7d': 7, 'avg_30d': 30}
+CENT = Decimal('0.01')
+# The largest quantity or price the models store (max_digits=10, decimal_places=2)
+MAX_AMOUNT = Decimal('99999999.99')
+
+
+class OfferError(ValueError):
+    """An offer that cannot be compared"""
+
+
+@dataclass
+class Offer:
+    crop: str
+    quantity: Decimal
+    price: Decimal
+
+    @classmethod
+    def parse(cls, crop, quantity, price):
+        crop = str(crop or '').strip()
+        if not crop:
+            raise OfferError("crop_name is required")
+        try:
+            quantity, price = Decimal(str(quantity)), Decimal(str(price))
+        except InvalidOperation:
+            raise OfferError(f"quantity and price must be numbers for {crop}")
+        if not (quantity.is_finite() and price.is_finite()) or quantity < 0 or price < 0:
+            raise OfferError(f"quantity and price must not be negative for {crop}")
+        if quantity > MAX_AMOUNT or price > MAX_AMOUNT:
+            raise OfferError(f"quantity and price must not exceed {MAX_AMOUNT:,} for {crop}")
+        return cls(crop, quantity, price)
+
+
+def latest_prices(crop_keys):
+    """crop_key -> latest price row for each of its mandis, in one query.
+
+    Crops whose key contains one of ``crop_keys`` are included, for ``matched_key``.
+    """
+    condition = Q(crop_key__in=crop_keys)
+    for key in crop_keys:
+        condition |= Q(crop_key__contains=key)
+    prices = LatestMarketPrice.objects.filter(condition)
+    latest = defaultdict(list)
+    for row in prices.values('crop_key', 'market_key', 'market_location', 'price_per_kg', 'date_recorded'):
+        latest[row['crop_key']].append(row)
+    return latest
+
+
+def matched_key(key, latest):
+    """``key`` if it has prices, else the shortest crop key containing it"""
+    if key in latest:
+        return key
+    return min((candidate for candidate in latest if key in candidate), key=lambda candidate: (len(candidate), candidate),
+               default=key)
+
+
+def moving_averages(crop_keys, today=None):
+    """(crop_key, market_key) -> moving averages of the daily mean price"""
+    today = today or date.today()
+    windows = {
+        name: Avg('mean_price', filter=Q(period_start__gt=today - timedelta(days=days)))
+        for name, days in MOVING_AVERAGE_DAYS.items()
+    }
+    rows = PriceRollup.objects.filter(
+        resolution='day', crop_key__in=crop_keys,
+        period_start__gt=today - timedelta(days=max(MOVING_AVERAGE_DAYS.values())),
+    ).values('crop_key', 'market_key').annotate(**windows).order_by()
+    return {
+        (row['crop_key'], row['market_key']): {
+            name: round_money(row[name]) if row[name] is not None else None for name in MOVING_AVERAGE_DAYS
+        }
+        for row in rows
+    }
+
+
+def round_money(value):
+    return Decimal(str(value)).quantize(CENT)
+
+
+def percentile(ordered, pct):
+    """Linearly interpolated percentile of an ascending list"""
+    position = (len(ordered) - 1) * Decimal(pct) / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return round_money(ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower))
+
+
+def spread_statistics(offer, markets):
+    if not markets:
+        return {'markets': 0}
+    prices = sorted(market['price'] for market in markets)
+    return {
+        'markets': len(prices),
+        'best_market': markets[0]['market'],
+        'best_price': markets[0]['price'],
+        'min': prices[0],
+        'max': prices[-1],
+        'mean': round_money(sum(prices) / len(prices)),
+        'median': percentile(prices, 50),
+        'p25': percentile(prices, 25),
+        'p75': percentile(prices, 75),
+        'spread': prices[-1] - prices[0],
+        # Share of mandis paying less than the offer
+        'offer_percentile': round_money(Decimal(sum(price < offer.price for price in prices)) * 100 / len(prices)),
+    }
+
+
+def compare_offers(offers, today=None):
+    """Compare each offer with every mandi's latest price for its crop"""
+    latest = latest_prices({normalize_key(offer.crop) for offer in offers})
+    keys = [matched_key(normalize_key(offer.crop), latest) for offer in offers]
+    averages = moving_averages(set(keys), today)
+
+    results = []
+    for offer, key in zip(offers, keys):
+        your_total = round_money(offer.quantity * offer.price)
+        markets = []
+        for row in sorted(latest.get(key, []), key=lambda row: (-row['price_per_kg'], row['market_key'])):
+            total = round_money(offer.quantity * row['price_per_kg'])
+            difference = total - your_total
+            markets.append({
+                'rank': len(markets) + 1,
+                'market': row['market_location'],
+                'price': row['price_per_kg'],
+                'date': row['date_recorded'],
+                'total': total,
+                'difference': difference,
+                'percentage': round_money(difference / your_total * 100) if your_total else Decimal(0),
+                **averages.get((key, row['market_key']), dict.fromkeys(MOVING_AVERAGE_DAYS)),
+            })
+        results.append({
+            'crop': offer.crop,
+            'quantity': offer.quantity,
+            'price': offer.price,
+            'your_total': your_total,
+            'markets': markets,
+            'summary': spread_statistics(offer, markets),
+        })
+    return results
+
+
+class NumberEncoder(DjangoJSONEncoder):
+    """Send Decimals as JSON numbers for the calculator's JavaScript"""
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return super().default(o)
+
+
+def parse_offers(request):
+    """Offers from a JSON body ({"items": [...]}) or the calculator's form fields"""
+    if request.content_type == 'application/json':
+        try:
+            items = json.loads(request.body).get('items')
+        except (ValueError, AttributeError):
+            raise OfferError("Expected a JSON object with an items list")
+        if not isinstance(items, list) or not items:
+            raise OfferError("items must be a non-empty list")
+        if len(items) > MAX_OFFERS:
+            raise OfferError(f"At most {MAX_OFFERS} items can be compared at once")
+        if not all(isinstance(item, dict) for item in items):
+            raise OfferError("Each item must be an object")
+        return [Offer.parse(item.get('crop_name'), item.get('quantity', 0), item.get('price', 0)) for item in items]
+    return [Offer.parse(request.POST.get('crop_name'), request.POST.get('quantity') or 0, request.POST.get('price') or 0)]
@@ -0,0 +1,315 @@
+"""Daily and weekly price rollups per (crop, mandi).
+
+MarketPrice rows are grouped by their normalised ``crop_key`` and
+``market_key`` into PriceRollup rows holding the open, high, low, close and
+mean price of each day, and of each Monday-to-Sunday week. History charts
+read the rollups, which hold at most one row per pair and period, instead
+of scanning raw prices.
+
+``refresh_price_rollups`` recomputes a date range (widened to whole weeks)
+for some or all pairs, a chunk of pairs at a time so memory stays bounded
+however long the range. ``refresh_for_prices`` takes the first and last
+date written for each pair: the MarketPrice signal handlers pass the single
+day that changed, the bulk importer the span of each pair it touched.
+``python manage.py rebuild_price_rollups`` recomputes everything.
+Daily rollups before the retention job's archive cutoff are kept as they
+are, since some of their prices have left the table; weeks are folded from
+the stored and recomputed days together.
+
+The same triggers keep LatestMarketPrice, one row per pair holding its
+most recent price, current. Writes only ever move it forward, so
+``advance_latest_prices`` reads just the rows dated on or after each pair's
+current latest price. ``refresh_latest_prices`` recomputes pairs from their
+whole history; it is needed only when the latest row itself is deleted or
+moved to an older date or another pair.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Max, Min, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .models import LatestMarketPrice, MarketPrice, PriceRollup, normalize_key
+from .retention import archive_floor
+
+RESOLUTIONS = ['day', 'week']
+# Beyond this many pairs, refresh every pair in the date range instead of
+# building a huge OR filter
+MAX_PAIR_FILTER = 50
+ID_CHUNK_SIZE = 500
+# Daily rollups built in memory at once; pairs are refreshed in chunks of at
+# most MAX_PAIR_FILTER that stay under this for the range being refreshed
+ROLLUP_CHUNK_ROWS = 20000
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def to_price(value):
+    return Decimal(str(value)).quantize(Decimal('0.01'))
+
+
+def pair_filter(pairs):
+    condition = Q()
+    for crop_key, market_key in pairs:
+        condition |= Q(crop_key=crop_key, market_key=market_key)
+    return condition
+
+
+def opening_and_closing(ids):
+    """id -> price for the first and last rows of days with several prices"""
+    ids = sorted(ids)
+    prices = {}
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        prices.update(MarketPrice.objects.filter(id__in=ids[start:start + ID_CHUNK_SIZE]).values_list('id', 'price_per_kg'))
+    return prices
+
+
+def daily_rollups(prices):
+    groups = list(
+        prices.values('crop_key', 'market_key', 'date_recorded').annotate(
+            high=Max('price_per_kg'), low=Min('price_per_kg'), mean=Avg('price_per_kg'),
+            samples=Count('id'), first_id=Min('id'), last_id=Max('id'),
+            crop_name=Max('crop_name'), market_location=Max('market_location'),
+        ).order_by('crop_key', 'market_key', 'date_recorded')
+    )
+    # Normally a pair has one price a day; only spelling variants of the same
+    # crop or mandi need a lookup to tell the opening price from the closing one
+    ends = opening_and_closing([
+        row_id for group in groups if group['samples'] > 1 for row_id in (group['first_id'], group['last_id'])
+    ])
+    rows = []
+    for group in groups:
+        rows.append(PriceRollup(
+            resolution='day',
+            crop_key=group['crop_key'],
+            market_key=group['market_key'],
+            crop_name=group['crop_name'],
+            market_location=group['market_location'],
+            period_start=group['date_recorded'],
+            open_price=ends.get(group['first_id'], group['high']),
+            high_price=group['high'],
+            low_price=group['low'],
+            close_price=ends.get(group['last_id'], group['high']),
+            mean_price=to_price(group['mean']),
+            samples=group['samples'],
+        ))
+    return rows
+
+
+def weekly_rollups(days):
+    """Fold daily rollups (sorted by pair and date) into weekly ones"""
+    weeks = defaultdict(list)
+    for day in days:
+        weeks[(day.crop_key, day.market_key, week_start(day.period_start))].append(day)
+    rows = []
+    for (crop_key, market_key, start), members in weeks.items():
+        samples = sum(day.samples for day in members)
+        rows.append(PriceRollup(
+            resolution='week',
+            crop_key=crop_key,
+            market_key=market_key,
+            crop_name=members[-1].crop_name,
+            market_location=members[-1].market_location,
+            period_start=start,
+            open_price=members[0].open_price,
+            high_price=max(day.high_price for day in members),
+            low_price=min(day.low_price for day in members),
+            close_price=members[-1].close_price,
+            mean_price=to_price(sum(Decimal(day.mean_price) * day.samples for day in members) / samples),
+            samples=samples,
+        ))
+    return rows
+
+
+def pair_chunks(pairs, first, last):
+    """Split ``pairs`` into chunks whose daily rollups from ``first`` to ``last`` fit in memory"""
+    pairs = sorted(pairs)
+    size = max(1, min(MAX_PAIR_FILTER, ROLLUP_CHUNK_ROWS // ((last - first).days + 1)))
+    for index in range(0, len(pairs), size):
+        yield pairs[index:index + size]
+
+
+def refresh_price_rollups(start=None, end=None, pairs=None):
+    """Recompute the rollups between ``start`` and ``end`` for ``pairs`` of (crop_key, market_key).
+
+    Missing bounds or ``pairs=None`` mean everything. Each chunk of pairs is
+    replaced in its own transaction. Days before the archive cutoff keep
+    their stored rollups. Returns the number of daily and weekly rows written.
+    """
+    prices = MarketPrice.objects.all()
+    rollups = PriceRollup.objects.all()
+    floor = archive_floor(MarketPrice)
+    archived = Q()
+    if floor is not None:
+        floor = timezone.localtime(floor).date()
+        archived = Q(resolution='day', period_start__lt=floor)
+    if start is not None:
+        start = week_start(start)
+        prices = prices.filter(date_recorded__gte=start)
+        rollups = rollups.filter(period_start__gte=start)
+    if end is not None:
+        end = week_start(end) + timedelta(days=6)
+        prices = prices.filter(date_recorded__lte=end)
+        rollups = rollups.filter(period_start__lte=end)
+    if pairs is None:
+        # Pairs with stale rollups but no prices left are refreshed (emptied) too
+        pairs = set(prices.values_list('crop_key', 'market_key').distinct())
+        pairs |= set(rollups.values_list('crop_key', 'market_key').distinct())
+    if not pairs:
+        return 0, 0
+    if start is None or end is None:
+        bounds = prices.aggregate(first=Min('date_recorded'), last=Max('date_recorded'))
+        first, last = start or bounds['first'] or date.today(), end or bounds['last'] or date.today()
+    else:
+        first, last = start, end
+
+    day_count = week_count = 0
+    for chunk in pair_chunks(pairs, first, last):
+        fresh = prices.filter(pair_filter(chunk))
+        kept = []
+        if floor is not None:
+            fresh = fresh.filter(date_recorded__gte=floor)
+            kept = list(rollups.filter(archived, pair_filter(chunk)))
+        days = daily_rollups(fresh)
+        weeks = weekly_rollups(sorted(kept + days, key=lambda day: (day.crop_key, day.market_key, day.period_start)))
+        with transaction.atomic():
+            rollups.filter(pair_filter(chunk)).exclude(archived).delete()
+            PriceRollup.objects.bulk_create(days + weeks, batch_size=1000)
+        day_count += len(days)
+        week_count += len(weeks)
+    return day_count, week_count
+
+
+LATEST_FIELDS = ['crop_key', 'market_key', 'crop_name', 'market_location', 'price_per_kg', 'date_recorded', 'source']
+
+
+def latest_price_rows(prices):
+    """The newest row of each (crop_key, market_key) pair in ``prices``, in one query"""
+    if connection.vendor == 'postgresql':
+        return prices.order_by('crop_key', 'market_key', '-date_recorded', '-id').distinct('crop_key', 'market_key')
+    return prices.annotate(recency=Window(
+        RowNumber(),
+        partition_by=[F('crop_key'), F('market_key')],
+        order_by=[F('date_recorded').desc(), F('id').desc()],
+    )).filter(recency=1)
+
+
+def refresh_latest_prices(pairs=None):
+    """Recompute LatestMarketPrice for ``pairs`` of (crop_key, market_key), or all pairs.
+
+    Returns the number of rows written.
+    """
+    prices = MarketPrice.objects.all()
+    current = LatestMarketPrice.objects.all()
+    if pairs is not None:
+        if not pairs:
+            return 0
+        prices = prices.filter(pair_filter(pairs))
+        current = current.filter(pair_filter(pairs))
+    rows = latest_price_models(prices)
+    # Pairs that no longer have any price, e.g. after a crop was renamed
+    missing = set(current.values_list('crop_key', 'market_key')) - {(row.crop_key, row.market_key) for row in rows}
+    with transaction.atomic():
+        if missing:
+            LatestMarketPrice.objects.filter(pair_filter(missing)).delete()
+        upsert_latest_prices(rows)
+    return len(rows)
+
+
+def latest_price_models(prices):
+    return [
+        LatestMarketPrice(price_id=row.pop('id'), **row)
+        for row in latest_price_rows(prices).values('id', *LATEST_FIELDS)
+    ]
+
+
+def upsert_latest_prices(rows):
+    LatestMarketPrice.objects.bulk_create(
+        rows, batch_size=1000, update_conflicts=True, unique_fields=['crop_key', 'market_key'],
+        update_fields=['price', *LATEST_FIELDS[2:], 'updated_at'],
+    )
+
+
+def advance_latest_prices(spans):
+    """Move LatestMarketPrice forward to the newest rows written within ``spans``.
+
+    Only rows dated on or after a pair's current latest price are read, and
+    pairs whose writes are all older are skipped, so the cost follows what
+    was written rather than the length of each pair's history. Returns the
+    number of rows written.
+    """
+    written = 0
+    pairs = sorted(spans)
+    for index in range(0, len(pairs), MAX_PAIR_FILTER):
+        chunk = pairs[index:index + MAX_PAIR_FILTER]
+        current = {
+            (crop_key, market_key): day for crop_key, market_key, day in
+            LatestMarketPrice.objects.filter(pair_filter(chunk)).values_list('crop_key', 'market_key', 'date_recorded')
+        }
+        newer = Q()
+        for pair in chunk:
+            first, last = spans[pair]
+            since = current.get(pair, first)
+            if last >= since:
+                newer |= Q(crop_key=pair[0], market_key=pair[1], date_recorded__gte=since)
+        if not newer:
+            continue
+        rows = latest_price_models(MarketPrice.objects.filter(newer))
+        upsert_latest_prices(rows)
+        written += len(rows)
+    return written
+
+
+def refresh_for_prices(spans):
+    """Refresh the rollups and latest prices touched by ``spans``.
+
+    ``spans`` maps (crop_key, market_key) pairs to the first and last date
+    written. Pairs whose spans cover the same weeks are refreshed together.
+    """
+    if not spans:
+        return
+    ranges = defaultdict(list)
+    for pair, (first, last) in spans.items():
+        ranges[(week_start(first), week_start(last))].append(pair)
+    for (start, end), pairs in sorted(ranges.items()):
+        refresh_price_rollups(start, end, pairs)
+    advance_latest_prices(spans)
+
+
+def price_history(crop, markets=None, resolution='day', start=None, end=None):
+    """Rollup series for a crop, one per mandi, between ``start`` and ``end``"""
+    rollups = PriceRollup.objects.filter(resolution=resolution, crop_key=normalize_key(crop))
+    if markets:
+        rollups = rollups.filter(market_key__in=[normalize_key(market) for market in markets])
+    if start:
+        rollups = rollups.filter(period_start__gte=week_start(start) if resolution == 'week' else start)
+    if end:
+        rollups = rollups.filter(period_start__lte=end)
+    series = {}
+    for row in rollups.order_by('market_key', 'period_start').values(
+        'market_key', 'market_location', 'period_start', 'open_price', 'high_price',
+        'low_price', 'close_price', 'mean_price', 'samples',
+    ):
+        market = series.setdefault(row.pop('market_key'), {'market': row['market_location'], 'points': []})
+        market['market'] = row.pop('market_location')
+        market['points'].append({
+            'period': row['period_start'],
+            'open': row['open_price'],
+            'high': row['high_price'],
+            'low': row['low_price'],
+            'close': row['close_price'],
+            'mean': row['mean_price'],
+            'samples': row['samples'],
+        })
+    return list(series.values())
+
+
+def default_range(resolution, end=None):
+    """The last 90 days, or the last 52 weeks, up to ``end`` (today by default)"""
+    end = end or date.today()
+    return end - timedelta(days=89 if resolution == 'day' else 7 * 52 - 1), end
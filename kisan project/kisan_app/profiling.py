@@ -0,0 +1,162 @@
+"""Opt-in per-request profiling.
+
+With ``KISAN_PROFILING`` enabled, ``ProfilingMiddleware`` records the query
+count, repeated queries, SQL time, template render time and the remaining
+Python time of every request, sends them as a ``Server-Timing`` header
+(shown in the browser's network panel) and keeps the slowest requests of
+this process for the admin-only ``profiling`` view.
+
+When the setting is off the middleware raises ``MiddlewareNotUsed`` and
+Django drops it from the stack, so it costs nothing.
+
+Queries that ``parallel.gather_queries`` runs on its pool threads count
+towards the request too. They overlap each other, so ``sql_ms`` is the
+summed query time and can exceed the wall-clock time they took.
+"""
+import heapq
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.template.backends.django import Template
+from django.utils import timezone
+
+_current = ContextVar('kisan_profile', default=None)
+_slowest = []
+_lock = threading.Lock()
+_sequence = 0
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = Counter()
+        self.sql_seconds = 0.0
+        self.template_sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.rendering = 0
+        # Pool threads record their queries concurrently with the request thread
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.sql_seconds += elapsed
+                if self.rendering:
+                    self.template_sql_seconds += elapsed
+                self.queries[(sql, repr(params))] += 1
+
+    def summary(self, request, response):
+        total = time.perf_counter() - self.started
+        # Queries run lazily from templates belong to SQL, not rendering
+        template = self.template_seconds - self.template_sql_seconds
+        repeated = Counter()
+        for (sql, _), count in self.queries.items():
+            repeated[sql] += count
+        return {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'at': timezone.now().isoformat(),
+            'total_ms': round(total * 1000, 2),
+            'sql_ms': round(self.sql_seconds * 1000, 2),
+            'template_ms': round(template * 1000, 2),
+            'python_ms': round(max(total - self.sql_seconds - template, 0) * 1000, 2),
+            'queries': sum(self.queries.values()),
+            'duplicate_queries': sum(count - 1 for count in self.queries.values()),
+            'repeated_sql': [
+                {'sql': sql, 'count': count} for sql, count in repeated.most_common(5) if count > 1
+            ],
+        }
+
+
+@contextmanager
+def profiled_queries():
+    """Count this thread's queries towards the request being profiled, if any"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    with connection.execute_wrapper(profile):
+        yield
+
+
+def render_with_timing(render):
+    def wrapper(self, *args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return render(self, *args, **kwargs)
+        profile.rendering += 1
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            profile.rendering -= 1
+            if not profile.rendering:
+                profile.template_seconds += time.perf_counter() - start
+    wrapper.profiled = True
+    return wrapper
+
+
+def server_timing(summary):
+    return ', '.join([
+        f'sql;dur={summary["sql_ms"]};desc="{summary["queries"]} queries, {summary["duplicate_queries"]} duplicates"',
+        f'tmpl;dur={summary["template_ms"]};desc="Templates"',
+        f'app;dur={summary["python_ms"]};desc="Python"',
+        f'total;dur={summary["total_ms"]}',
+    ])
+
+
+def remember(summary):
+    """Keep the summary if it is among the slowest ``KISAN_PROFILING_SLOWEST``"""
+    global _sequence
+    limit = settings.KISAN_PROFILING_SLOWEST
+    with _lock:
+        _sequence += 1
+        entry = (summary['total_ms'], _sequence, summary)
+        if len(_slowest) < limit:
+            heapq.heappush(_slowest, entry)
+        elif entry > _slowest[0]:
+            heapq.heapreplace(_slowest, entry)
+
+
+def slowest_requests():
+    with _lock:
+        return [summary for _, _, summary in sorted(_slowest, reverse=True)]
+
+
+def clear_profiles():
+    with _lock:
+        _slowest.clear()
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.KISAN_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if not getattr(Template.render, 'profiled', False):
+            Template.render = render_with_timing(Template.render)
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            with connection.execute_wrapper(profile):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        summary = profile.summary(request, response)
+        response['Server-Timing'] = server_timing(summary)
+        remember(summary)
+        return response
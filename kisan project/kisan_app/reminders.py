@@ -0,0 +1,85 @@
+"""Harvest reminders for every crop, generated in bulk.
+
+Each pending crop (not Harvested or Sold) is sent one reminder as it enters
+the 7, 3 and 1 day windows before its harvest date and one once it is
+overdue. The window is computed in SQL, and crops that already have a
+reminder for that window and harvest date are dropped with a NOT EXISTS
+anti-join, so the work depends on the number of crops due rather than
+the number of farmers, and running it twice in a day sends nothing new.
+A missed run only sends the window the crop is in now, not every window
+it passed through.
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Case, CharField, Exists, OuterRef, Value, When
+
+from .cache import bump_version
+from .models import Crop, Notification
+from .notifications import refresh_unread_counts
+
+# Days before harvest, from the last window to the first
+WINDOWS = [1, 3, 7]
+# Statuses that end a crop's reminders
+DONE = ['Harvested', 'Sold']
+BATCH_SIZE = 2000
+
+
+def window_expression(today):
+    """The reminder window each crop's harvest_date falls in, as of ``today``"""
+    return Case(
+        When(harvest_date__lt=today, then=Value('overdue')),
+        *[When(harvest_date__lte=today + timedelta(days=days), then=Value(str(days))) for days in WINDOWS],
+        output_field=CharField(),
+    )
+
+
+def due_crops(today):
+    sent = Notification.objects.filter(
+        notification_type='harvest_reminder',
+        crop=OuterRef('pk'),
+        reminder_window=OuterRef('window'),
+        harvest_date=OuterRef('harvest_date'),
+    )
+    return Crop.objects.exclude(status__in=DONE).filter(
+        harvest_date__lte=today + timedelta(days=max(WINDOWS)),
+    ).annotate(window=window_expression(today)).filter(~Exists(sent)).order_by()
+
+
+def reminder(crop, today):
+    harvest_on = crop['harvest_date'].strftime('%B %d, %Y')
+    if crop['window'] == 'overdue':
+        days = (today - crop['harvest_date']).days
+        message = (f"Your {crop['name']} crop was due for harvest on {harvest_on}, {days} day"
+                   f"{'s' if days != 1 else ''} ago. Update its status once it is harvested.")
+    else:
+        message = (f"Your {crop['name']} crop is scheduled for harvest on {harvest_on}. "
+                   f"Please prepare for harvesting activities.")
+    return Notification(
+        farmer_id=crop['farmer_id'],
+        crop_id=crop['id'],
+        title=f"Harvest Reminder: {crop['name']}",
+        message=message,
+        notification_type='harvest_reminder',
+        reminder_window=crop['window'],
+        harvest_date=crop['harvest_date'],
+    )
+
+
+def generate_harvest_reminders(today=None):
+    """Create the reminders due ``today``; returns the count per window"""
+    today = today or date.today()
+    crops = list(due_crops(today).values('id', 'name', 'farmer_id', 'harvest_date', 'window'))
+    counts = dict.fromkeys([window for window, _ in Notification.REMINDER_WINDOWS], 0)
+    if not crops:
+        return counts
+    with transaction.atomic():
+        # ignore_conflicts covers a concurrent run racing past the anti-join
+        Notification.objects.bulk_create(
+            [reminder(crop, today) for crop in crops], batch_size=BATCH_SIZE, ignore_conflicts=True,
+        )
+        refresh_unread_counts({crop['farmer_id'] for crop in crops})
+    for crop in crops:
+        counts[crop['window']] += 1
+    bump_version(Notification)
+    return counts
@@ -0,0 +1,193 @@
+"""Retention for the append-only tables.
+
+Each entry in ``RETAINED`` names a hot table, the column that ages its
+rows and the rows that must stay. ``settings.KISAN_RETENTION`` sets how
+many days each table keeps. ``archive_old_rows`` moves older rows into
+ArchivedRecord (or gzipped JSON Lines files) oldest first, in batches of
+``batch_size``, each in its own short transaction, so readers and writers
+are never blocked for long and the job can be stopped and resumed at any
+point.
+
+Rows are deleted with plain DELETEs. The per-row signal handlers would
+otherwise recompute rollups for every archived row. Before the first row
+goes, the cutoff is recorded in ArchiveCutoff. Rollup refreshes and
+rebuilds keep the rollups of the periods before it rather than recompute
+them from the rows left behind, so the price and weather rollups keep
+covering the archived periods. Those periods are frozen from then on:
+later writes dated before the cutoff no longer change their rollups.
+Cutoffs of timestamped tables are rounded down to the hour so no hourly
+rollup straddles it. Rows that are still the latest price or reading of
+their pair or location are never archived, nor are the harvest reminders
+of crops still waiting to be harvested, which stop them being sent again.
+"""
+import gzip
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import bump_version
+from .models import (ArchiveCutoff, ArchivedRecord, Crop, LatestMarketPrice, LatestWeather, MarketPrice, Notification,
+                     PriceAlertRule, WeatherData)
+from .notifications import refresh_unread_counts
+from .reminders import DONE
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+@dataclass
+class Retained:
+    model: type
+    date_field: str
+    # Rows that stay whatever their age, when the policy's option is on
+    keep: dict = field(default_factory=dict)
+    # Rows that stay whatever their age and the policy
+    always_keep: tuple = ()
+    # (model, column) pairs holding ids that must not be archived
+    referenced_by: tuple = ()
+    # (model, field) foreign keys cleared when their row is archived
+    nullify: tuple = ()
+
+
+RETAINED = {
+    'notifications': Retained(
+        Notification, 'created_at', keep={'keep_unread': Q(is_read=False)},
+        # reminders.due_crops looks for these to know a window was already sent
+        always_keep=(Q(notification_type='harvest_reminder', crop__in=Crop.objects.exclude(status__in=DONE)),),
+    ),
+    'weather': Retained(WeatherData, 'date_recorded', referenced_by=((LatestWeather, 'reading_id'),)),
+    'prices': Retained(
+        MarketPrice, 'date_recorded',
+        referenced_by=((LatestMarketPrice, 'price_id'),),
+        nullify=((PriceAlertRule, 'last_price'),),
+    ),
+}
+
+
+def cutoff(retained, days, now=None):
+    """Rows recorded before this are archived"""
+    moment = timezone.localtime((now or timezone.now()) - timedelta(days=days))
+    if isinstance(retained.model._meta.get_field(retained.date_field), models.DateTimeField):
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.date()
+
+
+def archive_floor(model):
+    """The moment before which rows of ``model`` may have been archived, or None"""
+    return ArchiveCutoff.objects.filter(model=model._meta.label_lower).values_list('archived_before', flat=True).first()
+
+
+def record_cutoff(model, before):
+    """Remember that rows of ``model`` before ``before`` are being archived; the floor never moves back"""
+    before = recorded_at(before)
+    floor = archive_floor(model)
+    if floor is None or before > floor:
+        ArchiveCutoff.objects.update_or_create(model=model._meta.label_lower, defaults={'archived_before': before})
+
+
+def expired(retained, policy, now=None):
+    rows = retained.model.objects.filter(**{f'{retained.date_field}__lt': cutoff(retained, policy['days'], now)})
+    for option, condition in retained.keep.items():
+        if policy.get(option):
+            rows = rows.exclude(condition)
+    for condition in retained.always_keep:
+        rows = rows.exclude(condition)
+    for model, column in retained.referenced_by:
+        rows = rows.exclude(id__in=model.objects.values(column))
+    return rows
+
+
+def recorded_at(value):
+    if isinstance(value, datetime):
+        return value
+    return timezone.make_aware(datetime.combine(value, datetime.min.time()))
+
+
+def delete_ids(model, ids):
+    """DELETE by primary key without collecting rows or sending signals"""
+    table = connection.ops.quote_name(model._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", ids)
+
+
+class JSONLinesArchive:
+    """Appends archived rows to DIRECTORY/<name>-<timestamp>.jsonl.gz"""
+
+    def __init__(self, directory, name):
+        os.makedirs(directory, exist_ok=True)
+        stamp = timezone.now().strftime('%Y%m%dT%H%M%S')
+        self.path = os.path.join(directory, f'{name}-{stamp}.jsonl.gz')
+
+    def write(self, rows):
+        with gzip.open(self.path, 'at', encoding='utf-8') as handle:
+            for row in rows:
+                handle.write(json.dumps(row, cls=DjangoJSONEncoder, separators=(',', ':')) + '\n')
+
+
+def archive_batch(retained, rows, archive=None):
+    """Move one batch of row dicts out of the hot table; returns how many moved"""
+    ids = [row['id'] for row in rows]
+    label = retained.model._meta.label_lower
+    with transaction.atomic():
+        if archive is None:
+            ArchivedRecord.objects.bulk_create([
+                ArchivedRecord(model=label, original_id=row['id'], recorded_at=recorded_at(row[retained.date_field]),
+                               data=row)
+                for row in rows
+            ], ignore_conflicts=True)
+        for model, name in retained.nullify:
+            model.objects.filter(**{f'{name}_id__in': ids}).update(**{name: None})
+        delete_ids(retained.model, ids)
+    # Written after the commit so a failed batch leaves no duplicate lines
+    if archive is not None:
+        archive.write(rows)
+    return len(ids)
+
+
+def archive_old_rows(name, days=None, batch_size=DEFAULT_BATCH_SIZE, archive_dir=None, pause=0.0,
+                     dry_run=False, now=None, on_batch=None):
+    """Archive the rows of ``RETAINED[name]`` older than its retention; returns the count"""
+    retained = RETAINED[name]
+    policy = dict(settings.KISAN_RETENTION.get(name, {}))
+    if days is not None:
+        policy['days'] = days
+    if 'days' not in policy:
+        raise ValueError(f"No retention period configured for {name}")
+    rows = expired(retained, policy, now)
+    if dry_run:
+        return rows.count()
+
+    archive = JSONLinesArchive(archive_dir, name) if archive_dir else None
+    columns = [f.attname for f in retained.model._meta.concrete_fields]
+    moved = 0
+    farmers = set()
+    while True:
+        # Each batch re-runs the query, so rows archived so far are never read twice
+        batch = list(rows.order_by(retained.date_field, 'id').values(*columns)[:batch_size])
+        if not batch:
+            break
+        if not moved:
+            # Before any row goes, so a refresh can never rebuild a half-archived period
+            record_cutoff(retained.model, cutoff(retained, policy['days'], now))
+        moved += archive_batch(retained, batch, archive)
+        if retained.model is Notification:
+            farmers.update(row['farmer_id'] for row in batch if not row['is_read'])
+        if on_batch:
+            on_batch(moved)
+        if len(batch) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    if farmers:
+        refresh_unread_counts(farmers)
+    if moved:
+        bump_version(retained.model)
+    return moved
@@ -0,0 +1,72 @@
+"""Read replica routing for the read-heavy pages and the JSON API.
+
+``ReplicaMiddleware`` marks GET requests to the views named in
+``settings.KISAN_REPLICA_ROUTES``, and ``ReplicaRouter`` sends the reads
+they make to a random alias of ``settings.KISAN_READ_REPLICAS``. Writes,
+and the reads of every other request (sessions, admin, forms), stay on
+``default``.
+
+After a visitor's successful POST the middleware sets a cookie that keeps
+their reads on ``default`` for ``settings.KISAN_REPLICA_LAG`` seconds, so
+they see their own writes (the unread badge after marking notifications
+read, a new crop in the list) while the replicas catch up. With no
+replicas configured nothing changes.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+PIN_COOKIE = 'kisan_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica_reads = ContextVar('kisan_replica_reads', default=False)
+
+
+def replicas():
+    return settings.KISAN_READ_REPLICAS
+
+
+def reading_from_replica():
+    """Whether reads in the current request go to a replica"""
+    return _replica_reads.get() and bool(replicas())
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return random.choice(replicas())
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Rows read from a replica must still be saved to the primary
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        if db in replicas():
+            return False
+        return None
+
+
+class ReplicaMiddleware(MiddlewareMixin):
+    """Route the reads of KISAN_REPLICA_ROUTES to replicas, except for visitors who just wrote"""
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (replicas() and request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES
+                and request.resolver_match.view_name in settings.KISAN_REPLICA_ROUTES):
+            _replica_reads.set(True)
+
+    def process_response(self, request, response):
+        # WSGI threads keep their context between requests
+        _replica_reads.set(False)
+        if request.method not in SAFE_METHODS and response.status_code < 400 and replicas():
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.KISAN_REPLICA_LAG, httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,219 @@
+"""Search backends for the farmers and crops search boxes.
+
+The search box used to OR together ``icontains`` filters, which turn into
+``LIKE '%x%'`` scans that no index can serve. The backend is now picked per
+database:
+
+* PostgreSQL: full-text search over an indexed ``to_tsvector`` expression
+  plus trigram similarity on names (migration 0004 creates the GIN indexes).
+* SQLite: FTS5 shadow tables kept in sync by the signal handlers in
+  ``signals.py``, ranked with bm25. The FTS table is joined into the main
+  query, so the view's other filters and the ordering apply to every match.
+* Anything else, or SQLite built without FTS5: the original ``icontains``.
+
+Every backend returns the queryset filtered to matches and annotated with a
+``search_rank`` (higher is better) so views can order by relevance.
+Set ``KISAN_SEARCH_BACKEND`` to 'postgres', 'fts5' or 'basic' to override
+the automatic choice.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+FARMER_FIELDS = ['name', 'phone', 'email', 'address']
+CROP_FIELDS = ['name', 'season']
+
+FARMER_FTS_TABLE = 'kisan_app_farmer_fts'
+CROP_FTS_TABLE = 'kisan_app_crop_fts'
+
+# Full-text config without stemming: names, phone numbers and villages
+# should match as typed
+TEXT_SEARCH_CONFIG = 'simple'
+
+
+def no_results(queryset):
+    return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def search_terms(query):
+    """Split a search string into plain word tokens"""
+    return re.findall(r'\w+', query or '')
+
+
+class BasicSearchBackend:
+    """Case-insensitive substring match; works everywhere, uses no index"""
+
+    def search_farmers(self, queryset, query):
+        condition = Q()
+        for field in FARMER_FIELDS:
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    def search_crops(self, queryset, query):
+        condition = Q(farmer__name__icontains=query)
+        for field in CROP_FIELDS:
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    def index_farmer(self, farmer):
+        pass
+
+    def remove_farmer(self, farmer_id):
+        pass
+
+    def index_crop(self, crop):
+        pass
+
+    def remove_crop(self, crop_id):
+        pass
+
+    def rebuild(self):
+        """Re-index every row, for use after writes that skip signals"""
+
+
+class PostgresSearchBackend(BasicSearchBackend):
+    """Prefix full-text search plus trigram similarity, both GIN-indexed"""
+
+    @staticmethod
+    def vector(fields):
+        from django.contrib.postgres.search import SearchVector
+        # Must match the indexed expression in migration 0004 exactly
+        return SearchVector(*fields, config=TEXT_SEARCH_CONFIG)
+
+    @staticmethod
+    def query(query):
+        from django.contrib.postgres.search import SearchQuery
+        terms = search_terms(query)
+        raw = ' & '.join(f'{term}:*' for term in terms)
+        return SearchQuery(raw, search_type='raw', config=TEXT_SEARCH_CONFIG)
+
+    def ranked(self, queryset, fields, query, extra=Q()):
+        from django.contrib.postgres.search import SearchRank, TrigramSimilarity
+        if not search_terms(query):
+            return no_results(queryset)
+        search_query = self.query(query)
+        vector = self.vector(fields)
+        return queryset.annotate(document=vector).filter(
+            Q(document=search_query) | Q(name__trigram_similar=query) | extra
+        ).annotate(
+            search_rank=SearchRank(vector, search_query) + TrigramSimilarity('name', query)
+        )
+
+    def search_farmers(self, queryset, query):
+        return self.ranked(queryset, FARMER_FIELDS, query)
+
+    def search_crops(self, queryset, query):
+        from .models import Farmer
+        # Only the farmer's name, as in the FTS5 table and the basic backend;
+        # crop search must not match on phone numbers or addresses
+        farmers = self.ranked(Farmer.objects.all(), ['name'], query).values('id')
+        return self.ranked(queryset, CROP_FIELDS, query, extra=Q(farmer__in=farmers))
+
+
+class FTS5SearchBackend(BasicSearchBackend):
+    """SQLite FTS5 shadow tables with prefix matching and bm25 ranking"""
+
+    @staticmethod
+    def match_expression(query):
+        # Quote every token so punctuation can't be read as FTS5 syntax
+        return ' AND '.join(f'"{term}"*' for term in search_terms(query))
+
+    def ranked(self, queryset, table, query):
+        expression = self.match_expression(query)
+        if not expression:
+            return no_results(queryset)
+        quote = connection.ops.quote_name
+        row_id = f'{quote(queryset.model._meta.db_table)}.{quote("id")}'
+        # Join the FTS table so MATCH runs once and every match is filtered and
+        # ordered in SQL. The unary + keeps SQLite from probing the FTS table
+        # once per model row, which re-runs the MATCH each time.
+        return queryset.extra(
+            tables=[table], where=[f'{row_id} = +{table}.rowid', f'{table} MATCH %s'], params=[expression],
+        ).annotate(
+            # rank is FTS5's bm25 score, lower-is-better; negate so search_rank is higher-is-better
+            search_rank=RawSQL(f'-{table}.rank', [], output_field=FloatField()),
+        )
+
+    def search_farmers(self, queryset, query):
+        return self.ranked(queryset, FARMER_FTS_TABLE, query)
+
+    def search_crops(self, queryset, query):
+        return self.ranked(queryset, CROP_FTS_TABLE, query)
+
+    def index_farmer(self, farmer):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FARMER_FTS_TABLE} WHERE rowid = %s', [farmer.pk])
+            cursor.execute(
+                f'INSERT INTO {FARMER_FTS_TABLE} (rowid, name, phone, email, address) VALUES (%s, %s, %s, %s, %s)',
+                [farmer.pk, farmer.name, farmer.phone, farmer.email or '', farmer.address],
+            )
+            # Crops are searchable by farmer name, so keep their rows current
+            cursor.execute(
+                f'UPDATE {CROP_FTS_TABLE} SET farmer_name = %s '
+                f'WHERE rowid IN (SELECT id FROM kisan_app_crop WHERE farmer_id = %s)',
+                [farmer.name, farmer.pk],
+            )
+
+    def remove_farmer(self, farmer_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FARMER_FTS_TABLE} WHERE rowid = %s', [farmer_id])
+
+    def index_crop(self, crop):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {CROP_FTS_TABLE} WHERE rowid = %s', [crop.pk])
+            cursor.execute(
+                f'INSERT INTO {CROP_FTS_TABLE} (rowid, name, farmer_name, season) VALUES (%s, %s, %s, %s)',
+                [crop.pk, crop.name, crop.farmer.name, crop.season],
+            )
+
+    def remove_crop(self, crop_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {CROP_FTS_TABLE} WHERE rowid = %s', [crop_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FARMER_FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FARMER_FTS_TABLE} (rowid, name, phone, email, address) '
+                f"SELECT id, name, phone, COALESCE(email, ''), address FROM kisan_app_farmer"
+            )
+            cursor.execute(f'DELETE FROM {CROP_FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {CROP_FTS_TABLE} (rowid, name, farmer_name, season) '
+                f'SELECT c.id, c.name, f.name, c.season FROM kisan_app_crop c '
+                f'JOIN kisan_app_farmer f ON f.id = c.farmer_id'
+            )
+
+
+BACKENDS = {
+    'basic': BasicSearchBackend,
+    'postgres': PostgresSearchBackend,
+    'fts5': FTS5SearchBackend,
+}
+
+
+_fts5_available = {}
+
+
+def fts5_tables_exist():
+    """Whether migration 0004 created the FTS5 tables; checked once per database"""
+    name = str(connection.settings_dict['NAME'])
+    if name not in _fts5_available:
+        _fts5_available[name] = FARMER_FTS_TABLE in connection.introspection.table_names()
+    return _fts5_available[name]
+
+
+def get_search_backend():
+    """Return the backend configured in settings, or the best one for the database"""
+    name = getattr(settings, 'KISAN_SEARCH_BACKEND', None)
+    if not name:
+        if connection.vendor == 'postgresql':
+            name = 'postgres'
+        elif connection.vendor == 'sqlite' and fts5_tables_exist():
+            name = 'fts5'
+        else:
+            name = 'basic'
+    return BACKENDS[name]()
@@ -0,0 +1,332 @@
+"""Synthetic data generator for load testing.
+
+Rows are generated in fixed-size chunks, each with its own RNG seeded from
+(seed, table, chunk number), and farmers get explicit ids numbered from
+the first free id, so crops and notifications pick the same owners however
+the farmer chunks are scheduled. The output therefore depends only on the
+seed and the requested sizes, not on the number of worker processes or the
+order in which chunks finish. Chunks are written with ``bulk_create``,
+either in this process or across a multiprocessing pool.
+"""
+import contextlib
+import math
+import multiprocessing
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from .analytics import rebuild_snapshots
+from .cache import bump_version
+from .models import (AnalyticsSnapshot, ArchiveCutoff, ArchivedRecord, Farmer, Crop, CropCategory, LatestMarketPrice,
+                     LatestWeather, MarketPrice, PriceAlertRule, PriceRollup, WeatherData, WeatherRollup, Notification)
+from .notifications import refresh_unread_counts
+from .price_history import refresh_latest_prices, refresh_price_rollups
+from .search import get_search_backend
+from .weather import refresh_latest_weather, refresh_weather_rollups
+
+CHUNK_SIZE = 10000
+
+FIRST_NAMES = [
+    'Ramesh', 'Suresh', 'Mahesh', 'Ganesh', 'Rajesh', 'Anil', 'Sunil', 'Vijay', 'Sanjay', 'Ajay',
+    'Lakshmi', 'Sunita', 'Anita', 'Kavita', 'Savita', 'Meena', 'Geeta', 'Rekha', 'Asha', 'Usha',
+    'Harpreet', 'Gurpreet', 'Murugan', 'Venkatesh', 'Srinivas', 'Prakash', 'Dinesh', 'Mukesh',
+]
+LAST_NAMES = [
+    'Patil', 'Jadhav', 'Pawar', 'Shinde', 'Yadav', 'Singh', 'Kumar', 'Sharma', 'Verma', 'Reddy',
+    'Naidu', 'Gowda', 'Patel', 'Chaudhary', 'Gill', 'Sandhu', 'Das', 'Mandal', 'Nair', 'Pillai',
+]
+DISTRICTS = [
+    ('Nashik', 'Maharashtra'), ('Pune', 'Maharashtra'), ('Ludhiana', 'Punjab'), ('Karnal', 'Haryana'),
+    ('Guntur', 'Andhra Pradesh'), ('Mandya', 'Karnataka'), ('Indore', 'Madhya Pradesh'),
+    ('Rajkot', 'Gujarat'), ('Thanjavur', 'Tamil Nadu'), ('Bardhaman', 'West Bengal'),
+    ('Meerut', 'Uttar Pradesh'), ('Kota', 'Rajasthan'),
+]
+MARKETS = [
+    'Delhi Mandi', 'Mumbai APMC', 'Pune Market', 'Bangalore Market', 'Chennai Wholesale',
+    'Lasalgaon APMC', 'Indore Mandi', 'Unjha APMC', 'Guntur Mirchi Yard', 'Khanna Mandi',
+]
+WEATHER_LOCATIONS = ['Delhi', 'Mumbai', 'Pune', 'Bangalore', 'Chennai', 'Ahmedabad', 'Jaipur', 'Lucknow']
+
+CATEGORIES = {
+    'Cereals': ('Grains like wheat, rice, corn', '🌾'),
+    'Pulses': ('Legumes like lentils, chickpeas', '🫘'),
+    'Cash Crops': ('Cotton, sugarcane, tobacco', '💰'),
+    'Vegetables': ('Fresh vegetables and greens', '🥬'),
+    'Spices': ('Herbs and spices', '🌶️'),
+    'Fruits': ('Seasonal and perennial fruits', '🍎'),
+}
+
+# name: (category, season, relative frequency, price range per kg, yield in kg per acre)
+CROP_CATALOG = {
+    'Wheat': ('Cereals', 'Rabi', 20, (20, 30), 1800),
+    'Rice': ('Cereals', 'Kharif', 22, (18, 45), 2200),
+    'Maize': ('Cereals', 'Kharif', 8, (16, 24), 2500),
+    'Chickpea': ('Pulses', 'Rabi', 6, (45, 70), 500),
+    'Soybean': ('Pulses', 'Kharif', 7, (38, 55), 450),
+    'Cotton': ('Cash Crops', 'Kharif', 9, (55, 75), 600),
+    'Sugarcane': ('Cash Crops', 'Annual', 6, (3, 4), 32000),
+    'Onions': ('Vegetables', 'Rabi', 5, (8, 40), 9000),
+    'Tomatoes': ('Vegetables', 'Zaid', 5, (6, 35), 10000),
+    'Potatoes': ('Vegetables', 'Rabi', 5, (8, 20), 9500),
+    'Chili': ('Spices', 'Kharif', 3, (80, 180), 800),
+    'Turmeric': ('Spices', 'Kharif', 2, (70, 140), 2400),
+    'Mango': ('Fruits', 'Annual', 2, (40, 200), 3000),
+}
+WEATHER_CONDITIONS = ['Sunny', 'Clear', 'Partly Cloudy', 'Cloudy', 'Overcast', 'Rainy']
+
+# Worker state, set once per process by _init_worker
+_context = {}
+
+
+def chunk_rng(seed, table, chunk):
+    return random.Random(f'{seed}:{table}:{chunk}')
+
+
+def chunk_sizes(total, size=CHUNK_SIZE):
+    return [min(size, total - start) for start in range(0, total, size)]
+
+
+def money(value):
+    return Decimal(value).quantize(Decimal('0.01'))
+
+
+def build_farmers(rng, chunk, count):
+    farmers = []
+    for offset in range(count):
+        number = chunk * CHUNK_SIZE + offset
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        district, state = rng.choice(DISTRICTS)
+        farmers.append(Farmer(
+            id=_context['first_farmer_id'] + number,
+            name=f"{first} {last}",
+            phone=f"{rng.choice('6789')}{rng.randrange(10 ** 9):09d}",
+            email=f"{first.lower()}.{last.lower()}{number}@example.com" if rng.random() < 0.35 else None,
+            address=f"Village {rng.randint(1, 400)}, {district}, {state}",
+            experience_years=int(rng.triangular(0, 45, 12)),
+            # Mostly smallholdings: median around two acres with a long tail
+            land_area=money(min(rng.lognormvariate(0.7, 0.8), 500)),
+        ))
+    return farmers
+
+
+def build_crops(rng, chunk, count):
+    names = list(CROP_CATALOG)
+    weights = [CROP_CATALOG[name][2] for name in names]
+    today = date.today()
+    crops = []
+    for _ in range(count):
+        name = rng.choices(names, weights)[0]
+        category, season, _, (low, high), yield_per_acre = CROP_CATALOG[name]
+        acres = min(rng.lognormvariate(0.3, 0.7), 50)
+        quantity = yield_per_acre * acres * rng.uniform(0.7, 1.2)
+        price = rng.uniform(low, high)
+        harvest_date = today + timedelta(days=int(rng.gauss(20, 120)))
+        if harvest_date < today:
+            # Most past harvests are done; the rest are overdue
+            status = rng.choices(['Harvested', 'Sold', 'Ready', 'Growing'], [45, 40, 10, 5])[0]
+        else:
+            status = rng.choices(['Planted', 'Growing', 'Ready'], [40, 50, 10])[0]
+        crops.append(Crop(
+            name=name,
+            category_id=_context['categories'][category],
+            season=season,
+            status=status,
+            price_per_kg=money(price),
+            farmer_id=rng.choice(_context['farmer_ids']),
+            quantity=money(quantity),
+            planted_date=harvest_date - timedelta(days=rng.randint(60, 150)),
+            harvest_date=harvest_date,
+            actual_harvest_date=harvest_date + timedelta(days=rng.randint(-5, 10)) if status in ('Harvested', 'Sold') else None,
+            investment_cost=money(quantity * price * rng.uniform(0.3, 0.7)),
+        ))
+    return crops
+
+
+def build_prices(rng, chunk, pairs):
+    """A daily random walk for each (crop, market) pair in the chunk"""
+    days = _context['price_days']
+    start = date.today() - timedelta(days=days - 1)
+    prices = []
+    for crop_name, market in pairs:
+        low, high = CROP_CATALOG[crop_name][3]
+        price = rng.uniform(low, high)
+        for day in range(days):
+            price = min(max(price * rng.gauss(1, 0.02), low * 0.6), high * 1.6)
+            prices.append(MarketPrice(
+                crop_name=crop_name,
+                market_location=market,
+                price_per_kg=money(price),
+                date_recorded=start + timedelta(days=day),
+                source=rng.choice(['Agmarknet', 'Market Survey', 'Government Data']),
+            ))
+    return prices
+
+
+def build_weather(rng, chunk, locations):
+    """Readings every ``weather_interval`` hours with a daily temperature cycle"""
+    days, interval = _context['weather_days'], _context['weather_interval']
+    first = timezone.make_aware(datetime.combine(date.today() - timedelta(days=days - 1), time()))
+    readings = []
+    for location in locations:
+        base = rng.uniform(18, 32)
+        for step in range(days * 24 // interval):
+            recorded = first + timedelta(hours=step * interval)
+            # Coolest around 3am, warmest mid-afternoon
+            daily = -6 * math.cos((recorded.hour - 3) / 24 * 2 * math.pi)
+            rainy = rng.random() < 0.15
+            readings.append(WeatherData(
+                location=location,
+                temperature=round(base + daily + rng.gauss(0, 1.5), 1),
+                humidity=round(min(max(rng.gauss(85 if rainy else 55, 10), 10), 100), 1),
+                rainfall=round(rng.expovariate(1 / 8), 1) if rainy else 0.0,
+                weather_condition='Rainy' if rainy else rng.choice(WEATHER_CONDITIONS[:-1]),
+                date_recorded=recorded,
+            ))
+    return readings
+
+
+def build_notifications(rng, chunk, count):
+    kinds = [
+        ('harvest_reminder', "Harvest Reminder", "Your {crop} is due for harvest in {days} days."),
+        ('price_alert', "Price Alert", "{crop} prices moved {days}% at your nearest mandi."),
+        ('weather_alert', "Weather Alert", "Heavy rain expected in {days} days; protect your {crop}."),
+        ('general', "Update", "New advisory available for {crop} growers."),
+    ]
+    notifications = []
+    for _ in range(count):
+        kind, title, message = rng.choices(kinds, [50, 25, 20, 5])[0]
+        notifications.append(Notification(
+            farmer_id=rng.choice(_context['farmer_ids']),
+            title=title,
+            message=message.format(crop=rng.choice(list(CROP_CATALOG)), days=rng.randint(1, 14)),
+            notification_type=kind,
+            is_read=rng.random() < 0.7,
+        ))
+    return notifications
+
+
+BUILDERS = {
+    'farmers': (Farmer, build_farmers),
+    'crops': (Crop, build_crops),
+    'prices': (MarketPrice, build_prices),
+    'weather': (WeatherData, build_weather),
+    'notifications': (Notification, build_notifications),
+}
+
+
+def _init_worker(context):
+    # Needed under the "spawn" start method; a no-op in forked children
+    import django
+    django.setup()
+    _context.update(context)
+
+
+def insert_chunk(task):
+    """Build and insert one chunk; runs in the parent or a worker process"""
+    table, chunk, spec, batch_size = task
+    model, build = BUILDERS[table]
+    rows = build(chunk_rng(_context['seed'], table, chunk), chunk, spec)
+    # Prices and readings are unique per day and location, so seeding on top of
+    # an earlier run keeps the rows already there
+    model.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=table in ('prices', 'weather'))
+    return table, len(rows)
+
+
+def run_tasks(tasks, workers, progress):
+    if workers <= 1:
+        for task in tasks:
+            progress(*insert_chunk(task))
+        return
+    # Forked children must not share the parent's database connection
+    connections.close_all()
+    with multiprocessing.get_context().Pool(workers, _init_worker, (dict(_context),)) as pool:
+        for table, count in pool.imap_unordered(insert_chunk, tasks):
+            progress(table, count)
+
+
+def ensure_categories():
+    ids = {}
+    for name, (description, icon) in CATEGORIES.items():
+        category, _ = CropCategory.objects.get_or_create(
+            name=name, defaults={'description': description, 'icon': icon},
+        )
+        ids[name] = category.id
+    return ids
+
+
+def clear_data():
+    """Empty the seeded tables with plain DELETEs; per-row delete signals would take hours.
+
+    Tables that reference farmers or prices are emptied before them, all in
+    one transaction, so a failure leaves every table as it was.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model in (PriceAlertRule, Notification, Crop, Farmer, LatestMarketPrice, MarketPrice, PriceRollup,
+                      LatestWeather, WeatherRollup, WeatherData, AnalyticsSnapshot, ArchivedRecord, ArchiveCutoff):
+            cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+
+
+def seed_dataset(farmers, crops, notifications=0, price_days=0, weather_days=0, weather_interval=3, seed=1,
+                 workers=1, batch_size=2000, progress=lambda table, count: None):
+    """Generate and insert a dataset, then refresh the derived tables.
+
+    In a single process everything runs in one transaction, so a failure
+    leaves the database as it was. Worker processes commit their own chunks.
+    """
+    if workers > 1 and connection.vendor == 'sqlite':
+        raise ValueError("SQLite allows a single writer; use workers=1 or PostgreSQL")
+
+    with transaction.atomic() if workers <= 1 else contextlib.nullcontext():
+        _seed(farmers, crops, notifications, price_days, weather_days, weather_interval, seed, workers, batch_size,
+              progress)
+
+
+def _seed(farmers, crops, notifications, price_days, weather_days, weather_interval, seed, workers, batch_size,
+          progress):
+    _context.clear()
+    _context.update(seed=seed, categories=ensure_categories(), price_days=price_days,
+                    weather_days=weather_days, weather_interval=weather_interval)
+
+    last_id = Farmer.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    _context['first_farmer_id'] = last_id + 1
+    run_tasks([('farmers', chunk, size, batch_size) for chunk, size in enumerate(chunk_sizes(farmers))],
+              workers, progress)
+    # Explicit ids leave PostgreSQL's sequence behind; SQLite returns no statements
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [Farmer]):
+            cursor.execute(sql)
+    if crops or notifications:
+        # Attach rows to this run's farmers, or to existing ones if none were requested
+        farmer_ids = Farmer.objects.order_by('id').values_list('id', flat=True)
+        _context['farmer_ids'] = list(farmer_ids.filter(id__gt=last_id) if farmers else farmer_ids)
+        if not _context['farmer_ids']:
+            raise ValueError("Cannot create crops or notifications without farmers")
+
+    tasks = [('crops', chunk, size, batch_size) for chunk, size in enumerate(chunk_sizes(crops))]
+    tasks += [('notifications', chunk, size, batch_size) for chunk, size in enumerate(chunk_sizes(notifications))]
+    if price_days:
+        pairs = [(crop, market) for crop in CROP_CATALOG for market in MARKETS]
+        per_chunk = max(1, CHUNK_SIZE // price_days)
+        tasks += [('prices', chunk, pairs[start:start + per_chunk], batch_size)
+                  for chunk, start in enumerate(range(0, len(pairs), per_chunk))]
+    if weather_days:
+        tasks += [('weather', chunk, [location], batch_size) for chunk, location in enumerate(WEATHER_LOCATIONS)]
+    run_tasks(tasks, workers, progress)
+
+    # bulk_create skips the signal handlers, so refresh what they maintain
+    rebuild_snapshots()
+    if price_days:
+        refresh_price_rollups()
+        refresh_latest_prices()
+    if weather_days:
+        refresh_weather_rollups()
+        refresh_latest_weather()
+    if notifications:
+        refresh_unread_counts(None if not farmers else _context['farmer_ids'])
+    get_search_backend().rebuild()
+    for model in (Farmer, Crop, MarketPrice, WeatherData, Notification):
+        bump_version(model)
@@ -0,0 +1,165 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .analytics import TRACKED_FIELDS, apply_crop_change, crop_state
+from .cache import bump_version
+from .ingest import Spans
+from .models import Farmer, Crop, LatestMarketPrice, LatestWeather, MarketPrice, WeatherData, Notification
+from .notifications import adjust_unread
+from .price_history import refresh_for_prices, refresh_latest_prices
+from .search import get_search_backend
+from .weather import refresh_for_readings, refresh_latest_weather
+
+# Signal handlers that keep derived data in step with the models.
+
+
+@receiver(post_save, sender=Farmer)
+def index_farmer(sender, instance, **kwargs):
+    get_search_backend().index_farmer(instance)
+
+
+@receiver(post_delete, sender=Farmer)
+def unindex_farmer(sender, instance, **kwargs):
+    get_search_backend().remove_farmer(instance.pk)
+
+
+@receiver(post_save, sender=Crop)
+def index_crop(sender, instance, **kwargs):
+    get_search_backend().index_crop(instance)
+
+
+@receiver(post_delete, sender=Crop)
+def unindex_crop(sender, instance, **kwargs):
+    get_search_backend().remove_crop(instance.pk)
+
+
+@receiver(pre_save, sender=Crop)
+def remember_crop_state(sender, instance, **kwargs):
+    instance._analytics_previous = None
+    if not instance._state.adding:
+        instance._analytics_previous = Crop.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+
+
+@receiver(post_save, sender=Crop)
+def update_analytics_on_save(sender, instance, **kwargs):
+    apply_crop_change(getattr(instance, '_analytics_previous', None), crop_state(instance))
+
+
+@receiver(post_delete, sender=Crop)
+def update_analytics_on_delete(sender, instance, **kwargs):
+    apply_crop_change(crop_state(instance), None)
+
+
+@receiver(pre_save, sender=MarketPrice)
+def remember_price_period(sender, instance, **kwargs):
+    instance._rollup_previous = None
+    if not instance._state.adding:
+        instance._rollup_previous = MarketPrice.objects.filter(pk=instance.pk).values_list(
+            'crop_key', 'market_key', 'date_recorded',
+        ).first()
+
+
+def price_spans(*keys):
+    spans = Spans()
+    for crop_key, market_key, day in filter(None, keys):
+        spans.add((crop_key, market_key), day)
+    return spans
+
+
+@receiver(post_save, sender=MarketPrice)
+def update_rollups_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_rollup_previous', None)
+    current = (instance.crop_key, instance.market_key, instance.date_recorded)
+    refresh_for_prices(price_spans(previous, current))
+    if previous and previous != current:
+        # A latest price moved to an older date or another pair leaves its old entry behind
+        stale = LatestMarketPrice.objects.filter(price=instance).exclude(
+            crop_key=instance.crop_key, market_key=instance.market_key, date_recorded=instance.date_recorded,
+        )
+        refresh_latest_prices(list(stale.values_list('crop_key', 'market_key')))
+
+
+@receiver(post_delete, sender=MarketPrice)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    refresh_for_prices(price_spans((instance.crop_key, instance.market_key, instance.date_recorded)))
+    # Deleting the latest price cascades to its LatestMarketPrice row; recompute that pair
+    pair = (instance.crop_key, instance.market_key)
+    if not LatestMarketPrice.objects.filter(crop_key=pair[0], market_key=pair[1]).exists():
+        refresh_latest_prices([pair])
+
+
+@receiver(pre_save, sender=WeatherData)
+def remember_reading_time(sender, instance, **kwargs):
+    instance._rollup_previous = None
+    if not instance._state.adding:
+        instance._rollup_previous = WeatherData.objects.filter(pk=instance.pk).values_list(
+            'location', 'date_recorded',
+        ).first()
+
+
+def reading_spans(*keys):
+    spans = Spans()
+    for location, moment in filter(None, keys):
+        spans.add(location, moment)
+    return spans
+
+
+@receiver(post_save, sender=WeatherData)
+def update_weather_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_rollup_previous', None)
+    current = (instance.location, instance.date_recorded)
+    refresh_for_readings(reading_spans(previous, current))
+    if previous and previous != current:
+        # A latest reading moved back in time or to another location leaves its old entry behind
+        stale = LatestWeather.objects.filter(reading=instance).exclude(
+            location=instance.location, date_recorded=instance.date_recorded,
+        )
+        refresh_latest_weather(list(stale.values_list('location', flat=True)))
+
+
+@receiver(post_delete, sender=WeatherData)
+def update_weather_on_delete(sender, instance, **kwargs):
+    refresh_for_readings(reading_spans((instance.location, instance.date_recorded)))
+    # Deleting the latest reading cascades to its LatestWeather row; rescan that location
+    if not LatestWeather.objects.filter(location=instance.location).exists():
+        refresh_latest_weather([instance.location])
+
+
+@receiver(pre_save, sender=Notification)
+def remember_read_state(sender, instance, **kwargs):
+    instance._unread_previous = None
+    if not instance._state.adding:
+        instance._unread_previous = Notification.objects.filter(pk=instance.pk, is_read=False).values_list(
+            'farmer_id', flat=True,
+        ).first()
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_unread_previous', None)
+    current = None if instance.is_read else instance.farmer_id
+    if previous != current:
+        if previous is not None:
+            adjust_unread(previous, -1)
+        if current is not None:
+            adjust_unread(current, 1)
+
+
+@receiver(post_delete, sender=Notification)
+def update_unread_on_delete(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread(instance.farmer_id, -1)
+
+
+@receiver(post_save, sender=Farmer)
+@receiver(post_delete, sender=Farmer)
+@receiver(post_save, sender=Crop)
+@receiver(post_delete, sender=Crop)
+@receiver(post_save, sender=MarketPrice)
+@receiver(post_delete, sender=MarketPrice)
+@receiver(post_save, sender=WeatherData)
+@receiver(post_delete, sender=WeatherData)
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_cached_pages(sender, **kwargs):
+    bump_version(sender)
@@ -1,4 +1,45 @@
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth.models import User
+from asgiref.sync import async_to_sync
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+import gzip
+import importlib
+import json
+import os
+import re
+import tempfile
+import time
+from unittest import mock
+
+from kisan_project import settings_production
+
+from .alerts import evaluate_price_alerts
+from .analytics import dashboard_summary, rebuild_snapshots
+from .benchmarking import budget_violations, load_budgets, page_requests, profile_request
+from .cache import bump_version, cache_stats, cached_fragment, model_versions
+from .models import (AnalyticsSnapshot, ArchiveCutoff, ArchivedRecord, Farmer, Crop, CropCategory, LatestMarketPrice,
+                     MarketPrice, Notification, PriceAlertRule, PriceRollup, LatestWeather, WeatherData, WeatherRollup)
+from .pagination import KeysetPaginator
+from .price_compare import Offer, OfferError, compare_offers
+from .parallel import gather_queries
+from .price_history import refresh_latest_prices, refresh_price_rollups
+from .profiling import clear_profiles, slowest_requests
+from .reminders import generate_harvest_reminders
+from .retention import archive_old_rows
+from .routing import PIN_COOKIE, ReplicaRouter, reading_from_replica
+from .search import get_search_backend
+from .seeding import seed_dataset
+from .warmup import url_names, warm_up
+from .weather import refresh_weather_rollups
 
 # Create your tests here.
 
@@ -24,4 +65,1214 @@ class CropModelTest(TestCase):
     
     def test_crop_creation(self):
         """Test crop model creation"""
-        pass
\ No newline at end of file
+        pass
+
+class CropQuerySetTest(TestCase):
+    """Test cases for the database-side crop financials"""
+
+    def setUp(self):
+        """Set up test data"""
+        farmer = Farmer.objects.create(name="Ramesh", phone="9999999999", address="Pune")
+        Crop.objects.create(
+            name="Wheat", farmer=farmer, season="Rabi", quantity=Decimal('100'),
+            price_per_kg=Decimal('25.50'), investment_cost=Decimal('1000'), harvest_date=date.today(),
+        )
+        Crop.objects.create(
+            name="Rice", farmer=farmer, season="Kharif", quantity=Decimal('40'),
+            price_per_kg=Decimal('30'), investment_cost=Decimal('0'), harvest_date=date.today(),
+        )
+
+    def test_with_financials_matches_properties(self):
+        """Annotated values agree with the Python properties"""
+        for crop in Crop.objects.with_financials():
+            self.assertEqual(crop.value_amount, crop.total_value)
+            self.assertEqual(crop.profit_amount, crop.profit)
+            self.assertEqual(crop.margin_percent, crop.profit_margin)
+
+    def test_financial_totals_single_query(self):
+        """Totals are computed with one aggregate query"""
+        with self.assertNumQueries(1):
+            totals = Crop.objects.financial_totals()
+        crops = list(Crop.objects.all())
+        self.assertEqual(totals['total_revenue'], sum(crop.total_value for crop in crops))
+        self.assertEqual(totals['total_profit'], sum(crop.profit for crop in crops))
+        self.assertEqual(totals['total_investment'], Decimal('1000'))
+
+    def test_financial_totals_empty(self):
+        """Totals default to zero when there are no crops"""
+        Crop.objects.all().delete()
+        self.assertEqual(Crop.objects.financial_totals()['total_profit'], 0)
+
+
+class FarmerRollupTest(TestCase):
+    """Test cases for the annotated farmer roll-ups"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.today = date.today()
+
+    def create_farmer(self, name, crops=2):
+        farmer = Farmer.objects.create(name=name, phone="9999999999", address="Nashik")
+        for offset in range(crops):
+            Crop.objects.create(
+                name=f"Onion {offset}", farmer=farmer, season="Rabi", quantity=Decimal('10'),
+                price_per_kg=Decimal('20'), harvest_date=self.today + timedelta(days=offset * 20),
+            )
+        return farmer
+
+    def test_rollups_match_properties(self):
+        """Annotated roll-ups agree with the unannotated properties"""
+        self.create_farmer("Suresh", crops=3)
+        self.create_farmer("Ganesh", crops=0)
+        for farmer in Farmer.objects.with_rollups():
+            plain = Farmer.objects.get(pk=farmer.pk)
+            self.assertEqual(farmer.total_crops, plain.total_crops)
+            self.assertEqual(farmer.total_harvest_value, plain.total_harvest_value)
+            self.assertEqual(farmer.upcoming_harvest_count, plain.upcoming_harvest_count)
+
+    def test_farmers_list_query_count_is_constant(self):
+        """farmers_list costs the same number of queries for 1 or 10 farmers"""
+        self.create_farmer("Farmer 0")
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('kisan_app:farmers_list'))
+        for index in range(1, 10):
+            self.create_farmer(f"Farmer {index}")
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(reverse('kisan_app:farmers_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(large), len(small))
+
+
+class KeysetPaginationTest(TestCase):
+    """Test cases for cursor pagination of the list views"""
+
+    def setUp(self):
+        """Set up test data"""
+        farmer = Farmer.objects.create(name="Mahesh", phone="9999999999", address="Nagpur")
+        for index in range(25):
+            Crop.objects.create(
+                name=f"Cotton {index}", farmer=farmer, season="Kharif", quantity=Decimal(index + 1),
+                price_per_kg=Decimal('10'), harvest_date=date.today() + timedelta(days=index % 5),
+            )
+
+    def collect(self, ordering, per_page=7):
+        paginator = KeysetPaginator(Crop.objects.with_financials(), ordering, per_page)
+        rows, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            rows.extend(crop.id for crop in page)
+            if not page.has_next:
+                return rows
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_row_once(self):
+        """Walking the cursors visits every row in order exactly once"""
+        for ordering in [('harvest_date', 'id'), ('-value_amount', '-id'), ('-created_at', '-id')]:
+            expected = list(Crop.objects.with_financials().order_by(*ordering).values_list('id', flat=True))
+            self.assertEqual(self.collect(ordering), expected)
+
+    def test_crops_list_json_and_invalid_cursor(self):
+        """crops_list serves JSON pages and rejects malformed cursors"""
+        url = reverse('kisan_app:crops_list')
+        data = self.client.get(url, {'format': 'json', 'sort': 'value', 'limit': 10}).json()
+        self.assertEqual(len(data['results']), 10)
+        self.assertTrue(data['has_next'])
+        second = self.client.get(url, {'format': 'json', 'sort': 'value', 'limit': 10, 'cursor': data['next_cursor']})
+        self.assertEqual(second.json()['results'][0]['value_amount'], '150')
+        self.assertEqual(self.client.get(url, {'cursor': '!!'}).status_code, 404)
+
+
+class SearchBackendTest(TestCase):
+    """Test cases for the farmers and crops search backend"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.ramesh = Farmer.objects.create(name="Ramesh Patil", phone="9876500001", address="Satara")
+        self.suresh = Farmer.objects.create(name="Suresh Jadhav", phone="9876500002", address="Ramtek, Nagpur")
+        Crop.objects.create(
+            name="Sugarcane", farmer=self.ramesh, season="Annual", quantity=Decimal('10'),
+            price_per_kg=Decimal('3'), harvest_date=date.today(),
+        )
+
+    def search(self, query, model=Farmer):
+        backend = get_search_backend()
+        if model is Farmer:
+            return list(backend.search_farmers(Farmer.objects.all(), query).order_by('-search_rank'))
+        return list(backend.search_crops(Crop.objects.all(), query))
+
+    def test_prefix_and_ranking(self):
+        """Prefixes match, and a name match outranks an address match"""
+        self.assertEqual(self.search("Ram"), [self.ramesh, self.suresh])
+        self.assertEqual(self.search("patil sat"), [self.ramesh])
+
+    def test_index_follows_saves_and_deletes(self):
+        """Renames and deletes are reflected in farmer and crop searches"""
+        self.ramesh.name = "Mahadev Patil"
+        self.ramesh.save()
+        self.assertEqual([crop.name for crop in self.search("mahadev", Crop)], ["Sugarcane"])
+        self.ramesh.delete()
+        self.assertEqual(self.search("patil"), [])
+        self.assertEqual(self.search("sugar", Crop), [])
+
+    def test_crops_match_only_the_farmer_name(self):
+        """Every backend finds crops by their farmer's name, never by contact details"""
+        for backend in (None, 'basic'):
+            with self.subTest(backend=backend), override_settings(KISAN_SEARCH_BACKEND=backend):
+                self.assertEqual([crop.name for crop in self.search("ramesh", Crop)], ["Sugarcane"])
+                self.assertEqual(self.search("satara", Crop), [])
+                self.assertEqual(self.search("9876500001", Crop), [])
+
+    def test_filters_apply_to_every_match(self):
+        """Ranking and the view's filters run in one query over all matches"""
+        for number in range(3):
+            Crop.objects.create(
+                name=f"Sugar Beet {number}", farmer=self.suresh, season="Rabi", quantity=Decimal('5'),
+                price_per_kg=Decimal('2'), harvest_date=date.today(),
+            )
+        crops = get_search_backend().search_crops(Crop.objects.filter(season="Annual"), "sugar")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual([crop.name for crop in crops.order_by('-search_rank')], ["Sugarcane"])
+        self.assertEqual(len(queries), 1)
+
+    def test_farmers_list_search(self):
+        """farmers_list returns matches ordered by relevance"""
+        response = self.client.get(reverse('kisan_app:farmers_list'), {'search': 'jadhav', 'format': 'json'})
+        self.assertEqual([row['name'] for row in response.json()['results']], ["Suresh Jadhav"])
+
+
+class AnalyticsSnapshotTest(TestCase):
+    """Test cases for the incrementally maintained analytics snapshot"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.farmer = Farmer.objects.create(name="Vijay", phone="9999999999", address="Indore")
+        self.category = CropCategory.objects.create(name="Pulses")
+
+    def create_crop(self, **fields):
+        values = {
+            'name': "Soybean", 'farmer': self.farmer, 'season': "Kharif", 'quantity': Decimal('100'),
+            'price_per_kg': Decimal('45.50'), 'investment_cost': Decimal('2000'), 'harvest_date': date.today(),
+        }
+        values.update(fields)
+        return Crop.objects.create(**values)
+
+    def snapshot_rows(self):
+        return list(AnalyticsSnapshot.objects.values_list(
+            'dimension', 'key', 'crop_count', 'total_quantity', 'total_value', 'total_investment',
+        ))
+
+    def test_incremental_matches_rebuild(self):
+        """Creates, edits and deletes leave the same rows as a full rebuild"""
+        soybean = self.create_crop()
+        gram = self.create_crop(name="Gram", season="Rabi", category=self.category, quantity=12.5)
+        self.create_crop(name="Moong", season="Zaid", investment_cost=Decimal('0'))
+        soybean.season = "Rabi"
+        soybean.quantity = Decimal('80')
+        soybean.category = self.category
+        soybean.save()
+        gram.delete()
+
+        incremental = self.snapshot_rows()
+        rebuild_snapshots()
+        self.assertEqual(incremental, self.snapshot_rows())
+        self.assertNotIn(('season', 'Kharif'), [row[:2] for row in incremental])
+
+    def test_dashboard_reads_snapshot(self):
+        """The dashboard totals come from the snapshot rows"""
+        self.create_crop()
+        summary = dashboard_summary()
+        self.assertEqual(summary['total_crops'], 1)
+        self.assertEqual(summary['total_revenue'], Decimal('4550'))
+        self.assertEqual(summary['total_profit'], Decimal('2550'))
+        self.assertEqual(summary['crop_distribution'], [{'season': 'Kharif', 'count': 1, 'total_value': Decimal('100')}])
+        response = self.client.get(reverse('kisan_app:analytics_dashboard'))
+        self.assertEqual(response.status_code, 200)
+
+
+class CacheInvalidationTest(TestCase):
+    """Test cases for model-versioned fragment and response caching"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.farmer = Farmer.objects.create(name="Anil", phone="9999999999", address="Akola")
+
+    def test_fragment_rebuilt_after_write(self):
+        """A fragment is served from cache until one of its models changes"""
+        build = lambda: Farmer.objects.count()
+        self.assertEqual(cached_fragment('farmer_count', [Farmer], build), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_fragment('farmer_count', [Farmer], build), 1)
+        Farmer.objects.create(name="Sunil", phone="9999999998", address="Akola")
+        self.assertEqual(cached_fragment('farmer_count', [Farmer], build), 2)
+        self.assertEqual(cache_stats()['farmer_count'], {'hits': 1, 'misses': 2})
+
+    def test_response_cached_until_model_changes(self):
+        """farmers_list is served without queries until a farmer is saved"""
+        url = reverse('kisan_app:farmers_list')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(url), "Anil")
+        self.farmer.name = "Anil Deshmukh"
+        self.farmer.save()
+        self.assertContains(self.client.get(url), "Anil Deshmukh")
+
+    def test_every_bump_stores_a_new_version(self):
+        """Bumps replace the version instead of incrementing it, so concurrent ones cannot collapse"""
+        seen = {tuple(model_versions([Farmer]))}
+        for _ in range(3):
+            bump_version(Farmer)
+            seen.add(tuple(model_versions([Farmer])))
+        self.assertEqual(len(seen), 4)
+
+    @override_settings(KISAN_CACHE_STATS=False)
+    def test_stats_can_be_turned_off(self):
+        """Without KISAN_CACHE_STATS a cache hit is a single lookup"""
+        cached_fragment('farmer_count', [Farmer], lambda: 1)
+        with mock.patch('kisan_app.cache.cache', wraps=cache) as spy:
+            cached_fragment('farmer_count', [Farmer], lambda: 1)
+        self.assertEqual([call[0] for call in spy.method_calls], ['get_many', 'get'])
+        self.assertEqual(cache_stats(), {})
+
+    def test_production_shares_the_cache(self):
+        """Every gunicorn worker must see the version counters another one bumped"""
+        backend = settings_production.CACHES['default']['BACKEND']
+        self.assertNotEqual(backend, 'django.core.cache.backends.locmem.LocMemCache')
+        self.assertFalse(settings_production.KISAN_CACHE_STATS)
+
+class MarketPriceImportTest(TestCase):
+    """Test cases for the streaming market price importer"""
+
+    def run_import(self, text, fmt):
+        with tempfile.NamedTemporaryFile('w', suffix=f'.{fmt}', delete=False) as handle:
+            handle.write(text)
+        self.addCleanup(os.remove, handle.name)
+        out, err = StringIO(), StringIO()
+        call_command('import_market_prices', handle.name, '--batch-size', '2', stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_upserts_and_deduplicates(self):
+        """Rows are validated, de-duplicated and upserted on crop/market/day"""
+        MarketPrice.objects.create(
+            crop_name="Wheat", market_location="Delhi Mandi", price_per_kg=Decimal('20'), date_recorded=date(2024, 1, 1),
+        )
+        out, err = self.run_import(
+            "crop_name,market_location,price_per_kg,date_recorded\n"
+            "Wheat,Delhi Mandi,24.50,2024-01-01\n"
+            "Wheat,Delhi Mandi,25.00,2024-01-01\n"
+            "Rice,Pune Market,31,2024-01-01\n"
+            "Rice,Pune Market,abc,2024-01-02\n",
+            'csv',
+        )
+        self.assertIn("Imported 2 prices from 4 rows (1 duplicates, 1 invalid)", out)
+        self.assertIn("line 5: invalid price_per_kg", err)
+        wheat = MarketPrice.objects.get(crop_name="Wheat")
+        self.assertEqual((wheat.price_per_kg, wheat.source), (Decimal('25.00'), 'Bulk Import'))
+        self.assertEqual(MarketPrice.objects.count(), 2)
+
+    def test_jsonl(self):
+        """JSON Lines input keeps explicit dates and sources"""
+        out, _ = self.run_import(
+            '{"crop_name": "Onions", "market_location": "Nashik", "price_per_kg": "18.2", '
+            '"date_recorded": "2023-12-31", "source": "Agmarknet"}\n\nnot json\n',
+            'jsonl',
+        )
+        self.assertIn("Imported 1 prices from 2 rows", out)
+        price = MarketPrice.objects.get()
+        self.assertEqual((price.date_recorded, price.source), (date(2023, 12, 31), 'Agmarknet'))
+
+    def test_refreshes_only_the_weeks_each_pair_touched(self):
+        """Rollups are refreshed per pair over the weeks it touched, a few pairs at a time"""
+        MarketPrice.objects.create(
+            crop_name="Wheat", market_location="Pune Market", price_per_kg=Decimal('20'), date_recorded=date(2024, 1, 1),
+        )
+        untouched = PriceRollup.objects.get(resolution='week').id
+        rows = [f"Crop {n},Pune Market,{10 + n},2024-02-{1 + n % 28:02d}" for n in range(60)]
+        rows.append("Wheat,Pune Market,26,2024-03-04")
+        with mock.patch('kisan_app.price_history.ROLLUP_CHUNK_ROWS', 10):
+            self.run_import("crop_name,market_location,price_per_kg,date_recorded\n" + "\n".join(rows) + "\n", 'csv')
+        self.assertTrue(PriceRollup.objects.filter(id=untouched).exists())
+
+        def rollups():
+            return list(PriceRollup.objects.order_by('crop_key', 'resolution', 'period_start').values_list(
+                'crop_key', 'resolution', 'period_start', 'close_price', 'samples'))
+        incremental = rollups()
+        self.assertEqual(len(incremental), 2 * 62)
+        refresh_price_rollups()
+        self.assertEqual(incremental, rollups())
+
+
+    def test_non_finite_prices_are_invalid(self):
+        """NaN and Infinity are reported as invalid rows instead of aborting the import"""
+        out, err = self.run_import(
+            "crop_name,market_location,price_per_kg,date_recorded\n"
+            "Wheat,Delhi Mandi,NaN,2024-01-01\n"
+            "Wheat,Delhi Mandi,Infinity,2024-01-02\n"
+            "Wheat,Delhi Mandi,-inf,2024-01-03\n"
+            "Wheat,Delhi Mandi,21,2024-01-04\n",
+            'csv',
+        )
+        self.assertIn("Imported 1 prices from 4 rows (0 duplicates, 3 invalid)", out)
+        self.assertIn("line 2: invalid price_per_kg 'NaN'", err)
+        self.assertEqual(MarketPrice.objects.get().price_per_kg, Decimal('21.00'))
+
+class SeedDataTest(TestCase):
+    """Test cases for the seed_kisan command"""
+
+    def seed(self, *args):
+        call_command('seed_kisan', '--farmers', '20', '--crops', '150', '--price-days', '3',
+                     '--weather-days', '1', '--clear', *args, stdout=StringIO())
+        return list(Crop.objects.order_by('id').values_list('name', 'quantity', 'harvest_date', 'farmer__phone'))
+
+    def test_counts_and_derived_tables(self):
+        """Bulk-inserted rows are reflected in the snapshot and search index"""
+        self.seed()
+        self.assertEqual((Farmer.objects.count(), Crop.objects.count()), (20, 150))
+        self.assertTrue(MarketPrice.objects.exists())
+        self.assertEqual(AnalyticsSnapshot.objects.get(dimension='total').crop_count, 150)
+        name = Crop.objects.first().name
+        self.assertTrue(get_search_backend().search_crops(Crop.objects.all(), name).exists())
+
+    def test_same_seed_same_data(self):
+        """A seed always generates the same rows"""
+        self.assertEqual(self.seed(), self.seed())
+        self.assertNotEqual(self.seed(), self.seed('--seed', '2'))
+
+    def test_clear_empties_dependent_tables(self):
+        """--clear removes alert rules and archived rows along with the farmers and prices they point at"""
+        self.seed()
+        PriceAlertRule.objects.create(farmer=Farmer.objects.first(), crop_name="Wheat", direction='above',
+                                      threshold=Decimal('30'), last_price=MarketPrice.objects.first())
+        archive_old_rows('prices', days=1)
+        self.seed()
+        self.assertFalse(PriceAlertRule.objects.exists() or ArchivedRecord.objects.exists()
+                         or ArchiveCutoff.objects.exists())
+        self.assertEqual(Farmer.objects.count(), 20)
+
+    def test_seeding_twice_adds_to_existing_data(self):
+        """A second run without --clear keeps the prices and readings it would repeat"""
+        self.seed()
+        prices, readings = MarketPrice.objects.count(), WeatherData.objects.count()
+        call_command('seed_kisan', '--farmers', '20', '--crops', '150', '--price-days', '3',
+                     '--weather-days', '1', stdout=StringIO())
+        self.assertEqual((Farmer.objects.count(), Crop.objects.count()), (40, 300))
+        self.assertEqual((MarketPrice.objects.count(), WeatherData.objects.count()), (prices, readings))
+        self.assertEqual(AnalyticsSnapshot.objects.get(dimension='total').crop_count, 300)
+
+    def test_failed_seed_rolls_back(self):
+        """Rows from a run that fails part-way are not left behind"""
+        with mock.patch('kisan_app.seeding.rebuild_snapshots', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                seed_dataset(farmers=5, crops=10, seed=3)
+        self.assertFalse(Farmer.objects.exists() or Crop.objects.exists())
+
+    def test_farmer_ids_follow_generation_order(self):
+        """Farmer ids come from the row number, not from when its chunk was inserted"""
+        self.seed()
+        first = Farmer.objects.order_by('id').first()
+        seed_dataset(farmers=3, crops=0, seed=5)
+        self.assertEqual(list(Farmer.objects.filter(id__gt=first.id + 19).values_list('id', flat=True)),
+                         [first.id + 20, first.id + 21, first.id + 22])
+        self.assertEqual(Farmer.objects.create(name="Asha Das", phone="9000000000", address="Kota").id, first.id + 23)
+
+
+class ViewBudgetTest(TestCase):
+    """Every route stays within its query budget from perf_budgets.json"""
+
+    def test_query_budgets(self):
+        """Query counts do not depend on how many rows are listed"""
+        seed_dataset(farmers=30, crops=300, notifications=60, price_days=3, weather_days=1)
+        client = Client(raise_request_exception=False)
+        client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        budgets = load_budgets()
+        problems = []
+        for name, url in page_requests(Farmer.objects.first().id):
+            problems += budget_violations(name, url, profile_request(client, url, repeat=1), budgets)
+        self.assertEqual(problems, [])
+
+
+class ProfilingMiddlewareTest(TestCase):
+    """Test cases for the opt-in profiling middleware"""
+
+    def setUp(self):
+        cache.clear()
+        clear_profiles()
+        farmer = Farmer.objects.create(name="Ramesh Patil", phone="9876543210", address="Nashik")
+        Crop.objects.create(
+            name="Wheat", season="Rabi", farmer=farmer, price_per_kg=Decimal('25'),
+            quantity=Decimal('100'), harvest_date=date.today(),
+        )
+
+    def test_disabled_by_default(self):
+        """Without KISAN_PROFILING no header is added and nothing is recorded"""
+        response = self.client.get(reverse('kisan_app:home'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(slowest_requests(), [])
+
+    @override_settings(KISAN_PROFILING=True, KISAN_PROFILING_SLOWEST=2)
+    def test_server_timing_and_slowest(self):
+        """Requests get a Server-Timing header and the slowest are kept"""
+        response = self.client.get(reverse('kisan_app:home'))
+        self.assertIn('sql;dur=', response['Server-Timing'])
+        self.assertIn('tmpl;dur=', response['Server-Timing'])
+        for name in ['farmers_list', 'crops_list']:
+            self.client.get(reverse(f'kisan_app:{name}'))
+        slowest = slowest_requests()
+        self.assertEqual(len(slowest), 2)
+        self.assertGreaterEqual(slowest[0]['total_ms'], slowest[1]['total_ms'])
+        self.assertGreater(sum(entry['queries'] for entry in slowest), 0)
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        data = self.client.get(reverse('kisan_app:profiling')).json()
+        self.assertTrue(data['enabled'])
+        self.assertEqual(len(data['slowest']), 2)
+
+
+class ReadAPITest(TestCase):
+    """Test cases for the read-only JSON API"""
+
+    def setUp(self):
+        cache.clear()
+        self.farmer = Farmer.objects.create(name="Ramesh Patil", phone="9876543210", address="Nashik")
+        for day in range(3):
+            Crop.objects.create(
+                name="Wheat", season="Rabi", farmer=self.farmer, price_per_kg=Decimal('25'),
+                quantity=Decimal('100'), harvest_date=date(2024, 3, 1) + timedelta(days=day),
+            )
+
+    def test_fields_filters_and_cursor(self):
+        """Sparse fieldsets, annotations and cursor pagination"""
+        url = reverse('kisan_app:api_crops')
+        data = self.client.get(url, {'fields': 'id,farmer_name,value_amount', 'limit': 2}).json()
+        self.assertEqual(list(data['results'][0]), ['id', 'farmer_name', 'value_amount'])
+        self.assertEqual(data['results'][0]['farmer_name'], "Ramesh Patil")
+        self.assertEqual(Decimal(data['results'][0]['value_amount']), Decimal('2500'))
+        self.assertTrue(data['has_next'])
+        rest = self.client.get(url, {'limit': 2, 'cursor': data['next_cursor']}).json()
+        self.assertEqual(len(rest['results']), 1)
+        self.assertFalse(rest['has_next'])
+
+        farmers = self.client.get(reverse('kisan_app:api_farmers'), {'fields': 'name,crop_count'}).json()
+        self.assertEqual(farmers['results'], [{'name': "Ramesh Patil", 'crop_count': 3}])
+
+        for params in ({'fields': 'password'}, {'farmer': 'abc'}, {'cursor': 'bogus'}, {'sort': 'name'}):
+            self.assertEqual(self.client.get(url, params).status_code, 400)
+
+    def test_etag_not_modified(self):
+        """A matching If-None-Match gets a 304 without touching the database"""
+        url = reverse('kisan_app:api_farmers')
+        response = self.client.get(url)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.farmer.name = "Ramesh R. Patil"
+        self.farmer.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class PriceHistoryTest(TestCase):
+    """Test cases for the daily and weekly price rollups"""
+
+    def setUp(self):
+        cache.clear()
+        # 2024-01-01 is a Monday
+        for day, price in enumerate(['20', '24', '18', '22']):
+            MarketPrice.objects.create(
+                crop_name="Wheat", market_location="Pune Market", price_per_kg=Decimal(price),
+                date_recorded=date(2024, 1, 1) + timedelta(days=day),
+            )
+        MarketPrice.objects.create(
+            crop_name=" wheat", market_location="PUNE  market", price_per_kg=Decimal('30'), date_recorded=date(2024, 1, 4),
+        )
+
+    def rollups(self):
+        return list(PriceRollup.objects.order_by('resolution', 'period_start').values_list(
+            'resolution', 'period_start', 'open_price', 'high_price', 'low_price', 'close_price', 'mean_price', 'samples',
+        ))
+
+    def test_signals_match_rebuild(self):
+        """Normalised keys group spellings; saves and deletes keep rollups exact"""
+        week = PriceRollup.objects.get(resolution='week')
+        self.assertEqual((week.open_price, week.high_price, week.low_price, week.close_price, week.samples),
+                         (Decimal('20'), Decimal('30'), Decimal('18'), Decimal('30'), 5))
+        self.assertEqual(week.mean_price, Decimal('22.80'))
+
+        moved = MarketPrice.objects.get(price_per_kg=Decimal('18'))
+        moved.date_recorded = date(2024, 1, 9)
+        moved.save()
+        MarketPrice.objects.get(price_per_kg=Decimal('30')).delete()
+        incremental = self.rollups()
+        refresh_price_rollups()
+        self.assertEqual(incremental, self.rollups())
+        self.assertEqual(PriceRollup.objects.filter(resolution='week').count(), 2)
+
+    def test_history_endpoint(self):
+        """The endpoint serves series per mandi at the chosen resolution"""
+        url = reverse('kisan_app:api_price_history')
+        data = self.client.get(url, {'crop': 'WHEAT', 'resolution': 'week', 'start': '2024-01-01', 'end': '2024-01-31'}).json()
+        self.assertEqual(len(data['series']), 1)
+        self.assertEqual(data['series'][0]['points'][0]['high'], '30.00')
+        daily = self.client.get(url, {'crop': 'wheat', 'market': 'pune market', 'end': '2024-01-31'}).json()
+        self.assertEqual(len(daily['series'][0]['points']), 4)
+        self.assertEqual(self.client.get(url, {'crop': 'wheat', 'resolution': 'hour'}).status_code, 400)
+
+
+class PriceComparisonTest(TestCase):
+    """Test cases for the price calculator's comparison engine"""
+
+    def setUp(self):
+        today = date.today()
+        for market, prices in {"Pune Market": ['20', '22'], "Delhi Mandi": ['30', '26'], "Nashik": ['18']}.items():
+            for days_ago, price in enumerate(reversed(prices)):
+                MarketPrice.objects.create(
+                    crop_name="Onions", market_location=market, price_per_kg=Decimal(price),
+                    date_recorded=today - timedelta(days=days_ago),
+                )
+        MarketPrice.objects.create(crop_name="Rice", market_location="Pune Market", price_per_kg=Decimal('40'))
+
+    def test_form_post_compares_every_mandi(self):
+        """Latest price per mandi, best first, with spread statistics"""
+        with self.assertNumQueries(2):
+            data = self.client.post(reverse('kisan_app:price_calculator'), {
+                'crop_name': 'onions', 'quantity': '100', 'price': '21',
+            }).json()
+        self.assertEqual(data['your_total'], 2100)
+        self.assertEqual([(row['market'], row['price']) for row in data['calculations']],
+                         [("Delhi Mandi", 26), ("Pune Market", 22), ("Nashik", 18)])
+        self.assertEqual(data['calculations'][0]['difference'], 500)
+        self.assertEqual(data['calculations'][0]['avg_7d'], 28)
+        self.assertEqual(data['summary']['median'], 22)
+        self.assertEqual(data['summary']['spread'], 8)
+
+    def test_json_post_with_many_crops(self):
+        """Several crops are compared with the same two queries"""
+        response = self.client.post(reverse('kisan_app:price_calculator'), json.dumps({'items': [
+            {'crop_name': 'Onions', 'quantity': 10, 'price': 20},
+            {'crop_name': 'Rice', 'quantity': 5, 'price': 45},
+            {'crop_name': 'Saffron', 'quantity': 1, 'price': 1},
+        ]}), content_type='application/json')
+        results = response.json()['results']
+        self.assertEqual([result['summary']['markets'] for result in results], [3, 1, 0])
+        self.assertEqual(results[1]['markets'][0]['difference'], -25)
+
+        bad = self.client.post(reverse('kisan_app:price_calculator'), {'crop_name': 'Onions', 'quantity': 'x'})
+        self.assertEqual(bad.status_code, 400)
+
+    def test_rejects_amounts_beyond_the_stored_range(self):
+        """Quantities and prices too large to store are a 400, not a rounding error"""
+        with self.assertRaises(OfferError):
+            Offer.parse('Wheat', '1e27', '10')
+        self.assertEqual(Offer.parse('Wheat', '99999999.99', '99999999.99').price, Decimal('99999999.99'))
+        response = self.client.post(reverse('kisan_app:price_calculator'), json.dumps({'items': [
+            {'crop_name': 'Onions', 'quantity': 10, 'price': 1e27},
+        ]}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_partial_names_fall_back_to_containing_crops(self):
+        """A name without an exact match finds the closest crop containing it"""
+        MarketPrice.objects.create(crop_name="Red Onions", market_location="Nashik", price_per_kg=Decimal('50'))
+        with self.assertNumQueries(2):
+            results = compare_offers([Offer.parse('Onion', 10, 20), Offer.parse(' ONIONS ', 10, 20),
+                                      Offer.parse('Red onion', 10, 20), Offer.parse('Saffron', 1, 1)])
+        self.assertEqual([result['summary']['markets'] for result in results], [3, 3, 1, 0])
+        self.assertEqual(results[0]['markets'][0]['avg_7d'], Decimal('28.00'))
+        self.assertEqual(results[2]['markets'][0]['price'], Decimal('50.00'))
+
+
+class LatestMarketPriceTest(TestCase):
+    """Test cases for the latest price per crop and mandi"""
+
+    def latest(self):
+        return dict(LatestMarketPrice.objects.values_list('market_key', 'price_per_kg'))
+
+    def test_follows_saves_deletes_and_imports(self):
+        """The newest price per pair wins, whichever way it was written"""
+        newest = MarketPrice.objects.create(crop_name="Wheat", market_location="Pune Market",
+                                            price_per_kg=Decimal('24'), date_recorded=date(2024, 2, 1))
+        MarketPrice.objects.create(crop_name="Wheat", market_location="Pune Market",
+                                   price_per_kg=Decimal('20'), date_recorded=date(2024, 1, 1))
+        self.assertEqual(self.latest(), {'pune market': Decimal('24')})
+
+        newest.delete()
+        self.assertEqual(self.latest(), {'pune market': Decimal('20')})
+
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write("crop_name,market_location,price_per_kg,date_recorded\n"
+                         "Wheat,Pune Market,26,2024-03-01\nWheat,Delhi Mandi,21,2024-03-01\n")
+        self.addCleanup(os.remove, handle.name)
+        call_command('import_market_prices', handle.name, stdout=StringIO())
+        self.assertEqual(self.latest(), {'pune market': Decimal('26'), 'delhi mandi': Decimal('21')})
+
+        moved = MarketPrice.objects.get(market_location="Delhi Mandi")
+        moved.crop_name = "Rice"
+        moved.save()
+        self.assertEqual(set(LatestMarketPrice.objects.values_list('crop_key', 'market_key')),
+                         {('wheat', 'pune market'), ('rice', 'delhi mandi')})
+        snapshot = list(LatestMarketPrice.objects.values_list('crop_key', 'market_key', 'price_id'))
+        refresh_latest_prices()
+        self.assertEqual(list(LatestMarketPrice.objects.values_list('crop_key', 'market_key', 'price_id')), snapshot)
+
+    def test_older_writes_do_not_rescan_history(self):
+        """Backfilled prices leave the latest alone; moving the latest row back recomputes its pair"""
+        for day in range(1, 11):
+            MarketPrice.objects.create(crop_name="Wheat", market_location="Pune Market",
+                                       price_per_kg=Decimal(20 + day), date_recorded=date(2024, 1, day))
+        with CaptureQueriesContext(connection) as queries:
+            MarketPrice.objects.create(crop_name="WHEAT", market_location="Pune Market",
+                                       price_per_kg=Decimal('5'), date_recorded=date(2024, 1, 5))
+        self.assertFalse([query for query in queries if 'ROW_NUMBER' in query['sql']])
+        self.assertEqual(self.latest(), {'pune market': Decimal('30')})
+
+        newest = MarketPrice.objects.get(price_per_kg=Decimal('30'))
+        newest.date_recorded = date(2023, 12, 31)
+        newest.save()
+        self.assertEqual(self.latest(), {'pune market': Decimal('29')})
+        newest.date_recorded = date(2024, 2, 1)
+        newest.price_per_kg = Decimal('31')
+        newest.save()
+        self.assertEqual(self.latest(), {'pune market': Decimal('31')})
+
+
+class PriceAlertTest(TestCase):
+    """Test cases for batch evaluation of price alert rules"""
+
+    def setUp(self):
+        self.farmer = Farmer.objects.create(name="Alert Farmer", phone="9000000001", address="Nashik")
+
+    def add_price(self, market, price, day):
+        return MarketPrice.objects.create(crop_name="Onion", market_location=market,
+                                          price_per_kg=Decimal(price), date_recorded=day)
+
+    def alerts(self):
+        return list(Notification.objects.filter(notification_type='price_alert').values_list('message', flat=True))
+
+    def test_rules_fire_once_per_new_price(self):
+        """Matching runs per direction, any-mandi rules pick the best price and re-runs send nothing"""
+        pune = PriceAlertRule.objects.create(farmer=self.farmer, crop_name="onion ", market_location="Pune Market",
+                                             direction='above', threshold=Decimal('30'))
+        anywhere = PriceAlertRule.objects.create(farmer=self.farmer, crop_name="Onion", direction='below',
+                                                 threshold=Decimal('15'))
+        PriceAlertRule.objects.create(farmer=self.farmer, crop_name="Onion", direction='above',
+                                      threshold=Decimal('10'), is_active=False)
+        self.add_price("Pune Market", '32', date(2024, 5, 1))
+        self.add_price("Delhi Mandi", '14', date(2024, 5, 1))
+        low = self.add_price("Lasalgaon Mandi", '12', date(2024, 5, 1))
+
+        stats = evaluate_price_alerts()
+        self.assertEqual((stats.rules_matched, stats.notifications), (2, 2))
+        self.assertEqual(sorted(self.alerts()), [
+            "Onion is ₹12.00/kg at Lasalgaon Mandi (2024-05-01), below your ₹15.00 target.",
+            "Onion is ₹32.00/kg at Pune Market (2024-05-01), above your ₹30.00 target.",
+        ])
+        anywhere.refresh_from_db()
+        self.assertEqual(anywhere.last_price, low)
+        self.assertEqual(evaluate_price_alerts().notifications, 0)
+
+        # A new price at the rule's mandi fires again; one elsewhere does not
+        self.add_price("Pune Market", '35', date(2024, 5, 2))
+        self.add_price("Delhi Mandi", '40', date(2024, 5, 2))
+        self.assertEqual(evaluate_price_alerts().notifications, 1)
+        pune.refresh_from_db()
+        self.assertEqual(pune.last_price.price_per_kg, Decimal('35'))
+        self.assertEqual(len(self.alerts()), 3)
+
+    def test_import_evaluates_alerts(self):
+        """The bulk importer notifies farmers about the prices it wrote"""
+        PriceAlertRule.objects.create(farmer=self.farmer, crop_name="Onion", direction='above',
+                                      threshold=Decimal('20'))
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write("crop_name,market_location,price_per_kg,date_recorded\n"
+                         "Onion,Pune Market,25,2024-05-01\nOnion,Delhi Mandi,22,2024-05-01\n")
+        self.addCleanup(os.remove, handle.name)
+        out = StringIO()
+        call_command('import_market_prices', handle.name, stdout=out)
+        self.assertIn("Sent 1 price alerts", out.getvalue())
+        self.assertEqual(self.alerts(), ["Onion is ₹25.00/kg at Pune Market (2024-05-01), above your ₹20.00 target."])
+
+
+    def test_farmers_register_rules(self):
+        """Farmers add, list and remove their own thresholds"""
+        url = reverse('kisan_app:price_alerts')
+        response = self.client.post(url, {'farmer': self.farmer.id, 'crop_name': 'Onion', 'direction': 'below',
+                                          'threshold': '15'})
+        self.assertEqual(response.status_code, 201)
+        rule = response.json()['rule']
+        self.assertEqual((rule['crop_name'], rule['market_location'], rule['threshold']), ('Onion', '', '15.00'))
+        self.assertEqual(PriceAlertRule.objects.get().crop_key, 'onion')
+
+        invalid = self.client.post(url, {'farmer': self.farmer.id, 'crop_name': 'Onion', 'direction': 'sideways',
+                                         'threshold': '-1'})
+        self.assertEqual(invalid.status_code, 400)
+        self.assertIn('direction', invalid.json()['error'])
+        self.assertEqual(self.client.post(url, {'crop_name': 'Onion'}).status_code, 400)
+
+        listed = self.client.get(url, {'farmer': self.farmer.id}).json()
+        self.assertEqual([rule['id'] for rule in listed['rules']], [rule['id']])
+        other = Farmer.objects.create(name="Other Farmer", phone="9000000002", address="Pune")
+        delete_url = reverse('kisan_app:delete_price_alert', args=[rule['id']])
+        self.assertEqual(self.client.post(delete_url, {'farmer': other.id}).status_code, 404)
+        self.assertEqual(self.client.post(delete_url, {'farmer': self.farmer.id}).status_code, 200)
+        self.assertFalse(PriceAlertRule.objects.exists())
+
+
+class HarvestReminderTest(TestCase):
+    """Test cases for the bulk harvest reminder generator"""
+
+    def setUp(self):
+        self.farmer = Farmer.objects.create(name="Reminder Farmer", phone="9000000002", address="Pune")
+        self.today = date(2024, 6, 10)
+
+    def add_crop(self, name, days, status='Growing'):
+        return Crop.objects.create(name=name, season='Kharif', status=status, price_per_kg=Decimal('20'),
+                                   farmer=self.farmer, quantity=Decimal('100'),
+                                   harvest_date=self.today + timedelta(days=days))
+
+    def test_windows_are_sent_once(self):
+        """Each window fires once per crop and harvest date, in a fixed number of queries"""
+        self.add_crop("Wheat", 6)
+        self.add_crop("Rice", 3)
+        self.add_crop("Maize", 0)
+        overdue = self.add_crop("Cotton", -2, status='Ready')
+        self.add_crop("Sugarcane", 20)
+        self.add_crop("Soybean", -2, status='Harvested')
+
+        with self.assertNumQueries(5):
+            counts = generate_harvest_reminders(self.today)
+        self.assertEqual(counts, {'7': 1, '3': 1, '1': 1, 'overdue': 1})
+        self.assertIn("2 days ago", Notification.objects.get(crop=overdue).message)
+        self.assertEqual(sum(generate_harvest_reminders(self.today).values()), 0)
+
+        # The next window, and a rescheduled harvest, are new reminders
+        wheat = Crop.objects.get(name="Wheat")
+        self.assertEqual(generate_harvest_reminders(self.today + timedelta(days=3))['3'], 1)
+        wheat.harvest_date += timedelta(days=10)
+        wheat.save()
+        self.assertEqual(generate_harvest_reminders(self.today + timedelta(days=10))['7'], 1)
+        self.assertEqual(wheat.reminders.count(), 3)
+
+    def test_command(self):
+        self.add_crop("Wheat", 1)
+        out = StringIO()
+        call_command('generate_harvest_reminders', '--date', self.today.isoformat(), stdout=out)
+        self.assertIn("Sent 1 harvest reminders", out.getvalue())
+
+
+class WeatherRollupTest(TestCase):
+    """Test cases for weather ingestion, rollups and the latest reading per location"""
+
+    def import_readings(self, rows):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write("location,temperature,humidity,rainfall,weather_condition,date_recorded\n" + rows)
+        self.addCleanup(os.remove, handle.name)
+        out = StringIO()
+        call_command('import_weather_readings', handle.name, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_import_builds_rollups_and_latest(self):
+        """Bulk imports upsert readings and refresh hourly, daily and latest tables"""
+        output = self.import_readings(
+            "Pune,20,60,0,Sunny,2024-07-01T06:10:00\n"
+            "Pune,24,50,2.5,Cloudy,2024-07-01T06:40:00\n"
+            "Pune,30,40,1.5,Sunny,2024-07-01T14:00:00\n"
+            "Delhi,35,30,,Sunny,2024-07-01T14:00:00\n"
+            "Delhi,hot,30,0,Sunny,2024-07-01T15:00:00\n"
+        )
+        self.assertIn("Imported 4 readings from 5 rows (0 duplicates, 1 invalid)", output)
+        hour = WeatherRollup.objects.get(resolution='hour', location='Pune',
+                                         period_start=timezone.make_aware(datetime(2024, 7, 1, 6)))
+        self.assertEqual((hour.min_temperature, hour.max_temperature, hour.avg_temperature, hour.samples),
+                         (20, 24, 22, 2))
+        day = WeatherRollup.objects.get(resolution='day', location='Pune')
+        self.assertEqual((day.min_temperature, day.max_temperature, day.samples), (20, 30, 3))
+        self.assertAlmostEqual(day.avg_humidity, 50)
+        self.assertAlmostEqual(day.total_rainfall, 4.0)
+        self.assertEqual(dict(LatestWeather.objects.values_list('location', 'temperature')),
+                         {'Pune': 30, 'Delhi': 35})
+
+        # Re-importing a reading updates it in place, and single saves keep the tables current
+        self.import_readings("Pune,32,40,1.5,Sunny,2024-07-01T14:00:00\n")
+        self.assertEqual(WeatherData.objects.filter(location='Pune').count(), 3)
+        self.assertEqual(WeatherRollup.objects.get(resolution='day', location='Pune').max_temperature, 32)
+        WeatherData.objects.create(location='Pune', temperature=26, humidity=55, rainfall=0,
+                                   weather_condition='Cloudy', date_recorded=timezone.make_aware(datetime(2024, 7, 2, 9)))
+        self.assertEqual(LatestWeather.objects.get(location='Pune').temperature, 26)
+        self.assertEqual(WeatherRollup.objects.filter(resolution='day', location='Pune').count(), 2)
+
+    def test_import_refreshes_each_location_span(self):
+        """Each location is refreshed over its own span, a few days at a time, matching a full rebuild"""
+        self.import_readings("Delhi,30,40,0,Sunny,2024-06-01T12:00:00\n")
+        untouched = WeatherRollup.objects.get(resolution='day', location='Delhi').id
+        rows = ''.join(f"Pune,{20 + hour % 10},50,0,Sunny,2024-07-{1 + hour // 24:02d}T{hour % 24:02d}:30:00\n"
+                       for hour in range(0, 24 * 5, 5))
+        with mock.patch('kisan_app.weather.CHUNK_DAYS', 2):
+            self.import_readings(rows + "Delhi,31,40,0,Sunny,2024-07-03T12:00:00\n")
+        self.assertTrue(WeatherRollup.objects.filter(id=untouched).exists())
+        self.assertEqual(WeatherRollup.objects.filter(resolution='day', location='Pune').count(), 5)
+
+        def rollups():
+            return list(WeatherRollup.objects.order_by('location', 'resolution', 'period_start').values_list(
+                'location', 'resolution', 'period_start', 'max_temperature', 'samples'))
+        incremental = rollups()
+        refresh_weather_rollups()
+        self.assertEqual(incremental, rollups())
+        self.assertEqual(LatestWeather.objects.get(location='Delhi').temperature, 31)
+
+    def test_location_filter_and_history(self):
+        """The page filters on the server and the API serves rollups of one location"""
+        now = timezone.now()
+        for location, temperature in [('Pune', 25), ('Delhi', 38)]:
+            WeatherData.objects.create(location=location, temperature=temperature, humidity=50, rainfall=0,
+                                       weather_condition='Sunny', date_recorded=now - timedelta(hours=1))
+        response = self.client.get(reverse('kisan_app:weather_info'), {'location': 'Pune', 'format': 'json'})
+        self.assertEqual([row['location'] for row in response.json()['results']], ['Pune'])
+        response = self.client.get(reverse('kisan_app:weather_info'), {'location': 'Pune'})
+        self.assertEqual(response.context['locations'], ['Delhi', 'Pune'])
+        self.assertEqual(len(response.context['daily_summary']), 1)
+
+        response = self.client.get(reverse('kisan_app:api_weather_history'), {'location': 'Delhi', 'resolution': 'hour'})
+        points = response.json()['points']
+        self.assertEqual([(point['max_temperature'], point['samples']) for point in points], [(38, 1)])
+        response = self.client.get(reverse('kisan_app:api_weather_history'), {'location': 'Delhi', 'resolution': 'week'})
+        self.assertEqual(response.status_code, 400)
+
+
+class NotificationCounterTest(TestCase):
+    """Test cases for unread counters, batch mark-as-read and filtered listings"""
+
+    def setUp(self):
+        self.farmer = Farmer.objects.create(name="Counter Farmer", phone="9000000003", address="Satara")
+        self.other = Farmer.objects.create(name="Other Farmer", phone="9000000004", address="Sangli")
+
+    def notify(self, farmer, kind='general', **kwargs):
+        return Notification.objects.create(farmer=farmer, title="Update", message="Hello",
+                                           notification_type=kind, **kwargs)
+
+    def unread(self, farmer):
+        farmer.refresh_from_db()
+        return farmer.unread_notifications
+
+    def test_counter_follows_writes(self):
+        """Creates, read toggles, moves, deletes and bulk writers keep the counter exact"""
+        first = self.notify(self.farmer)
+        self.notify(self.farmer, is_read=True)
+        self.notify(self.farmer, 'price_alert')
+        self.assertEqual(self.unread(self.farmer), 2)
+
+        first.is_read = True
+        first.save()
+        self.assertEqual(self.unread(self.farmer), 1)
+        first.is_read = False
+        first.farmer = self.other
+        first.save()
+        self.assertEqual((self.unread(self.farmer), self.unread(self.other)), (1, 1))
+        first.delete()
+        self.assertEqual(self.unread(self.other), 0)
+
+        Crop.objects.create(name="Wheat", season='Rabi', price_per_kg=Decimal('20'), farmer=self.other,
+                            quantity=Decimal('10'), harvest_date=date.today() + timedelta(days=1))
+        generate_harvest_reminders()
+        self.assertEqual(self.unread(self.other), 1)
+
+    def test_mark_read_is_one_update(self):
+        """Batch and mark-all requests run a single UPDATE for the notifications"""
+        ids = [self.notify(self.farmer).id for _ in range(3)]
+        foreign = self.notify(self.other)
+        url = reverse('kisan_app:mark_notifications_read')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'farmer': self.farmer.id, 'ids': f'{ids[0]},{ids[1]},{foreign.id}'})
+        self.assertEqual(response.json(), {'status': 'success', 'marked': 2, 'unread': 1})
+        updates = [query['sql'] for query in queries if 'kisan_app_notification' in query['sql']]
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(Notification.objects.get(id=foreign.id).is_read)
+
+        response = self.client.post(url, {'farmer': self.farmer.id, 'all': '1'})
+        self.assertEqual(response.json()['marked'], 1)
+        self.assertEqual((self.unread(self.farmer), self.unread(self.other)), (0, 1))
+        self.assertEqual(self.client.post(url, {'farmer': self.farmer.id, 'ids': 'x'}).status_code, 400)
+
+    def test_listing_filters_and_badge(self):
+        """Picking a farmer filters the listing and shows their unread badge in the nav"""
+        self.notify(self.farmer, 'price_alert')
+        self.notify(self.farmer, 'general', is_read=True)
+        self.notify(self.other, 'price_alert')
+        url = reverse('kisan_app:notifications')
+
+        response = self.client.get(url, {'farmer': self.farmer.id, 'type': 'price_alert', 'format': 'json'})
+        self.assertEqual([row['farmer_id'] for row in response.json()['results']], [self.farmer.id])
+        response = self.client.get(url, {'farmer': self.farmer.id, 'unread': '1', 'format': 'json'})
+        self.assertEqual(len(response.json()['results']), 1)
+
+        self.client.get(url, {'farmer': self.farmer.id})
+        response = self.client.get(reverse('kisan_app:home'))
+        self.assertContains(response, '<span class="nav-badge">1</span>', html=True)
+        self.client.get(url, {'farmer': 'all'})
+        self.assertNotContains(self.client.get(reverse('kisan_app:home')), 'nav-badge">')
+
+
+class RetentionTest(TestCase):
+    """Test cases for archiving old rows out of the hot tables"""
+
+    def setUp(self):
+        self.farmer = Farmer.objects.create(name="Retention Farmer", phone="9000000005", address="Nashik")
+        self.old = timezone.now() - timedelta(days=400)
+
+    def archived(self, model):
+        return set(ArchivedRecord.objects.filter(model=model).values_list('original_id', flat=True))
+
+    def test_archives_old_read_notifications(self):
+        """Old read notifications move to the archive; unread and recent ones stay"""
+        rows = [Notification.objects.create(farmer=self.farmer, title=f"Note {i}", message="Hello",
+                                            is_read=i != 0) for i in range(4)]
+        Notification.objects.filter(id__in=[row.id for row in rows[:3]]).update(created_at=self.old)
+
+        self.assertEqual(archive_old_rows('notifications', dry_run=True), 2)
+        self.assertEqual(archive_old_rows('notifications', batch_size=1), 2)
+        self.assertEqual(self.archived('kisan_app.notification'), {rows[1].id, rows[2].id})
+        self.assertEqual(set(Notification.objects.values_list('id', flat=True)), {rows[0].id, rows[3].id})
+        record = ArchivedRecord.objects.get(original_id=rows[1].id)
+        self.assertEqual((record.data['title'], record.data['farmer_id']), ("Note 1", self.farmer.id))
+        self.farmer.refresh_from_db()
+        self.assertEqual(self.farmer.unread_notifications, 1)
+        self.assertEqual(archive_old_rows('notifications'), 0)
+
+    def test_keeps_reminders_of_pending_crops(self):
+        """Archiving old reminders does not make an overdue crop's reminder go out again"""
+        crops = [Crop.objects.create(name=name, season='Kharif', status=status, price_per_kg=Decimal('20'),
+                                     farmer=self.farmer, quantity=Decimal('100'), harvest_date=self.old.date())
+                 for name, status in (("Cotton", 'Ready'), ("Soybean", 'Growing'))]
+        today = timezone.localdate()
+        self.assertEqual(generate_harvest_reminders(today)['overdue'], 2)
+        Crop.objects.filter(id=crops[1].id).update(status='Harvested')
+        Notification.objects.update(is_read=True, created_at=self.old)
+        harvested = crops[1].reminders.get().id
+
+        self.assertEqual(archive_old_rows('notifications'), 1)
+        self.assertEqual(self.archived('kisan_app.notification'), {harvested})
+        self.assertEqual(sum(generate_harvest_reminders(today).values()), 0)
+        self.assertEqual(crops[0].reminders.count(), 1)
+
+    def test_keeps_latest_prices_and_readings(self):
+        """The latest price and reading survive; alert rules lose their archived price"""
+        old_day = self.old.date()
+        stale = MarketPrice.objects.create(crop_name="Wheat", market_location="Pune Market",
+                                           price_per_kg=Decimal('20'), date_recorded=old_day)
+        latest = MarketPrice.objects.create(crop_name="Wheat", market_location="Pune Market",
+                                            price_per_kg=Decimal('22'), date_recorded=old_day + timedelta(days=1))
+        rule = PriceAlertRule.objects.create(farmer=self.farmer, crop_name="Wheat", direction='above',
+                                             threshold=Decimal('10'), last_price=stale)
+        readings = [WeatherData.objects.create(location="Pune", temperature=25, humidity=50, rainfall=0,
+                                               weather_condition="Sunny", date_recorded=self.old + timedelta(hours=i))
+                    for i in range(2)]
+
+        call_command('archive_old_rows', days=300, stdout=StringIO())
+        self.assertEqual(list(MarketPrice.objects.values_list('id', flat=True)), [latest.id])
+        self.assertEqual(list(WeatherData.objects.values_list('id', flat=True)), [readings[1].id])
+        rule.refresh_from_db()
+        self.assertIsNone(rule.last_price_id)
+        self.assertEqual(LatestMarketPrice.objects.get().price_id, latest.id)
+        self.assertEqual(WeatherRollup.objects.get(resolution='day').samples, 2)
+
+    def test_rollups_keep_archived_periods(self):
+        """Writes and rebuilds after archiving recompute only the periods after the cutoff"""
+        monday = self.old.date() - timedelta(days=self.old.weekday())
+        midnight = timezone.make_aware(datetime.combine(monday, datetime.min.time()))
+        for day in range(3):
+            MarketPrice.objects.create(crop_name="Wheat", market_location="Pune Market",
+                                       price_per_kg=Decimal(20 + day), date_recorded=monday + timedelta(days=day))
+            WeatherData.objects.create(location="Pune", temperature=20 + day, humidity=50, rainfall=0,
+                                       weather_condition="Sunny", date_recorded=midnight + timedelta(hours=6 + day))
+        MarketPrice.objects.create(crop_name="Wheat", market_location="Pune Market", price_per_kg=Decimal('30'))
+        WeatherData.objects.create(location="Pune", temperature=30, humidity=50, rainfall=0, weather_condition="Sunny")
+
+        self.assertEqual(archive_old_rows('prices', days=0, now=midnight + timedelta(days=5)), 3)
+        # The weather cutoff is rounded down to 10:00, so the 10:00 hour stays recomputable
+        self.assertEqual(archive_old_rows('weather', days=0, now=midnight + timedelta(hours=10, minutes=30)), 3)
+        MarketPrice.objects.create(crop_name="Wheat", market_location="Pune Market",
+                                   price_per_kg=Decimal('25'), date_recorded=monday + timedelta(days=6))
+        WeatherData.objects.create(location="Pune", temperature=35, humidity=50, rainfall=0,
+                                   weather_condition="Sunny", date_recorded=midnight + timedelta(hours=12))
+
+        def rollups():
+            week = PriceRollup.objects.get(resolution='week', period_start=monday)
+            day = WeatherRollup.objects.get(resolution='day', location="Pune", period_start=midnight)
+            return (PriceRollup.objects.filter(resolution='day', period_start__lt=monday + timedelta(days=7)).count(),
+                    week.samples, week.open_price, week.close_price, day.samples, day.min_temperature,
+                    day.max_temperature)
+        self.assertEqual(rollups(), (4, 4, Decimal('20.00'), Decimal('25.00'), 4, 20, 35))
+        call_command('rebuild_price_rollups', stdout=StringIO())
+        call_command('rebuild_weather_rollups', stdout=StringIO())
+        self.assertEqual(rollups(), (4, 4, Decimal('20.00'), Decimal('25.00'), 4, 20, 35))
+
+    def test_jsonl_archive(self):
+        """--jsonl writes the rows to a gzipped file instead of the archive table"""
+        for day in range(3):
+            WeatherData.objects.create(location="Pune", temperature=20 + day, humidity=50, rainfall=0,
+                                       weather_condition="Sunny", date_recorded=self.old + timedelta(days=day))
+        with tempfile.TemporaryDirectory() as directory:
+            out = StringIO()
+            call_command('archive_old_rows', only=['weather'], jsonl=directory, stdout=out)
+            self.assertIn("Archived 2 weather rows", out.getvalue())
+            [name] = os.listdir(directory)
+            with gzip.open(os.path.join(directory, name), 'rt') as handle:
+                temperatures = [json.loads(line)['temperature'] for line in handle]
+        self.assertEqual(temperatures, [20, 21])
+        self.assertFalse(ArchivedRecord.objects.exists())
+
+
+@override_settings(KISAN_READ_REPLICAS=['default'])
+class ReplicaRoutingTest(TestCase):
+    """Test cases for read replica routing and read-your-writes stickiness"""
+
+    def setUp(self):
+        cache.clear()
+        self.farmer = Farmer.objects.create(name="Replica Farmer", phone="9000000006", address="Wardha")
+
+    def replica_reads(self, method, url, data=None):
+        """The response and, for each read the router placed, whether it went to a replica"""
+        reads = []
+        route = ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            reads.append(reading_from_replica())
+            return route(router, model, **hints)
+
+        with mock.patch.object(ReplicaRouter, 'db_for_read', spy):
+            response = getattr(self.client, method)(url, data)
+        return response, set(reads)
+
+    def test_routes_listed_views_to_replicas(self):
+        """Listed pages and API reads use replicas; other pages and writes use the primary"""
+        for name in ('farmers_list', 'analytics_dashboard', 'api_crops'):
+            self.assertEqual(self.replica_reads('get', reverse(f'kisan_app:{name}'))[1], {True})
+        self.assertEqual(self.replica_reads('get', reverse('kisan_app:price_calculator'))[1], {False})
+
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_write(Farmer, instance=self.farmer), 'default')
+        self.assertFalse(router.allow_migrate('default', 'kisan_app'))
+
+    def test_reads_stick_to_primary_after_post(self):
+        """A POST pins the visitor's reads to the primary and keeps replica pages out of the cache"""
+        Notification.objects.create(farmer=self.farmer, title="Update", message="Hello")
+        response, reads = self.replica_reads('post', reverse('kisan_app:mark_notifications_read'),
+                                             {'farmer': self.farmer.id, 'all': '1'})
+        self.assertEqual(response.json()['marked'], 1)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+        self.assertEqual(self.replica_reads('get', reverse('kisan_app:notifications'))[1], {False})
+
+        # Other visitors still read from replicas, but not into the cache while it may lag
+        visitor = Client()
+        for _ in range(2):
+            visitor.get(reverse('kisan_app:farmers_list'))
+        self.assertEqual(cache_stats()['view:farmers_list'], {'hits': 0, 'misses': 2})
+
+    @override_settings(KISAN_READ_REPLICAS=[])
+    def test_no_replicas(self):
+        """Without replicas nothing is routed and no cookie is set"""
+        response, reads = self.replica_reads('post', reverse('kisan_app:mark_notifications_read'),
+                                             {'farmer': self.farmer.id, 'all': '1'})
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(self.replica_reads('get', reverse('kisan_app:farmers_list'))[1], {False})
+
+
+class ParallelQueriesTest(SimpleTestCase):
+    """Test cases for running independent queries concurrently"""
+
+    def test_overlaps_callables(self):
+        """The batch takes about as long as its slowest callable, not the sum"""
+        def slow(value):
+            return lambda: time.sleep(0.2) or value
+
+        started = time.perf_counter()
+        results = async_to_sync(gather_queries)(a=slow(1), b=slow(2), c=slow(3), d=slow(4))
+        self.assertEqual(results, {'a': 1, 'b': 2, 'c': 3, 'd': 4})
+        self.assertLess(time.perf_counter() - started, 0.6)
+
+    def test_asgi_does_not_keep_connections(self):
+        """Request threads are new under ASGI, so production closes their connections"""
+        self.addCleanup(importlib.reload, settings_production)
+        with mock.patch.dict(os.environ, {'KISAN_ASGI': 'true', 'KISAN_DB_CONNECTIONS': 'pgbouncer'}):
+            database = importlib.reload(settings_production).DATABASES['default']
+        self.assertEqual((database['CONN_MAX_AGE'], database['DISABLE_SERVER_SIDE_CURSORS']), (0, True))
+
+
+class AsyncDashboardTest(TransactionTestCase):
+    """Test cases for the async dashboards, with their queries on separate connections"""
+
+    def test_dashboards_render_concurrent_results(self):
+        farmer = Farmer.objects.create(name="Async Farmer", phone="9000000007", address="Akola")
+        Crop.objects.create(name="Cotton", season='Kharif', price_per_kg=Decimal('60'), farmer=farmer,
+                            quantity=Decimal('10'), harvest_date=date.today() + timedelta(days=3))
+        cache.clear()
+
+        response = self.client.get(reverse('kisan_app:home'))
+        self.assertEqual((response.context['farmers_count'], response.context['crops_count']), (1, 1))
+        self.assertEqual(response.context['top_farmers'][0].name, "Async Farmer")
+
+        response = self.client.get(reverse('kisan_app:analytics_dashboard'))
+        self.assertEqual(response.context['total_farmers'], 1)
+        self.assertEqual([crop.farmer.name for crop in response.context['upcoming_harvests']], ["Async Farmer"])
+
+    @override_settings(KISAN_PROFILING=True)
+    def test_profiles_count_pool_queries(self):
+        """Queries run on the pool threads are part of the request's profile"""
+        Farmer.objects.create(name="Async Farmer", phone="9000000007", address="Akola")
+        cache.clear()
+        clear_profiles()
+        with CaptureQueriesContext(connection) as request_thread:
+            self.client.get(reverse('kisan_app:home'))
+        self.assertGreater(slowest_requests()[0]['queries'], len(request_thread))
+
+
+class WarmUpTest(SimpleTestCase):
+    """Test cases for the pre-fork warm-up of URL resolvers and templates"""
+
+    def test_warms_urls_and_templates(self):
+        """Every argument-free route and project template is loaded"""
+        names = set(url_names(get_resolver().url_patterns))
+        self.assertIn('kisan_app:api_crops', names)
+        self.assertIn('admin:index', names)
+        self.assertNotIn('kisan_app:farmer_detail', names)
+
+        stats = warm_up()
+        templates = os.listdir(os.path.join(os.path.dirname(__file__), 'templates', 'kisan_app'))
+        self.assertEqual((stats['urls'], stats['templates']), (len(names), len(templates)))
+
+
+class StaticAssetsTest(TestCase):
+    """Test cases for the stylesheet served as a static file"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_link_the_stylesheet(self):
+        response = self.client.get(reverse('kisan_app:home'))
+        self.assertContains(response, '<link rel="stylesheet" href="/static/css/base.css">')
+        self.assertNotContains(response, '<style')
+
+    def test_collected_stylesheet_is_hashed_and_cached_far_future(self):
+        """After collectstatic pages link a content-hashed name that WhiteNoise marks immutable"""
+        with tempfile.TemporaryDirectory() as root, override_settings(
+                STATIC_ROOT=root, WHITENOISE_USE_FINDERS=False,
+                STATICFILES_STORAGE='whitenoise.storage.CompressedManifestStaticFilesStorage'):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            client = Client()
+            page = client.get(reverse('kisan_app:home')).content.decode()
+            url = re.search(r'href="(/static/css/base\.[0-9a-f]{12}\.css)"', page).group(1)
+
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertIn('max-age=315360000', response['Cache-Control'])
+            response.close()
+
+    def test_production_uses_the_cached_loader(self):
+        loader, loaders = settings_production.TEMPLATES[0]['OPTIONS']['loaders'][0]
+        self.assertEqual(loader, 'django.template.loaders.cached.Loader')
+        self.assertIn('django.template.loaders.app_directories.Loader', loaders)
+        self.assertFalse(settings_production.TEMPLATES[0]['APP_DIRS'])
+        self.assertNotIn('loaders', settings.TEMPLATES[0]['OPTIONS'])
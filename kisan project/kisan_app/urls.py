@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'kisan_app'
 
@@ -15,4 +15,21 @@ urlpatterns = [
     path('calculator/', views.price_calculator, name='price_calculator'),
     path('weather/', views.weather_info, name='weather_info'),
     path('notifications/', views.notifications_view, name='notifications'),
+    path('notifications/read/', views.mark_notifications_read, name='mark_notifications_read'),
+    path('alerts/', views.price_alerts, name='price_alerts'),
+    path('alerts/<int:rule_id>/delete/', views.delete_price_alert, name='delete_price_alert'),
+    
+    # Monitoring
+    path('cache-stats/', views.cache_stats_view, name='cache_stats'),
+    path('profiling/', views.profiling_view, name='profiling'),
+    
+    # Read-only JSON API
+    path('api/v1/', api.index, name='api_index'),
+    path('api/v1/farmers/', api.resource_list, {'resource': 'farmers'}, name='api_farmers'),
+    path('api/v1/crops/', api.resource_list, {'resource': 'crops'}, name='api_crops'),
+    path('api/v1/prices/', api.resource_list, {'resource': 'prices'}, name='api_prices'),
+    path('api/v1/prices/history/', api.price_history_view, name='api_price_history'),
+    path('api/v1/weather/', api.resource_list, {'resource': 'weather'}, name='api_weather'),
+    path('api/v1/weather/history/', api.weather_history_view, name='api_weather_history'),
+    path('api/v1/notifications/', api.resource_list, {'resource': 'notifications'}, name='api_notifications'),
 ]
\ No newline at end of file
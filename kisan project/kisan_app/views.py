@@ -1,68 +1,81 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
+from django.contrib.admin.views.decorators import staff_member_required
 from django.http import HttpResponse, JsonResponse
-from django.db.models import Sum, Avg, Count, Q
+from django.db.models import Sum, Avg, Count
+from django.forms import modelform_factory
 from django.utils import timezone
+from django.views.decorators.http import require_POST
 from datetime import date, timedelta
 import json
-from .models import Farmer, Crop, CropCategory, MarketPrice, WeatherData, Notification
+from .models import Farmer, Crop, CropCategory, MarketPrice, WeatherData, Notification, LatestWeather, PriceAlertRule
+from .analytics import dashboard_summary
+from .cache import cache_response, cache_stats, cached_fragment
+from .pagination import paginate, wants_json, page_json_response
+from .price_compare import NumberEncoder, OfferError, compare_offers, parse_offers
+from .profiling import clear_profiles, slowest_requests
+from .notifications import current_farmer_id, mark_read, remember_farmer, unread_count
+from .parallel import gather_queries
+from .search import get_search_backend
+from .weather import weather_history
 
 # Create your views here.
 
 
-def home(request):
+async def home(request):
     """Enhanced home page view with analytics"""
-    farmers_count = Farmer.objects.count()
-    crops_count = Crop.objects.count()
-    
-    # Analytics data
-    total_harvest_value = Crop.objects.aggregate(total=Sum('quantity'))['total'] or 0
-    total_investment = Crop.objects.aggregate(total=Sum('investment_cost'))['total'] or 0
-    total_profit = sum(crop.profit for crop in Crop.objects.all())
+    # The cached aggregates are independent, so their queries run concurrently
+    stats = await gather_queries(
+        farmers_count=lambda: cached_fragment('home_farmers_count', [Farmer], Farmer.objects.count),
+        crops_count=lambda: cached_fragment('home_crops_count', [Crop], Crop.objects.count),
+        totals=lambda: cached_fragment('home_crop_totals', [Crop], Crop.objects.financial_totals),
+        # Crop distribution by season
+        season_stats=lambda: cached_fragment('home_season_stats', [Crop], lambda: list(
+            Crop.objects.values('season').annotate(count=Count('id'))
+        )),
+        # Top performing farmers
+        top_farmers=lambda: cached_fragment('home_top_farmers', [Farmer, Crop], lambda: list(
+            Farmer.objects.annotate(total_value=Sum('crops__quantity')).order_by('-total_value')[:3]
+        )),
+    )
+    totals = stats['totals']
     
     # Recent activities
     recent_crops = Crop.objects.order_by('-created_at')[:5]
     upcoming_harvests = Crop.objects.filter(
         harvest_date__gte=date.today(),
         harvest_date__lte=date.today() + timedelta(days=30),
-        status__in=['Planted', 'Growing']
+        status__in=Crop.PENDING_STATUSES
     ).order_by('harvest_date')[:5]
     
-    # Crop distribution by season
-    season_stats = Crop.objects.values('season').annotate(count=Count('id'))
-    
-    # Top performing farmers
-    top_farmers = Farmer.objects.annotate(
-        total_value=Sum('crops__quantity')
-    ).order_by('-total_value')[:3]
-    
     context = {
-        'farmers_count': farmers_count,
-        'crops_count': crops_count,
-        'total_harvest_value': total_harvest_value,
-        'total_investment': total_investment,
-        'total_profit': total_profit,
+        'farmers_count': stats['farmers_count'],
+        'crops_count': stats['crops_count'],
+        'total_harvest_value': totals['total_quantity'],
+        'total_investment': totals['total_investment'],
+        'total_profit': totals['total_profit'],
         'recent_crops': recent_crops,
         'upcoming_harvests': upcoming_harvests,
-        'season_stats': season_stats,
-        'top_farmers': top_farmers,
+        'season_stats': stats['season_stats'],
+        'top_farmers': stats['top_farmers'],
     }
     
-    return render(request, 'kisan_app/home.html', context)
+    # Rendering may still query (the unread badge, lazy querysets), so it runs on a thread
+    return await sync_to_async(render)(request, 'kisan_app/home.html', context)
 
 
+@cache_response(Farmer, Crop)
 def farmers_list(request):
     """Enhanced farmers list with search and filtering"""
-    farmers = Farmer.objects.all().prefetch_related('crops')
+    farmers = Farmer.objects.with_rollups()
     
     # Search functionality
     search = request.GET.get('search')
+    ordering = ('-created_at', '-id')
     if search:
-        farmers = farmers.filter(
-            Q(name__icontains=search) |
-            Q(phone__icontains=search) |
-            Q(email__icontains=search) |
-            Q(address__icontains=search)
-        )
+        farmers = get_search_backend().search_farmers(farmers, search)
+        ordering = ('-search_rank', '-id')
     
     # Filter by experience
     experience = request.GET.get('experience')
@@ -74,14 +87,16 @@ def farmers_list(request):
         elif experience == 'expert':
             farmers = farmers.filter(experience_years__gte=10)
     
-    # Add analytics for each farmer
-    for farmer in farmers:
-        farmer.crop_count = farmer.crops.count()
-        farmer.total_value = sum(crop.total_value for crop in farmer.crops.all())
-        farmer.upcoming_count = farmer.upcoming_harvests.count()
+    page = paginate(request, farmers, ordering)
+    if wants_json(request):
+        return page_json_response(page, [
+            'id', 'name', 'phone', 'email', 'experience_years', 'created_at',
+            'crop_count', 'total_value', 'upcoming_count',
+        ])
     
     context = {
-        'farmers': farmers,
+        'farmers': page,
+        'page': page,
         'search': search,
         'experience': experience,
     }
@@ -124,6 +139,7 @@ def farmer_detail(request, farmer_id):
     return render(request, 'kisan_app/farmer_detail.html', context)
 
 
+@cache_response(Crop, Farmer)
 def crops_list(request):
     """Enhanced crops list with filtering and sorting"""
     crops = Crop.objects.select_related('farmer', 'category').all()
@@ -131,11 +147,7 @@ def crops_list(request):
     # Search functionality
     search = request.GET.get('search')
     if search:
-        crops = crops.filter(
-            Q(name__icontains=search) |
-            Q(farmer__name__icontains=search) |
-            Q(season__icontains=search)
-        )
+        crops = get_search_backend().search_crops(crops, search)
     
     # Filter by season
     season = request.GET.get('season')
@@ -150,18 +162,27 @@ def crops_list(request):
     # Sort by
     sort_by = request.GET.get('sort', 'harvest_date')
     if sort_by == 'value':
-        crops = sorted(crops, key=lambda x: x.total_value, reverse=True)
+        ordering = ('-value_amount', '-id')
     elif sort_by == 'profit':
-        crops = sorted(crops, key=lambda x: x.profit, reverse=True)
+        ordering = ('-profit_amount', '-id')
+    elif search and 'sort' not in request.GET:
+        ordering = ('-search_rank', '-id')
     else:
-        crops = crops.order_by('harvest_date')
+        ordering = ('harvest_date', 'id')
+    page = paginate(request, crops.with_financials(), ordering)
+    if wants_json(request):
+        return page_json_response(page, [
+            'id', 'name', 'farmer_id', 'season', 'status', 'quantity', 'price_per_kg',
+            'harvest_date', 'value_amount', 'profit_amount',
+        ])
     
     # Get filter options
     seasons = Crop.SEASON_CHOICES
     statuses = Crop.STATUS_CHOICES
     
     context = {
-        'crops': crops,
+        'crops': page,
+        'page': page,
         'search': search,
         'season': season,
         'status': status,
@@ -173,136 +194,247 @@ def crops_list(request):
     return render(request, 'kisan_app/crops_list.html', context)
 
 
-def analytics_dashboard(request):
+@cache_response(Farmer, Crop)
+async def analytics_dashboard(request):
     """Advanced analytics dashboard"""
-    # Overall statistics
-    total_farmers = Farmer.objects.count()
-    total_crops = Crop.objects.count()
-    total_investment = Crop.objects.aggregate(Sum('investment_cost'))['investment_cost__sum'] or 0
-    total_revenue = sum(crop.total_value for crop in Crop.objects.all())
-    total_profit = sum(crop.profit for crop in Crop.objects.all())
-    
-    # Monthly data for charts
-    from django.db.models.functions import TruncMonth
-    monthly_data = Crop.objects.annotate(
-        month=TruncMonth('created_at')
-    ).values('month').annotate(
-        count=Count('id'),
-        revenue=Sum('quantity')
-    ).order_by('month')
-    
-    # Crop distribution
-    crop_distribution = Crop.objects.values('season').annotate(
-        count=Count('id'),
-        total_value=Sum('quantity')
-    )
-    
-    # Top performing crops
-    top_crops = Crop.objects.order_by('-quantity')[:5]
-    
-    # Upcoming harvests
-    upcoming_harvests = Crop.objects.filter(
-        harvest_date__gte=date.today(),
-        harvest_date__lte=date.today() + timedelta(days=30)
-    ).order_by('harvest_date')
-    
-    # Overdue crops
-    overdue_crops = Crop.objects.filter(
-        harvest_date__lt=date.today(),
-        status__in=['Planted', 'Growing']
+    crops = Crop.objects.select_related('farmer')
+    results = await gather_queries(
+        # Overall statistics, monthly series and season distribution are
+        # pre-aggregated in AnalyticsSnapshot
+        summary=dashboard_summary,
+        total_farmers=Farmer.objects.count,
+        # Top performing crops
+        top_crops=lambda: list(crops.order_by('-quantity')[:5]),
+        # Upcoming harvests
+        upcoming_harvests=lambda: list(crops.filter(
+            harvest_date__gte=date.today(),
+            harvest_date__lte=date.today() + timedelta(days=30)
+        ).order_by('harvest_date')),
+        # Overdue crops
+        overdue_crops=lambda: list(crops.filter(
+            harvest_date__lt=date.today(),
+            status__in=Crop.PENDING_STATUSES
+        )),
     )
+    summary = results['summary']
     
     context = {
-        'total_farmers': total_farmers,
-        'total_crops': total_crops,
-        'total_investment': total_investment,
-        'total_revenue': total_revenue,
-        'total_profit': total_profit,
-        'monthly_data': list(monthly_data),
-        'crop_distribution': list(crop_distribution),
-        'top_crops': top_crops,
-        'upcoming_harvests': upcoming_harvests,
-        'overdue_crops': overdue_crops,
+        'total_farmers': results['total_farmers'],
+        'total_crops': summary['total_crops'],
+        'total_investment': summary['total_investment'],
+        'total_revenue': summary['total_revenue'],
+        'total_profit': summary['total_profit'],
+        'monthly_data': summary['monthly_data'],
+        'crop_distribution': summary['crop_distribution'],
+        'top_crops': results['top_crops'],
+        'upcoming_harvests': results['upcoming_harvests'],
+        'overdue_crops': results['overdue_crops'],
     }
     
-    return render(request, 'kisan_app/analytics_dashboard.html', context)
+    return await sync_to_async(render)(request, 'kisan_app/analytics_dashboard.html', context)
 
 
 def price_calculator(request):
     """Crop price calculator with market comparison"""
     if request.method == 'POST':
-        crop_name = request.POST.get('crop_name')
-        quantity = float(request.POST.get('quantity', 0))
-        your_price = float(request.POST.get('price', 0))
-        
-        # Get market prices
-        market_prices = MarketPrice.objects.filter(
-            crop_name__icontains=crop_name
-        ).order_by('-date_recorded')[:5]
-        
-        # Calculate values
-        your_total = quantity * your_price
-        
-        calculations = []
-        for market_price in market_prices:
-            market_total = quantity * market_price.price_per_kg
-            difference = market_total - your_total
-            percentage = (difference / your_total * 100) if your_total > 0 else 0
-            
-            calculations.append({
-                'market': market_price.market_location,
-                'price': market_price.price_per_kg,
-                'total': market_total,
-                'difference': difference,
-                'percentage': percentage,
-                'date': market_price.date_recorded
-            })
-        
+        # Compare one offer (form fields) or many ({"items": [...]} JSON body)
+        # with the latest price at every mandi
+        try:
+            offers = parse_offers(request)
+        except OfferError as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+        results = compare_offers(offers)
+        if request.content_type == 'application/json':
+            return JsonResponse({'results': results}, encoder=NumberEncoder)
+        result = results[0]
         return JsonResponse({
-            'your_total': your_total,
-            'calculations': calculations
-        })
+            'your_total': result['your_total'],
+            'calculations': result['markets'],
+            'summary': result['summary'],
+        }, encoder=NumberEncoder)
     
     # Get recent market prices for display
-    recent_prices = MarketPrice.objects.order_by('-date_recorded')[:10]
+    page = cached_fragment(
+        'recent_market_prices', [MarketPrice],
+        lambda: paginate(request, MarketPrice.objects.all(), ('-date_recorded', '-id'), per_page=10),
+        vary=request.GET.urlencode(),
+    )
+    if wants_json(request):
+        return page_json_response(page, [
+            'id', 'crop_name', 'market_location', 'price_per_kg', 'date_recorded', 'source',
+        ])
     
     context = {
-        'recent_prices': recent_prices
+        'recent_prices': page,
+        'page': page,
     }
     
     return render(request, 'kisan_app/price_calculator.html', context)
 
 
+@cache_response(WeatherData)
 def weather_info(request):
-    """Weather information page"""
-    # Get latest weather data
-    weather_data = WeatherData.objects.order_by('-date_recorded')[:10]
-    
-    # Get unique locations
-    locations = WeatherData.objects.values_list('location', flat=True).distinct()
+    """Weather information page, optionally for a single location"""
+    location = request.GET.get('location', '').strip()
+    readings = WeatherData.objects.all()
+    if location:
+        readings = readings.filter(location=location)
+    page = paginate(request, readings, ('-date_recorded', '-id'), per_page=10)
+    if wants_json(request):
+        return page_json_response(page, [
+            'id', 'location', 'temperature', 'humidity', 'rainfall', 'weather_condition', 'date_recorded',
+        ])
+    
+    # Current conditions and the location list come from one row per location
+    latest_weather = list(LatestWeather.objects.all())
     
     context = {
-        'weather_data': weather_data,
-        'locations': locations,
+        'weather_data': page,
+        'page': page,
+        'latest_weather': latest_weather,
+        'locations': [reading.location for reading in latest_weather],
+        'selected_location': location,
+        'daily_summary': weather_history(location, 'day', timezone.now() - timedelta(days=7)) if location else [],
     }
     
     return render(request, 'kisan_app/weather_info.html', context)
 
 
+def parse_id(value):
+    try:
+        farmer_id = int(value)
+    except (TypeError, ValueError):
+        return None
+    return farmer_id if farmer_id > 0 else None
+
+
 def notifications_view(request):
-    """User notifications"""
-    # For now, show all notifications (in real app, filter by user)
-    notifications = Notification.objects.order_by('-created_at')[:20]
-    
+    """Notifications of the current farmer, or everyone's, filtered by type and read state.
+
+    ``?farmer=<id>`` picks the farmer, remembered in a cookie for later
+    pages and the nav badge, and ``?farmer=all`` goes back to everyone's
+    notifications. JSON requests only use the farmer for that request.
+    """
     # Mark as read if requested
     if request.method == 'POST':
-        notification_id = request.POST.get('notification_id')
-        if notification_id:
-            Notification.objects.filter(id=notification_id).update(is_read=True)
-            return JsonResponse({'status': 'success'})
-    
+        notification_id = parse_id(request.POST.get('notification_id'))
+        farmer_id = Notification.objects.filter(id=notification_id).values_list('farmer_id', flat=True).first()
+        if farmer_id is not None:
+            mark_read(farmer_id, [notification_id])
+            return JsonResponse({'status': 'success', 'unread': unread_count(farmer_id)})
+        return JsonResponse({'status': 'error', 'error': 'Unknown notification'}, status=404)
+    
+    choice = request.GET.get('farmer', '')
+    farmer_id = current_farmer_id(request)
+    if choice == 'all':
+        farmer_id = None
+    elif parse_id(choice) and Farmer.objects.filter(id=parse_id(choice)).exists():
+        farmer_id = parse_id(choice)
+    
+    notifications = Notification.objects.select_related('farmer')
+    if farmer_id is not None:
+        notifications = notifications.filter(farmer_id=farmer_id)
+    kind = request.GET.get('type', '')
+    if kind in dict(Notification.NOTIFICATION_TYPES):
+        notifications = notifications.filter(notification_type=kind)
+    if request.GET.get('unread') in ('1', 'true'):
+        notifications = notifications.filter(is_read=False)
+    page = paginate(request, notifications, ('-created_at', '-id'))
+    if wants_json(request):
+        return page_json_response(page, [
+            'id', 'farmer_id', 'title', 'message', 'notification_type', 'is_read', 'created_at',
+        ])
+    
+    # The nav badge on this page already follows the newly picked farmer
+    request.kisan_farmer_id = farmer_id
+    if farmer_id is not None:
+        unread = unread_count(farmer_id)
+    else:
+        unread = cached_fragment('unread_total', [Notification], lambda: (
+            Farmer.objects.aggregate(total=Sum('unread_notifications'))['total'] or 0
+        ))
     context = {
-        'notifications': notifications
+        'notifications': page,
+        'page': page,
+        'farmer_id': farmer_id,
+        'unread_count': unread,
     }
     
-    return render(request, 'kisan_app/notifications.html', context)
\ No newline at end of file
+    response = render(request, 'kisan_app/notifications.html', context)
+    if choice:
+        remember_farmer(response, farmer_id)
+    return response
+
+
+@require_POST
+def mark_notifications_read(request):
+    """Mark a farmer's notifications read in one UPDATE: ``ids`` (comma-separated) or ``all=1``"""
+    farmer_id = parse_id(request.POST.get('farmer')) or current_farmer_id(request)
+    if farmer_id is None:
+        return JsonResponse({'status': 'error', 'error': 'farmer is required'}, status=400)
+    if request.POST.get('all') in ('1', 'true'):
+        ids = None
+    else:
+        ids = [parse_id(value) for value in request.POST.get('ids', '').split(',') if value.strip()]
+        if not ids or None in ids:
+            return JsonResponse({'status': 'error', 'error': 'ids must be a comma-separated list of ids'}, status=400)
+    marked = mark_read(farmer_id, ids)
+    return JsonResponse({'status': 'success', 'marked': marked, 'unread': unread_count(farmer_id)})
+
+
+PriceAlertForm = modelform_factory(PriceAlertRule, fields=['crop_name', 'market_location', 'direction', 'threshold'])
+ALERT_FIELDS = ['id', 'crop_name', 'market_location', 'direction', 'threshold', 'is_active', 'last_triggered_at',
+                'created_at']
+
+
+def price_alerts(request):
+    """A farmer's price alert rules; POST registers a new threshold.
+
+    The farmer comes from ``farmer`` or the one picked on the notifications
+    page. The rules fire through ``evaluate_price_alerts`` after imports.
+    """
+    data = request.POST if request.method == 'POST' else request.GET
+    farmer_id = parse_id(data.get('farmer')) or current_farmer_id(request)
+    if farmer_id is None:
+        return JsonResponse({'status': 'error', 'error': 'farmer is required'}, status=400)
+    if not Farmer.objects.filter(id=farmer_id).exists():
+        return JsonResponse({'status': 'error', 'error': 'Unknown farmer'}, status=404)
+
+    if request.method == 'POST':
+        form = PriceAlertForm(request.POST, instance=PriceAlertRule(farmer_id=farmer_id))
+        if form.is_valid() and form.cleaned_data['threshold'] <= 0:
+            form.add_error('threshold', "Threshold must be positive.")
+        if not form.is_valid():
+            errors = '; '.join(f"{field}: {' '.join(messages)}" for field, messages in form.errors.items())
+            return JsonResponse({'status': 'error', 'error': errors}, status=400)
+        rule = form.save()
+        return JsonResponse({'status': 'success', 'rule': PriceAlertRule.objects.values(*ALERT_FIELDS).get(id=rule.id)},
+                            status=201)
+
+    rules = PriceAlertRule.objects.filter(farmer_id=farmer_id).values(*ALERT_FIELDS)
+    return JsonResponse({'farmer': farmer_id, 'rules': list(rules)})
+
+
+@require_POST
+def delete_price_alert(request, rule_id):
+    """Remove one of the current farmer's price alert rules"""
+    farmer_id = parse_id(request.POST.get('farmer')) or current_farmer_id(request)
+    deleted, _ = PriceAlertRule.objects.filter(id=rule_id, farmer_id=farmer_id).delete()
+    if not deleted:
+        return JsonResponse({'status': 'error', 'error': 'Unknown alert'}, status=404)
+    return JsonResponse({'status': 'success'})
+
+
+@staff_member_required
+def cache_stats_view(request):
+    """Cache hit/miss counters for monitoring"""
+    return JsonResponse({'backend': settings.KISAN_CACHE_BACKEND, 'recording': settings.KISAN_CACHE_STATS,
+                         'stats': cache_stats()})
+
+
+@staff_member_required
+def profiling_view(request):
+    """Slowest profiled requests of this process; POST clears them"""
+    if request.method == 'POST':
+        clear_profiles()
+    return JsonResponse({'enabled': settings.KISAN_PROFILING, 'slowest': slowest_requests()})
@@ -0,0 +1,225 @@
+"""Hourly and daily weather rollups and the latest reading per location.
+
+Stations report every few minutes, so pages never aggregate WeatherData
+directly. WeatherRollup holds the min/max/average temperature and
+humidity and the total rainfall of each location per hour and per day,
+and LatestWeather holds the newest reading of each location.
+
+``refresh_weather_rollups`` recomputes a time range (widened to whole
+days) for some or all locations, one location and ``CHUNK_DAYS`` days at a
+time, so memory stays bounded however long the range. ``refresh_for_readings``
+takes the first and last reading time written for each location: the
+WeatherData signal handlers pass the reading that changed, the bulk
+importer the span of each location it touched, and ``python manage.py
+rebuild_weather_rollups`` recomputes everything.
+
+Hourly rollups before the retention job's archive cutoff are kept as they
+are, since some of their readings have left the table; days are folded from
+the stored and recomputed hours together.
+
+LatestWeather follows the same triggers. ``advance_latest_weather`` reads
+only readings at or after each location's current latest one;
+``refresh_latest_weather`` rescans a location and is needed only when its
+latest reading is deleted or moved back in time or to another location.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Max, Min, Q, Sum, Window
+from django.db.models.functions import RowNumber, TruncHour
+from django.utils import timezone
+
+from .models import LatestWeather, WeatherData, WeatherRollup
+from .retention import archive_floor
+
+RESOLUTIONS = ['hour', 'day']
+DEFAULT_RANGE = {'hour': timedelta(hours=48), 'day': timedelta(days=30)}
+# Days of one location's rollups rebuilt in memory at once
+CHUNK_DAYS = 31
+
+
+def day_start(moment):
+    """Local midnight at the start of ``moment``'s day"""
+    return timezone.make_aware(datetime.combine(timezone.localtime(moment).date(), time()))
+
+
+def hourly_rollups(readings):
+    groups = readings.annotate(period=TruncHour('date_recorded')).values('location', 'period').annotate(
+        min_temperature=Min('temperature'), max_temperature=Max('temperature'), avg_temperature=Avg('temperature'),
+        min_humidity=Min('humidity'), max_humidity=Max('humidity'), avg_humidity=Avg('humidity'),
+        total_rainfall=Sum('rainfall'), samples=Count('id'),
+    ).order_by('location', 'period')
+    return [
+        WeatherRollup(resolution='hour', period_start=group.pop('period'), **group)
+        for group in groups
+    ]
+
+
+def daily_rollups(hours):
+    """Fold hourly rollups (sorted by location and time) into daily ones"""
+    days = defaultdict(list)
+    for hour in hours:
+        days[(hour.location, day_start(hour.period_start))].append(hour)
+    rows = []
+    for (location, start), members in days.items():
+        samples = sum(hour.samples for hour in members)
+        rows.append(WeatherRollup(
+            resolution='day',
+            location=location,
+            period_start=start,
+            min_temperature=min(hour.min_temperature for hour in members),
+            max_temperature=max(hour.max_temperature for hour in members),
+            avg_temperature=sum(hour.avg_temperature * hour.samples for hour in members) / samples,
+            min_humidity=min(hour.min_humidity for hour in members),
+            max_humidity=max(hour.max_humidity for hour in members),
+            avg_humidity=sum(hour.avg_humidity * hour.samples for hour in members) / samples,
+            total_rainfall=sum(hour.total_rainfall for hour in members),
+            samples=samples,
+        ))
+    return rows
+
+
+def refresh_weather_rollups(start=None, end=None, locations=None):
+    """Recompute the rollups between the ``start`` and ``end`` datetimes for ``locations``.
+
+    Missing bounds or ``locations=None`` mean everything. Each location is
+    rebuilt ``CHUNK_DAYS`` days at a time, each chunk in its own transaction.
+    Hours before the archive cutoff keep their stored rollups. Returns the
+    number of hourly and daily rows written.
+    """
+    readings = WeatherData.objects.all()
+    rollups = WeatherRollup.objects.all()
+    floor = archive_floor(WeatherData)
+    archived = Q(resolution='hour', period_start__lt=floor) if floor is not None else Q()
+    if locations is None:
+        # Locations with stale rollups but no readings left are refreshed (emptied) too
+        locations = set(readings.values_list('location', flat=True).distinct())
+        locations |= set(rollups.values_list('location', flat=True).distinct())
+    hour_count = day_count = 0
+    for location in sorted(locations):
+        first, last = start, end
+        if first is None or last is None:
+            bounds = readings.filter(location=location).aggregate(first=Min('date_recorded'), last=Max('date_recorded'))
+            periods = rollups.filter(location=location).aggregate(first=Min('period_start'), last=Max('period_start'))
+            first = first or min(filter(None, [bounds['first'], periods['first']]), default=None)
+            last = last or max(filter(None, [bounds['last'], periods['last']]), default=None)
+            if first is None or last is None:
+                continue
+        chunk_start, end_of_range = day_start(first), day_start(last) + timedelta(days=1)
+        while chunk_start < end_of_range:
+            chunk_end = min(day_start(chunk_start + timedelta(days=CHUNK_DAYS)), end_of_range)
+            fresh = readings.filter(location=location, date_recorded__gte=chunk_start, date_recorded__lt=chunk_end)
+            chunk = rollups.filter(location=location, period_start__gte=chunk_start, period_start__lt=chunk_end)
+            kept = []
+            if floor is not None and chunk_start < floor:
+                fresh = fresh.filter(date_recorded__gte=floor)
+                kept = list(chunk.filter(archived).order_by('period_start'))
+            hours = hourly_rollups(fresh)
+            days = daily_rollups(kept + hours)
+            with transaction.atomic():
+                chunk.exclude(archived).delete()
+                WeatherRollup.objects.bulk_create(hours + days, batch_size=1000)
+            hour_count += len(hours)
+            day_count += len(days)
+            chunk_start = chunk_end
+    return hour_count, day_count
+
+
+LATEST_FIELDS = ['location', 'temperature', 'humidity', 'rainfall', 'weather_condition', 'date_recorded']
+
+
+def latest_reading_rows(readings):
+    """The newest reading of each location in ``readings``, in one query"""
+    if connection.vendor == 'postgresql':
+        return readings.order_by('location', '-date_recorded', '-id').distinct('location')
+    return readings.annotate(recency=Window(
+        RowNumber(),
+        partition_by=[F('location')],
+        order_by=[F('date_recorded').desc(), F('id').desc()],
+    )).filter(recency=1)
+
+
+def refresh_latest_weather(locations=None):
+    """Recompute LatestWeather for ``locations``, or all locations.
+
+    Returns the number of rows written.
+    """
+    readings = WeatherData.objects.all()
+    current = LatestWeather.objects.all()
+    if locations is not None:
+        if not locations:
+            return 0
+        readings = readings.filter(location__in=locations)
+        current = current.filter(location__in=locations)
+    rows = latest_weather_models(readings)
+    missing = set(current.values_list('location', flat=True)) - {row.location for row in rows}
+    with transaction.atomic():
+        if missing:
+            LatestWeather.objects.filter(location__in=missing).delete()
+        upsert_latest_weather(rows)
+    return len(rows)
+
+
+def latest_weather_models(readings):
+    return [
+        LatestWeather(reading_id=row.pop('id'), **row)
+        for row in latest_reading_rows(readings).values('id', *LATEST_FIELDS)
+    ]
+
+
+def upsert_latest_weather(rows):
+    LatestWeather.objects.bulk_create(
+        rows, batch_size=1000, update_conflicts=True, unique_fields=['location'],
+        update_fields=['reading', *LATEST_FIELDS[1:], 'updated_at'],
+    )
+
+
+def advance_latest_weather(spans):
+    """Move LatestWeather forward to the newest readings written within ``spans``.
+
+    Only readings at or after a location's current latest one are read, and
+    locations whose writes are all older are skipped. Returns the number of
+    rows written.
+    """
+    current = dict(LatestWeather.objects.filter(location__in=list(spans)).values_list('location', 'date_recorded'))
+    newer = Q()
+    for location, (first, last) in spans.items():
+        since = current.get(location, first)
+        if last >= since:
+            newer |= Q(location=location, date_recorded__gte=since)
+    if not newer:
+        return 0
+    rows = latest_weather_models(WeatherData.objects.filter(newer))
+    upsert_latest_weather(rows)
+    return len(rows)
+
+
+def refresh_for_readings(spans):
+    """Refresh the rollups and latest readings touched by ``spans``.
+
+    ``spans`` maps locations to the first and last reading time written.
+    """
+    for location, (first, last) in sorted(spans.items()):
+        refresh_weather_rollups(first, last, [location])
+    if spans:
+        advance_latest_weather(spans)
+
+
+def weather_history(location, resolution='day', start=None, end=None):
+    """Rollup points of one location between the ``start`` and ``end`` datetimes"""
+    rollups = WeatherRollup.objects.filter(resolution=resolution, location=location)
+    if start:
+        rollups = rollups.filter(period_start__gte=start)
+    if end:
+        rollups = rollups.filter(period_start__lte=end)
+    return list(rollups.order_by('period_start').values(
+        'period_start', 'min_temperature', 'max_temperature', 'avg_temperature',
+        'min_humidity', 'max_humidity', 'avg_humidity', 'total_rainfall', 'samples',
+    ))
+
+
+def default_range(resolution, end=None):
+    """The last 48 hours, or the last 30 days, up to ``end`` (now by default)"""
+    end = end or timezone.now()
+    return end - DEFAULT_RANGE[resolution], end
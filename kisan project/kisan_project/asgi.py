@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kisan_project.settings')
+# Read by settings_production, which closes connections after each request under ASGI
+os.environ['KISAN_ASGI'] = 'true'
 
 application = get_asgi_application()
\ No newline at end of file
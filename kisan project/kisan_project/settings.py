@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Removes itself unless KISAN_PROFILING is on (see below)
+    'kisan_app.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -50,6 +52,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'kisan_app.routing.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'kisan_project.urls'
@@ -65,6 +68,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'kisan_app.context_processors.unread_notifications',
             ],
         },
     },
@@ -83,6 +87,37 @@ DATABASES = {
     }
 }
 
+# To try replica routing locally, copy db.sqlite3 and point KISAN_SQLITE_REPLICA at the copy
+if os.environ.get('KISAN_SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['KISAN_SQLITE_REPLICA'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Read replicas (kisan_app/routing.py): GET requests to KISAN_REPLICA_ROUTES read
+# from a random replica alias. After a POST the visitor reads from the primary for
+# KISAN_REPLICA_LAG seconds, the longest replication delay we expect.
+KISAN_READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+KISAN_REPLICA_LAG = int(os.environ.get('KISAN_REPLICA_LAG', '5'))
+KISAN_REPLICA_ROUTES = [
+    'kisan_app:home',
+    'kisan_app:farmers_list',
+    'kisan_app:crops_list',
+    'kisan_app:analytics_dashboard',
+    'kisan_app:weather_info',
+    'kisan_app:notifications',
+    'kisan_app:api_index',
+    'kisan_app:api_farmers',
+    'kisan_app:api_crops',
+    'kisan_app:api_prices',
+    'kisan_app:api_price_history',
+    'kisan_app:api_weather',
+    'kisan_app:api_weather_history',
+    'kisan_app:api_notifications',
+]
+DATABASE_ROUTERS = ['kisan_app.routing.ReplicaRouter']
+
 # For production, you might want to use PostgreSQL
 # DATABASES = {
 #     'default': {
@@ -96,6 +131,59 @@ DATABASES = {
 # }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Pages and dashboard fragments are cached until the models they read change
+# (see kisan_app/cache.py). The version counters that invalidate them live in
+# the cache too, so every process serving requests must share it:
+#   locmem (default here): one process only, e.g. runserver
+#   file: every worker on one host (KISAN_CACHE_LOCATION, default ./cache)
+#   db: every worker on every host; needs `python manage.py createcachetable`
+# settings_production refuses locmem.
+
+KISAN_CACHE_BACKEND = os.environ.get('KISAN_CACHE_BACKEND', 'locmem')
+KISAN_CACHE_TIMEOUT = int(os.environ.get('KISAN_CACHE_TIMEOUT', '300'))
+# Hit and miss counts for /cache-stats/, a few extra cache round trips per request
+KISAN_CACHE_STATS = os.environ.get('KISAN_CACHE_STATS', 'True').lower() == 'true'
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'kisan',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('KISAN_CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'kisan_cache',
+    },
+}
+CACHES = {'default': CACHE_BACKENDS.get(KISAN_CACHE_BACKEND, CACHE_BACKENDS['locmem'])}
+
+# Per-request profiling (kisan_app/profiling.py): adds Server-Timing headers
+# and keeps the slowest requests of each process for /profiling/.
+KISAN_PROFILING = os.environ.get('KISAN_PROFILING', 'False').lower() == 'true'
+KISAN_PROFILING_SLOWEST = int(os.environ.get('KISAN_PROFILING_SLOWEST', '50'))
+
+# Threads (each with its own database connection) that async views use to run
+# independent queries concurrently (kisan_app/parallel.py)
+KISAN_QUERY_THREADS = int(os.environ.get('KISAN_QUERY_THREADS', '8'))
+
+# Retention (kisan_app/retention.py): `python manage.py archive_old_rows` moves
+# rows older than `days` out of the hot tables into ArchivedRecord.
+KISAN_RETENTION = {
+    'notifications': {
+        'days': int(os.environ.get('KISAN_RETAIN_NOTIFICATION_DAYS', '180')),
+        # Unread notifications stay until they are read, whatever their age
+        'keep_unread': True,
+    },
+    'weather': {'days': int(os.environ.get('KISAN_RETAIN_WEATHER_DAYS', '90'))},
+    'prices': {'days': int(os.environ.get('KISAN_RETAIN_PRICE_DAYS', '730'))},
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -135,7 +223,10 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Hashed file names need collectstatic, so they are left to settings_production;
+# here WhiteNoise serves static/ straight from the finders
+STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
+WHITENOISE_USE_FINDERS = True
 
 # Media files (user uploads)
 MEDIA_URL = '/media/'
@@ -1,16 +1,51 @@
 from .settings import *
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.environ.get('SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = False
 
+# Full-text and trigram search (see kisan_app/search.py)
+INSTALLED_APPS = INSTALLED_APPS + ['django.contrib.postgres']
+
 ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', '').split(',')
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+# KISAN_DB_CONNECTIONS picks how connections are reused:
+#   persistent (default): each worker thread keeps its connection open for
+#       DB_CONN_MAX_AGE seconds and checks it still works before reusing it,
+#       so a gunicorn worker holds a pool of one connection per thread
+#   pgbouncer: the same, for a PgBouncer in transaction pooling mode between
+#       the workers and PostgreSQL (DB_HOST/DB_PORT point at PgBouncer).
+#       Server-side cursors are disabled because they cannot outlive the
+#       transaction PgBouncer pins a server connection to
+#   none: a new connection for every request, Django's default
+# `python benchmark_connections.py` compares the profiles under load.
+#
+# Under ASGI (kisan_project/asgi.py sets KISAN_ASGI) Django runs each request's
+# database work on a new thread, so a persistent connection would never be
+# reused, only left open until the server drops it. Connections are closed
+# after every request there whatever the profile; use pgbouncer so that
+# reconnecting stays cheap.
+#
+# Connections per worker process: one per request thread (1 for the sync
+# worker, GUNICORN_THREADS for gthread, one per in-flight request under ASGI)
+# plus up to KISAN_QUERY_THREADS (default 8) for the async dashboards' query
+# pool. Times WEB_CONCURRENCY, that must fit PostgreSQL's max_connections, or
+# PgBouncer's max_client_conn.
+
+KISAN_DB_CONNECTIONS = os.environ.get('KISAN_DB_CONNECTIONS', 'persistent')
+if KISAN_DB_CONNECTIONS not in ('persistent', 'pgbouncer', 'none'):
+    raise ImproperlyConfigured(
+        f"KISAN_DB_CONNECTIONS must be persistent, pgbouncer or none, not {KISAN_DB_CONNECTIONS!r}"
+    )
+SERVING_ASGI = os.environ.get('KISAN_ASGI', '').lower() == 'true'
+REUSE_CONNECTIONS = KISAN_DB_CONNECTIONS != 'none' and not SERVING_ASGI
 
 DATABASES = {
     'default': {
@@ -20,14 +55,74 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '600')) if REUSE_CONNECTIONS else 0,
+        'CONN_HEALTH_CHECKS': REUSE_CONNECTIONS,
+        'DISABLE_SERVER_SIDE_CURSORS': KISAN_DB_CONNECTIONS == 'pgbouncer',
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '5')),
+            'application_name': 'kisan',
+            # Notice dropped idle connections (e.g. behind a NAT) instead of hanging on them
+            'keepalives': 1,
+            'keepalives_idle': 60,
+        },
     }
 }
 
+# Streaming replicas of DB_HOST for read-heavy pages, as comma-separated host[:port]
+# (see KISAN_REPLICA_ROUTES in settings.py)
+for number, address in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+KISAN_READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+# Cache
+# A local-memory cache is private to each gunicorn worker: after a write, the
+# worker that handled it bumps its own version counters and the others keep
+# serving stale pages and fragments for up to KISAN_CACHE_TIMEOUT. Production
+# therefore shares the cache: 'file' for the workers of a single instance,
+# 'db' once the app runs on more than one instance.
+
+KISAN_CACHE_BACKEND = os.environ.get('KISAN_CACHE_BACKEND', 'file')
+if KISAN_CACHE_BACKEND not in ('file', 'db'):
+    raise ImproperlyConfigured(
+        f"KISAN_CACHE_BACKEND must be file or db in production, not {KISAN_CACHE_BACKEND!r}"
+    )
+CACHES = {'default': CACHE_BACKENDS[KISAN_CACHE_BACKEND]}
+# Counting hits and misses costs file reads and writes or queries on every
+# cached request, much of what the cache saves; turn on while investigating
+KISAN_CACHE_STATS = os.environ.get('KISAN_CACHE_STATS', 'False').lower() == 'true'
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
-STATIC_ROOT = '/var/www/kisan/static/'
+# STATIC_ROOT may be relative to the project directory. collectstatic writes
+# each file there under a content hash (css/base.<hash>.css), which WhiteNoise
+# serves with a far-future immutable Cache-Control, so browsers fetch the
+# stylesheet once per deploy rather than with every page
+STATIC_ROOT = os.path.join(BASE_DIR, os.environ.get('STATIC_ROOT', '/var/www/kisan/static/'))
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+WHITENOISE_USE_FINDERS = False
+
+# Compile each template once per process (gunicorn.conf.py warms them before
+# forking) instead of relying on the implicit default
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}]
 
 # For HTTPS
 SECURE_SSL_REDIRECT = True
@@ -2,6 +2,7 @@
 """
 Startup script for the Kisan Project.
 This script will handle initial setup and start the development server.
+`python start_server.py production` starts gunicorn with gunicorn.conf.py instead.
 """
 
 import os
@@ -37,8 +38,16 @@ def start_server():
     print("Starting development server...")
     execute_from_command_line(['manage.py', 'runserver'])
 
+def start_production_server():
+    """Replace this process with gunicorn using the production server profile."""
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    print("Starting gunicorn with gunicorn.conf.py...")
+    os.execvp('gunicorn', ['gunicorn', '-c', 'gunicorn.conf.py'])
+
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "setup":
         setup_project()
+    elif len(sys.argv) > 1 and sys.argv[1] == "production":
+        start_production_server()
     else:
         start_server()
\ No newline at end of file